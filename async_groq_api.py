@@ -0,0 +1,264 @@
+import asyncio
+from concurrent.futures import wait
+import queue
+import threading
+import time
+
+from groq_api import RequestTiming, STREAM_DONE, parse_sse_line
+from utils.async_runner import get_background_loop
+from utils.http_client import async_send_with_retries, get_async_session, httpx
+from utils.rate_limiter import RateLimitExceeded
+
+# Marks the end of a turn in AsyncGroqAPI.stream()
+_END = object()
+
+class AsyncGroqAPI:
+    """
+    Asyncio client for the Groq API, alongside GroqAPI.
+
+    Takes its settings (API key, model, sampling parameters, timeouts, retry
+    policy, response cache, rate limiter) from a GroqAPI instance, so both
+    stay in sync, and records its timings in the same GroqAPI.timings.
+    Requests share one pooled httpx.AsyncClient per event loop and can run
+    concurrently. They are not coalesced: a turn may be cancelled at any
+    time, which would take other sessions' answers down with it.
+
+    The Streamlit script, which is synchronous, starts turns with submit()
+    or stream(): they run on a background event loop, may have a deadline
+    (for a streamed turn, on each wait for the next delta), and cancel the
+    previous turn of this client if it is still running, so a new utterance
+    never waits behind an answer nobody wants anymore.
+    """
+
+    def __init__(self, groq_api, background_loop=None):
+        self.groq_api = groq_api
+        self.background_loop = background_loop if background_loop is not None else get_background_loop()
+        self._current = None
+        self._lock = threading.Lock()
+
+        self.superseded = 0
+
+    async def generate_response(self, prompt, history=None, timeout=None):
+        """Generate a response; gives up with an error message after `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self._generate_response(prompt, history), timeout)
+        except asyncio.TimeoutError:
+            return f"Error with Groq API: no response within {timeout:g} seconds"
+
+    async def generate_response_stream(self, prompt, history=None):
+        """Async generator of text deltas, like GroqAPI.generate_response_stream"""
+        api = self.groq_api
+        start = time.perf_counter()
+        messages = api.build_messages(prompt, history)
+        cache_key = api.cache_key(messages)
+        if cache_key is not None:
+            cached = api.cache.get(cache_key)
+            if cached is not None:
+                total = time.perf_counter() - start
+                api.timings.append(RequestTiming(api.model, True, True, total, total, 1, True))
+                yield cached
+                return
+
+        first_token = None
+        chunks = 0
+        ok = False
+        deltas = []
+        try:
+            response = await self._send(messages, stream=True)
+            try:
+                if response.status_code != 200:
+                    await response.aread()
+                    yield f"Error: API returned status code {response.status_code}. {response.text}"
+                    return
+
+                complete = False
+                leading = True
+                async for line in response.aiter_lines():
+                    delta = parse_sse_line(line.encode("utf-8"))
+                    if delta is STREAM_DONE:
+                        complete = True
+                        break
+                    if not delta:
+                        continue
+                    # Match generate_response, which strips the reply
+                    if leading:
+                        delta = delta.lstrip()
+                        if not delta:
+                            continue
+                        leading = False
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    chunks += 1
+                    deltas.append(delta)
+                    yield delta
+            finally:
+                await response.aclose()
+            # A stream cut off before [DONE] is a truncated answer: not cached
+            if not complete:
+                yield "Error with Groq API: the response stream ended early"
+                return
+            ok = True
+            if cache_key is not None:
+                api.cache.put(cache_key, "".join(deltas).strip())
+
+        except httpx.ReadTimeout:
+            yield f"Error with Groq API: no response within {api.timeout[1]:g} seconds"
+        except Exception as e:
+            yield f"Error with Groq API: {str(e)}"
+        finally:
+            total = time.perf_counter() - start
+            api.timings.append(
+                RequestTiming(api.model, True, False, first_token if first_token is not None else total, total, chunks, ok)
+            )
+
+    def submit(self, prompt, history=None, timeout=None):
+        """
+        Start a turn on the background loop and return a
+        concurrent.futures.Future of the response text. The previous turn is
+        cancelled if it has not finished.
+        """
+        future = self.background_loop.submit(self.generate_response(prompt, history, timeout))
+        self._start_turn(future)
+        return future
+
+    def stream(self, prompt, history=None, idle_timeout=None):
+        """
+        Start a streamed turn on the background loop and return a regular
+        iterator of its text deltas, for use from the script thread. The turn
+        ends with an error when the first delta, or any later one, takes more
+        than `idle_timeout` seconds; a long answer that keeps streaming is
+        not cut off. The previous turn is cancelled if it has not finished;
+        the iterator of a cancelled turn simply ends. Abandoning the iterator
+        cancels the turn.
+        """
+        deltas = queue.Queue()
+
+        async def run_turn():
+            try:
+                await self._pump(prompt, history, deltas, idle_timeout)
+            except asyncio.TimeoutError:
+                deltas.put(f"\n\nError with Groq API: nothing received for {idle_timeout:g} seconds")
+            finally:
+                deltas.put(_END)
+
+        future = self.background_loop.submit(run_turn())
+        self._start_turn(future)
+        return self._iter_turn(deltas, future)
+
+    def cancel(self):
+        """Cancel the current turn, if any; returns True if one was running"""
+        with self._lock:
+            current, self._current = self._current, None
+
+        return current is not None and current.cancel()
+
+    async def _generate_response(self, prompt, history):
+        api = self.groq_api
+        start = time.perf_counter()
+        messages = api.build_messages(prompt, history)
+        cache_key = api.cache_key(messages)
+        if cache_key is not None:
+            cached = api.cache.get(cache_key)
+            if cached is not None:
+                total = time.perf_counter() - start
+                api.timings.append(RequestTiming(api.model, False, True, total, total, 1, True))
+                return cached
+
+        ok = False
+        try:
+            response = await self._send(messages, stream=False)
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+
+            if response.status_code == 200:
+                result = response.json()
+                response_text = result["choices"][0]["message"]["content"].strip()
+                ok = True
+                if cache_key is not None:
+                    api.cache.put(cache_key, response_text)
+                return response_text
+            else:
+                return f"Error: API returned status code {response.status_code}. {response.text}"
+
+        except httpx.ReadTimeout:
+            return f"Error with Groq API: no response within {api.timeout[1]:g} seconds"
+        except Exception as e:
+            return f"Error with Groq API: {str(e)}"
+        finally:
+            total = time.perf_counter() - start
+            api.timings.append(RequestTiming(api.model, False, False, total, total, 1, ok))
+
+    async def _send(self, messages, stream):
+        api = self.groq_api
+        headers, data = api.request_parts(messages, stream)
+        if api.rate_limiter is not None:
+            tokens = api.estimate_tokens(messages)
+            delay = api.rate_limiter.reserve(api.model, tokens)
+            if delay is None:
+                raise RateLimitExceeded(f"client-side rate limit for {api.model} reached, try again shortly")
+            sent = False
+            try:
+                while delay is not None and delay > 0:
+                    await asyncio.sleep(delay)
+                    delay = api.rate_limiter.blocked_for(api.model)
+                sent = delay is not None
+            finally:
+                # A turn cancelled (or refused) while waiting gives its reservation back
+                if not sent:
+                    api.rate_limiter.cancel(api.model, tokens)
+            if not sent:
+                raise RateLimitExceeded(f"client-side rate limit for {api.model} reached, try again shortly")
+
+        connect_timeout, read_timeout = api.timeout
+        response = await async_send_with_retries(
+            get_async_session(),
+            "POST",
+            api.api_url,
+            retry_policy=api.retry_policy,
+            headers=headers,
+            json=data,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+        if api.rate_limiter is not None:
+            api.rate_limiter.update_from_headers(api.model, response.headers)
+        return response
+
+    async def _pump(self, prompt, history, deltas, idle_timeout):
+        response_stream = self.generate_response_stream(prompt, history)
+        try:
+            while True:
+                try:
+                    delta = await asyncio.wait_for(response_stream.__anext__(), idle_timeout)
+                except StopAsyncIteration:
+                    return
+                deltas.put(delta)
+        finally:
+            await response_stream.aclose()
+
+    def _start_turn(self, future):
+        with self._lock:
+            previous, self._current = self._current, future
+
+        if previous is not None and previous.cancel():
+            self.superseded += 1
+
+    def _iter_turn(self, deltas, future):
+        try:
+            while True:
+                try:
+                    delta = deltas.get(timeout=0.1)
+                except queue.Empty:
+                    # A turn cancelled before it started never reports its end
+                    if future.done() and deltas.empty():
+                        return
+                    continue
+                if delta is _END:
+                    # Let the turn wind down, so the next one does not count it as superseded
+                    wait([future], timeout=1.0)
+                    return
+                yield delta
+        finally:
+            if not future.done():
+                future.cancel()
@@ -0,0 +1,255 @@
+"""
+Offline sign recognition over recorded videos and image folders.
+
+Runs the same pipeline as the Non-Verbal Mode camera loop (MediaPipe Hands,
+landmark features, KeyPointClassifier, LetterCommitEngine) over every frame
+of the given sources, sharded across a process pool with one Hands instance
+and one classifier per worker. Writes per-frame predictions and final
+transcripts as JSONL or CSV (by file extension) and reports throughput per
+worker and overall.
+
+    python batch_recognize.py session1.mp4 session2.mp4 frames_dir/ \\
+        --predictions predictions.jsonl --transcripts transcripts.csv --workers 4
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2 as cv
+
+from model.keypoint_classifier.keypoint_classifier import KeyPointClassifier
+from utils.hand_tracker import FullFrameHandDetector
+from utils.letter_commit import LetterCommitEngine, most_confident
+from utils.sign_recognition import read_labels, recognize_hand_signs
+
+IMAGE_EXTENSIONS = {".bmp", ".jpeg", ".jpg", ".png", ".webp"}
+
+PREDICTION_FIELDS = ["source", "frame", "timestamp", "num_hands", "label", "confidence", "hands"]
+TRANSCRIPT_FIELDS = ["source", "frames", "seconds", "transcript"]
+
+# Per-process state, created once by _init_worker
+_worker = {}
+
+
+def make_shards(paths, chunk_size):
+    """
+    Split the inputs into units of work.
+
+    A video is one shard, since MediaPipe tracking needs its frames in order.
+    Image folders are processed in static-image mode and split into chunks of
+    `chunk_size` files.
+    """
+    shards = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+            )
+            for start in range(0, len(files), chunk_size):
+                shards.append({"source": path, "kind": "images", "start": start, "files": files[start:start + chunk_size]})
+        elif os.path.isfile(path):
+            shards.append({"source": path, "kind": "video", "start": 0, "files": [path]})
+        else:
+            print(f"warning: skipping {path}: not a file or directory", file=sys.stderr)
+
+    return shards
+
+
+def _init_worker(options):
+    import mediapipe as mp
+
+    def make_detector(static_image_mode):
+        return FullFrameHandDetector(
+            mp.solutions.hands.Hands(
+                static_image_mode=static_image_mode,
+                max_num_hands=options["max_num_hands"],
+                min_detection_confidence=options["min_detection_confidence"],
+                min_tracking_confidence=options["min_tracking_confidence"],
+            )
+        )
+
+    _worker["detectors"] = {"video": make_detector(False), "images": make_detector(True)}
+    _worker["classifier"] = KeyPointClassifier(backend=options["backend"])
+    _worker["labels"] = read_labels()
+    _worker["options"] = options
+
+
+def _frames(shard, fps):
+    """Yield (frame index, timestamp in seconds, BGR image) for a shard"""
+    if shard["kind"] == "images":
+        for offset, path in enumerate(shard["files"]):
+            image = cv.imread(path)
+            if image is not None:
+                index = shard["start"] + offset
+                yield index, index / fps, image
+        return
+
+    cap = cv.VideoCapture(shard["files"][0])
+    video_fps = cap.get(cv.CAP_PROP_FPS) or fps
+    index = 0
+    try:
+        while True:
+            ret, image = cap.read()
+            if not ret:
+                break
+            yield index, index / video_fps, image
+            index += 1
+    finally:
+        cap.release()
+
+
+def _process_shard(shard):
+    detector = _worker["detectors"][shard["kind"]]
+    classifier = _worker["classifier"]
+    labels = _worker["labels"]
+    options = _worker["options"]
+    detector.reset()
+
+    predictions = []
+    start = time.perf_counter()
+    for index, timestamp, image in _frames(shard, options["fps"]):
+        _, hand_signs = recognize_hand_signs(image, detector, classifier, labels, mirror=options["mirror"])
+        label, confidence = most_confident(hand_signs)
+        predictions.append({
+            "source": shard["source"],
+            "frame": index,
+            "timestamp": round(timestamp, 4),
+            "num_hands": len(hand_signs),
+            "label": label,
+            "confidence": round(confidence, 4),
+            "hands": [[hand_label, round(probability, 4)] for hand_label, probability in hand_signs],
+        })
+
+    return {
+        "source": shard["source"],
+        "start": shard["start"],
+        "worker": os.getpid(),
+        "seconds": time.perf_counter() - start,
+        "predictions": predictions,
+    }
+
+
+def transcribe(predictions, labels, commit_params):
+    """Run the letter commit engine over one source's ordered predictions"""
+    engine = LetterCommitEngine(labels, **commit_params)
+    text = ""
+    for prediction in predictions:
+        committed = engine.update(prediction["label"], prediction["confidence"], prediction["timestamp"])
+        if committed == " " and (not text or text.endswith(" ")):
+            continue
+        text += committed
+
+    return text.strip()
+
+
+def write_records(path, records, fields):
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for record in records:
+                row = dict(record)
+                if isinstance(row.get("hands"), list):
+                    row["hands"] = ";".join(f"{label}:{probability}" for label, probability in row["hands"])
+                writer.writerow(row)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline sign recognition over videos and image folders")
+    parser.add_argument("inputs", nargs="+", help="video files and/or directories of images")
+    parser.add_argument("--predictions", default="predictions.jsonl", help="per-frame output (.jsonl or .csv)")
+    parser.add_argument("--transcripts", default="transcripts.jsonl", help="per-source transcripts (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=200, help="images per shard for image folders")
+    parser.add_argument("--fps", type=float, default=30.0, help="frame rate assumed for image folders")
+    parser.add_argument("--backend", default="numpy", choices=["numpy", "tflite"], help="keypoint classifier backend")
+    parser.add_argument("--no-mirror", dest="mirror", action="store_false", help="do not mirror frames (input is already mirrored)")
+    parser.add_argument("--max-num-hands", type=int, default=2)
+    parser.add_argument("--min-detection-confidence", type=float, default=0.7)
+    parser.add_argument("--min-tracking-confidence", type=float, default=0.5)
+    parser.add_argument("--window", type=int, default=8, help="letter commit: frames considered")
+    parser.add_argument("--min-votes", type=int, default=5, help="letter commit: frames that must agree")
+    parser.add_argument("--min-confidence", type=float, default=0.7, help="letter commit: minimum confidence")
+    parser.add_argument("--release-frames", type=int, default=3, help="letter commit: frames before a letter can repeat")
+    parser.add_argument("--space-after", type=float, default=2.0, help="letter commit: seconds before a space")
+    args = parser.parse_args()
+
+    shards = make_shards(args.inputs, args.chunk_size)
+    if not shards:
+        sys.exit("no input to process")
+
+    options = {
+        "backend": args.backend,
+        "mirror": args.mirror,
+        "fps": args.fps,
+        "max_num_hands": args.max_num_hands,
+        "min_detection_confidence": args.min_detection_confidence,
+        "min_tracking_confidence": args.min_tracking_confidence,
+    }
+    commit_params = {
+        "window": args.window,
+        "min_votes": args.min_votes,
+        "min_confidence": args.min_confidence,
+        "release_frames": args.release_frames,
+        "space_after": args.space_after,
+    }
+
+    results = []
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(options,)) as pool:
+        futures = [pool.submit(_process_shard, shard) for shard in shards]
+        for future in as_completed(futures):
+            result = future.result()
+            frames = len(result["predictions"])
+            print(
+                f"{result['source']} [{result['start']}+{frames}] worker {result['worker']}: "
+                f"{frames / max(result['seconds'], 1e-9):.1f} fps",
+                file=sys.stderr,
+            )
+            results.append(result)
+    wall_time = time.perf_counter() - wall_start
+
+    # Reassemble each source in frame order
+    results.sort(key=lambda result: (args.inputs.index(result["source"]), result["start"]))
+    predictions = [prediction for result in results for prediction in result["predictions"]]
+    write_records(args.predictions, predictions, PREDICTION_FIELDS)
+
+    labels = read_labels()
+    transcripts = []
+    for source in dict.fromkeys(result["source"] for result in results):
+        source_predictions = [prediction for prediction in predictions if prediction["source"] == source]
+        transcripts.append({
+            "source": source,
+            "frames": len(source_predictions),
+            "seconds": source_predictions[-1]["timestamp"] if source_predictions else 0.0,
+            "transcript": transcribe(source_predictions, labels, commit_params),
+        })
+    write_records(args.transcripts, transcripts, TRANSCRIPT_FIELDS)
+
+    # Throughput per worker (frames / busy time) and overall (frames / wall time)
+    per_worker = {}
+    for result in results:
+        frames, seconds = per_worker.get(result["worker"], (0, 0.0))
+        per_worker[result["worker"]] = (frames + len(result["predictions"]), seconds + result["seconds"])
+    for worker, (frames, seconds) in sorted(per_worker.items()):
+        print(f"worker {worker}: {frames} frames in {seconds:.1f} s, {frames / max(seconds, 1e-9):.1f} fps")
+    print(
+        f"overall: {len(predictions)} frames from {len(transcripts)} sources in {wall_time:.1f} s, "
+        f"{len(predictions) / max(wall_time, 1e-9):.1f} fps with {len(per_worker)} workers"
+    )
+    for transcript in transcripts:
+        print(f"{transcript['source']}: {transcript['transcript']!r}")
+
+
+if __name__ == "__main__":
+    main()
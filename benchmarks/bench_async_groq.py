@@ -0,0 +1,132 @@
+"""
+AsyncGroqAPI against the local stub in llm_stub.py: concurrency, deadlines
+and cancellation of superseded turns.
+
+Checks that --concurrency concurrent requests take about as long as one,
+that a deadline shorter than the reply returns an error instead of
+blocking, that a streamed turn's idle timeout lets a long answer stream to
+the end but gives up on a server that does not answer, and that starting a
+new streamed turn cancels the previous one:
+the stub sees the aborted connection and the new turn's first token is not
+delayed by the old reply. Last, a turn cancelled by its deadline while it
+waits for the client-side rate limiter must give its reservation back. Run
+from the repository root:
+
+    python benchmarks/bench_async_groq.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_groq_api import AsyncGroqAPI  # noqa: E402
+from groq_api import GroqAPI  # noqa: E402
+from utils.rate_limiter import RateLimiter  # noqa: E402
+
+from llm_stub import start_stub  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AsyncGroqAPI benchmark against a local SSE stub")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent requests")
+    parser.add_argument("--tokens", type=int, default=40, help="tokens per reply")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="generation time per token")
+    args = parser.parse_args()
+
+    server = start_stub(token_delay=args.token_ms / 1000.0, num_tokens=args.tokens)
+    groq_api = GroqAPI(connect_timeout=2.0, read_timeout=30.0)
+    groq_api.api_url = server.url
+    async_groq_api = AsyncGroqAPI(groq_api)
+    reply_seconds = args.tokens * args.token_ms / 1000.0
+
+    try:
+        expected = async_groq_api.submit("Hi").result()
+
+        # Concurrency: one request, then --concurrency of them at once
+        start = time.perf_counter()
+        async_groq_api.background_loop.run(async_groq_api.generate_response("Hi"))
+        single = time.perf_counter() - start
+
+        async def gather():
+            return await asyncio.gather(
+                *(async_groq_api.generate_response("Hi") for _ in range(args.concurrency))
+            )
+
+        start = time.perf_counter()
+        replies = async_groq_api.background_loop.run(gather())
+        concurrent = time.perf_counter() - start
+        assert all(reply == expected for reply in replies), replies
+        print(f"1 request                {1000 * single:8.1f} ms")
+        print(f"{args.concurrency} concurrent requests   {1000 * concurrent:8.1f} ms")
+
+        # Deadline: a quarter of the reply time
+        deadline = reply_seconds / 4
+        start = time.perf_counter()
+        reply = async_groq_api.submit("Hi", timeout=deadline).result()
+        elapsed = time.perf_counter() - start
+        assert reply.startswith("Error"), reply
+        print(f"deadline {1000 * deadline:6.1f} ms        {1000 * elapsed:8.1f} ms  -> {reply!r}")
+
+        # Idle timeout: shorter than the whole reply, longer than any gap in it
+        idle_timeout = reply_seconds / 4
+        text = "".join(async_groq_api.stream("Hi", idle_timeout=idle_timeout)).strip()
+        assert text == expected, text
+        print(f"idle timeout {1000 * idle_timeout:6.1f} ms    streamed the whole {1000 * reply_seconds:.0f} ms reply")
+
+        # Supersede: start a stream, read its first token, then start a new turn
+        aborted_before = server.aborted
+        first_turn = async_groq_api.stream("Hi")
+        next(first_turn)
+        start = time.perf_counter()
+        second_turn = async_groq_api.stream("Hi again")
+        leftover = list(first_turn)
+        first_token = next(second_turn)
+        new_first_token = time.perf_counter() - start
+        text = (first_token + "".join(second_turn)).strip()
+        assert text == expected, text
+        time.sleep(0.1)
+        print(f"superseded turn          ended after {len(leftover)} more deltas, "
+              f"server aborts {server.aborted - aborted_before}")
+        print(f"new turn first token     {1000 * new_first_token:8.1f} ms  "
+              f"(old reply would have taken {1000 * reply_seconds:.0f} ms)")
+        print(f"superseded turns         {async_groq_api.superseded}")
+    finally:
+        server.shutdown()
+
+    # Idle timeout on a server that takes longer than it to send anything
+    server = start_stub(latency=lambda: 4 * reply_seconds)
+    groq_api.api_url = server.url
+    try:
+        start = time.perf_counter()
+        deltas = list(async_groq_api.stream("Hi", idle_timeout=reply_seconds / 4))
+        elapsed = time.perf_counter() - start
+        assert deltas[-1].strip().startswith("Error"), deltas
+        print(f"silent server            {1000 * elapsed:8.1f} ms  -> {deltas[-1].strip()!r}")
+    finally:
+        server.shutdown()
+
+    # Rate limit: one request per 10 seconds; the second turn gives up waiting
+    server = start_stub(num_tokens=3)
+    limiter = RateLimiter(requests_per_minute=6, burst_requests=1, tokens_per_minute=1e9)
+    limited_api = GroqAPI(rate_limiter=limiter)
+    limited_api.api_url = server.url
+    limited_async_api = AsyncGroqAPI(limited_api)
+    try:
+        assert not limited_async_api.submit("Hi").result().startswith("Error")
+        reply = limited_async_api.submit("Hi again", timeout=0.2).result()
+        assert reply.startswith("Error"), reply
+        # With the reservation given back, the next request waits for one slot, not two
+        tokens = limited_api.estimate_tokens(limited_api.build_messages("Hi"))
+        delay = limiter.reserve(limited_api.model, tokens)
+        limiter.cancel(limited_api.model, tokens)
+        print(f"cancelled while limited  next request waits {delay:.1f} s, {limiter.stats()['requests']} admitted")
+        assert delay < 10.0, "the cancelled turn kept its rate limiter reservation"
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Audio delivery to the browser: the temp file + base64 data URI path that
+play_audio_in_app used before, against publishing the clip to the
+in-memory AudioServer and referencing it by URL.
+
+Reports, per utterance, the HTML payload pushed through the page and the
+server-side overhead after --utterances utterances (the old cleanup loop
+stats every earlier file name, so its cost grows with the session). Then
+fetches a clip over HTTP as a browser would: the first request, a
+revalidation with If-None-Match and a byte range. Clips are --clip-kb of
+random bytes, standing in for MP3 audio. Run from the repository root:
+
+    python benchmarks/bench_audio_delivery.py
+"""
+import argparse
+import base64
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audio_server import AudioServer  # noqa: E402
+
+AUDIO_HTML = """
+    <audio id="{audio_id}" autoplay="true">
+        <source src="{audio_src}" type="audio/mp3">
+        Your browser does not support the audio element.
+    </audio>
+"""
+
+
+def temp_file_delivery(audio_bytes, counter):
+    """The previous play_audio_in_app, minus synthesis and rendering"""
+    audio_file_path = f"temp_audio_{counter}.mp3"
+    with open(audio_file_path, "wb") as audio_file:
+        audio_file.write(audio_bytes)
+    with open(audio_file_path, "rb") as audio_file:
+        audio_b64 = base64.b64encode(audio_file.read()).decode()
+    html = AUDIO_HTML.format(audio_id=f"auto_audio_{counter}", audio_src=f"data:audio/mp3;base64,{audio_b64}")
+    try:
+        if counter > 5:
+            for i in range(1, counter - 5):
+                old_file = f"temp_audio_{i}.mp3"
+                if os.path.exists(old_file):
+                    os.remove(old_file)
+    except Exception:
+        pass
+    return html
+
+
+def server_delivery(server, session_id, audio_bytes, counter):
+    audio_src = server.publish(session_id, audio_bytes)
+    return AUDIO_HTML.format(audio_id=f"auto_audio_{counter}", audio_src=audio_src)
+
+
+def measure(name, deliver, clips):
+    latencies = []
+    payload = 0
+    for counter, audio_bytes in enumerate(clips, start=1):
+        start = time.perf_counter()
+        html = deliver(audio_bytes, counter)
+        latencies.append(1e6 * (time.perf_counter() - start))
+        payload = len(html.encode("utf-8"))
+    tail = latencies[-len(latencies) // 10:]
+    print(
+        f"{name:10s} page payload {payload / 1024:8.1f} kB/utterance  overhead first {latencies[0]:8.1f} us  "
+        f"median {statistics.median(latencies):8.1f} us  last 10% {statistics.median(tail):8.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio delivery benchmark: base64 data URIs vs the audio server")
+    parser.add_argument("--utterances", type=int, default=1000, help="utterances in the session")
+    parser.add_argument("--clip-kb", type=float, default=40.0, help="size of each clip")
+    args = parser.parse_args()
+
+    clips = [os.urandom(int(args.clip_kb * 1024)) for _ in range(args.utterances)]
+    server = AudioServer(port=0)
+    session_id = server.new_session()
+    previous_cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as working_dir:
+            os.chdir(working_dir)
+            measure("temp file", temp_file_delivery, clips)
+            left_over = len(os.listdir(working_dir))
+            os.chdir(previous_cwd)
+        measure("by URL", lambda audio_bytes, counter: server_delivery(server, session_id, audio_bytes, counter), clips)
+        print(f"temp files left in the working directory: {left_over}; audio server {server.stats()}")
+
+        url = server.publish(session_id, clips[-1])
+        start = time.perf_counter()
+        response = requests.get(url)
+        first = 1000 * (time.perf_counter() - start)
+        assert response.status_code == 200 and response.content == clips[-1], response.status_code
+        print(f"fetch      {first:6.2f} ms  {response.headers['Content-Type']}  {response.headers['Cache-Control']}")
+
+        revalidated = requests.get(url, headers={"If-None-Match": response.headers["ETag"]})
+        assert revalidated.status_code == 304 and not revalidated.content, revalidated.status_code
+        ranged = requests.get(url, headers={"Range": "bytes=100-199"})
+        assert ranged.status_code == 206 and ranged.content == clips[-1][100:200], ranged.status_code
+        print(f"revalidate {revalidated.status_code}, range {ranged.status_code} {ranged.headers['Content-Range']}")
+
+        # The per-session store is bounded
+        store_stats = server.store(session_id).stats()
+        assert store_stats["clips"] <= server.max_clips, store_stats
+        assert requests.get(url.replace(session_id, server.new_session())).status_code == 404
+        print(f"session store {store_stats}")
+    finally:
+        os.chdir(previous_cwd)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Time to first audio of a long spoken answer: synthesizing the whole text
+before playback, as play_audio_in_app did, against ChunkedSpeechSynthesizer
+(sentence chunks on a thread pool, played from the first one on).
+
+Synthesis is simulated with --synth-base-ms per request plus
+--synth-char-ms per character, roughly like gTTS. The answer is --tokens
+tokens of about 4 characters, either complete or streamed at --token-ms per
+token. Besides the time to first audio and to the last chunk, reports how
+often playback would stall waiting for the next chunk, at --speech-cps
+characters per second of speech. The last runs hand the streamed turn to a
+ClipQueue, taken from like the app's browser playlist, and stream it through
+the AudioServer, read over HTTP like the browser, checking that the chunks
+arrive in order. Run from the repository root:
+
+    python benchmarks/bench_chunked_tts.py
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audio_server import AudioServer  # noqa: E402
+from utils.chunked_speech import ChunkedSpeechSynthesizer, ClipQueue  # noqa: E402
+
+WORDS = "the voice assistant answers questions about weather travel cooking music history and science".split()
+
+
+def make_answer(tokens, seed):
+    rng = random.Random(seed)
+    sentences = []
+    length = 0
+    while length < 4 * tokens:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 30))]
+        if len(words) > 14:
+            words[len(words) // 2] += ","
+        sentence = " ".join(words).capitalize() + rng.choice(".!?")
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def simulated_synthesizer(base_ms, char_ms):
+    def synthesize(text, lang):
+        time.sleep((base_ms + char_ms * len(text)) / 1000.0)
+        return text.encode("utf-8")
+    return synthesize
+
+
+def token_stream(text, token_ms):
+    for start in range(0, len(text), 4):
+        time.sleep(token_ms / 1000.0)
+        yield text[start:start + 4]
+
+
+class TimedSink(object):
+    """Records when each chunk is handed over, to check playback against it"""
+
+    def __init__(self, started):
+        self.started = started
+        self.arrivals = []
+        self.parts = []
+
+    def append(self, audio):
+        self.arrivals.append(time.perf_counter() - self.started)
+        self.parts.append(audio)
+
+    def close(self):
+        pass
+
+
+def stalls(arrivals, parts, speech_cps):
+    """Number of times playback would wait for the next chunk, and the total wait"""
+    count, waited, playing_until = 0, 0.0, 0.0
+    for arrival, audio in zip(arrivals, parts):
+        if arrival > playing_until and playing_until > 0:
+            count += 1
+            waited += arrival - playing_until
+        playing_until = max(playing_until, arrival) + len(audio) / speech_cps
+    return count, waited
+
+
+def report(name, first, last, sink=None, speech_cps=None):
+    line = f"{name:28s} first audio {1000 * first:8.0f} ms  last chunk {1000 * last:8.0f} ms"
+    if sink is not None:
+        count, waited = stalls(sink.arrivals, sink.parts, speech_cps)
+        line += f"  chunks {len(sink.parts):3d}  stalls {count} ({1000 * waited:.0f} ms)"
+    print(line)
+
+
+def chunked(synthesize, workers, text, deltas):
+    synthesizer = ChunkedSpeechSynthesizer(synthesize, max_workers=workers)
+    started = time.perf_counter()
+    sink = TimedSink(started)
+    turn = synthesizer.start_turn("en", sink)
+    if deltas is None:
+        turn.feed(text)
+        turn.finish()
+    else:
+        for _ in turn.tee(deltas):
+            pass
+    turn.wait()
+    assert b" ".join(sink.parts).decode("utf-8") == " ".join(text.split()), "chunks out of order or lost"
+    synthesizer.executor.shutdown()
+    return turn, sink
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked TTS time to first audio benchmark")
+    parser.add_argument("--tokens", type=int, default=800, help="answer length in tokens (about 4 characters each)")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="streaming time per token")
+    parser.add_argument("--synth-base-ms", type=float, default=150.0, help="simulated time per synthesis request")
+    parser.add_argument("--synth-char-ms", type=float, default=2.0, help="simulated synthesis time per character")
+    parser.add_argument("--speech-cps", type=float, default=15.0, help="characters per second of speech")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    text = make_answer(args.tokens, args.seed)
+    synthesize = simulated_synthesizer(args.synth_base_ms, args.synth_char_ms)
+    print(f"answer of {len(text)} characters")
+
+    start = time.perf_counter()
+    synthesize(text, "en")
+    whole = time.perf_counter() - start
+    report("complete, whole text", whole, whole)
+    for workers in (1, 4):
+        turn, sink = chunked(synthesize, workers, text, None)
+        report(f"complete, chunked x{workers}", turn.time_to_first_audio, turn.completed - turn.started, sink,
+               args.speech_cps)
+
+    start = time.perf_counter()
+    synthesize("".join(token_stream(text, args.token_ms)), "en")
+    whole = time.perf_counter() - start
+    report("streamed, whole text after", whole, whole)
+    for workers in (1, 4):
+        turn, sink = chunked(synthesize, workers, text, token_stream(text, args.token_ms))
+        report(f"streamed, chunked x{workers}", turn.time_to_first_audio, turn.completed - turn.started, sink,
+               args.speech_cps)
+
+    # Into a clip queue, each chunk taken as soon as it is ready
+    synthesizer = ChunkedSpeechSynthesizer(synthesize, max_workers=4)
+    try:
+        queue = ClipQueue()
+        turn = synthesizer.start_turn("en", queue)
+        start = time.perf_counter()
+        producer = threading.Thread(target=lambda: list(turn.tee(token_stream(text, args.token_ms))))
+        producer.start()
+        taken, first_clip, done = [], None, False
+        while not done:
+            clips, done = queue.take(timeout=1.0)
+            if clips and first_clip is None:
+                first_clip = time.perf_counter() - start
+            taken.extend(audio for audio, mimetype in clips)
+        total = time.perf_counter() - start
+        producer.join()
+        assert b" ".join(taken).decode("utf-8") == " ".join(text.split()), "clips out of order, lost or taken twice"
+        report("streamed, clip queue", first_clip, total)
+    finally:
+        synthesizer.executor.shutdown()
+
+    # Through the audio server, read like the browser reads it
+    server = AudioServer(port=0)
+    synthesizer = ChunkedSpeechSynthesizer(synthesize, max_workers=4)
+    try:
+        session_id = server.new_session()
+        stream, url = server.open_stream(session_id)
+        turn = synthesizer.start_turn("en", stream)
+        start = time.perf_counter()
+        # The answer streams in (and is spoken) while the browser is reading
+        producer = threading.Thread(target=lambda: list(turn.tee(token_stream(text, args.token_ms))))
+        producer.start()
+        response = requests.get(url, stream=True)
+        received = []
+        first_byte = None
+        for data in response.iter_content(chunk_size=None):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            received.append(data)
+        total = time.perf_counter() - start
+        producer.join()
+        assert b"".join(received) == b"".join(stream.chunks), "streamed audio differs"
+        report("streamed, over HTTP", first_byte, total)
+        # Once complete, the clip is served like any other, with a length
+        replay = requests.get(url)
+        assert replay.content == b"".join(stream.chunks) and "Content-Length" in replay.headers
+    finally:
+        synthesizer.executor.shutdown()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
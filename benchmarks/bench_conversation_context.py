@@ -0,0 +1,121 @@
+"""
+Request payload size and latency of GroqAPI against conversation length,
+sending the full chat history vs a ConversationContext token budget.
+
+Builds synthetic chats of --lengths messages (short user questions, longer
+answers) and, for each, times building the request messages (with cold and
+warm per-message token caches) and a full request to the local stub in
+llm_stub.py. Last, --threads threads build from one shared context with a
+cache smaller than the chat, as the clients of a session do, and the builds
+are checked against a single-threaded one. Run from the repository root:
+
+    python benchmarks/bench_conversation_context.py
+    python benchmarks/bench_conversation_context.py --budget 1000 --summary-tokens 0
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_api import GroqAPI  # noqa: E402
+from utils.conversation_context import ConversationContext  # noqa: E402
+
+from llm_stub import start_stub  # noqa: E402
+
+
+def synthetic_chat(length):
+    messages = []
+    for index in range(length):
+        if index % 2 == 0:
+            content = f"Question {index // 2}: how do I say 'thank you' in sign language, and is it formal?"
+        else:
+            content = (
+                f"Answer {index // 2}. To sign 'thank you', touch the fingertips of a flat hand to your chin "
+                "and move the hand forward and slightly down toward the person you are thanking. "
+            ) * 4
+        messages.append({"role": "user" if index % 2 == 0 else "assistant", "content": content})
+    return messages
+
+
+def median_ms(function, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        function()
+        latencies.append(1000 * (time.perf_counter() - start))
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation context benchmark against a local stub")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[0, 10, 50, 200, 1000], help="history lengths")
+    parser.add_argument("--budget", type=int, default=2000, help="context token budget")
+    parser.add_argument("--summary-tokens", type=int, default=200, help="rolling summary token budget")
+    parser.add_argument("--requests", type=int, default=5, help="requests per measurement")
+    parser.add_argument("--threads", type=int, default=8, help="threads sharing one context in the last check")
+    args = parser.parse_args()
+
+    server = start_stub(num_tokens=3)
+    variants = {
+        "full": lambda: ConversationContext(token_budget=10 ** 9, summary_tokens=0),
+        "budgeted": lambda: ConversationContext(token_budget=args.budget, summary_tokens=args.summary_tokens),
+    }
+
+    print(f"{'messages':>8s} {'variant':>9s} {'sent':>5s} {'payload kB':>10s} "
+          f"{'build cold ms':>13s} {'build warm ms':>13s} {'request ms':>10s}")
+    try:
+        for length in args.lengths:
+            history = synthetic_chat(length)
+            prompt = "And how do I say 'you are welcome'?"
+            for name, make_context in variants.items():
+                groq_api = GroqAPI(context=make_context())
+                groq_api.api_url = server.url
+
+                cold = median_ms(lambda: GroqAPI(context=make_context()).build_messages(prompt, history), 3)
+                groq_api.build_messages(prompt, history)
+                warm = median_ms(lambda: groq_api.build_messages(prompt, history), 20)
+
+                messages = groq_api.build_messages(prompt, history)
+                payload = len(json.dumps(groq_api.request_parts(messages)[1]).encode("utf-8"))
+                request = median_ms(lambda: groq_api.generate_response(prompt, history=history), args.requests)
+                assert groq_api.last_timing.ok
+
+                print(f"{length:8d} {name:>9s} {len(messages):5d} {payload / 1024:10.1f} "
+                      f"{cold:13.3f} {warm:13.3f} {request:10.2f}")
+    finally:
+        server.shutdown()
+
+    # One context shared by several threads, its cache evicting all the time
+    history = synthetic_chat(50)
+    expected = ConversationContext(token_budget=args.budget, summary_tokens=args.summary_tokens).build("Hi", history)
+    shared = ConversationContext(token_budget=args.budget, summary_tokens=args.summary_tokens, max_cached=4)
+    errors = []
+
+    def build_repeatedly():
+        try:
+            for _ in range(3000):
+                assert shared.build("Hi", history) == expected, "build differs from a single-threaded one"
+        except Exception as e:
+            errors.append(e)
+
+    # Switch threads as often as possible, so that races show up
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    threads = [threading.Thread(target=build_repeatedly) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sys.setswitchinterval(switch_interval)
+    print(f"shared by {args.threads} threads: {len(errors)} failed builders" + (f" ({errors[0]!r})" if errors else ""))
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
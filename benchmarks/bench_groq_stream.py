@@ -0,0 +1,75 @@
+"""
+Time to first token and total time of GroqAPI, blocking vs streaming.
+
+Runs both against the local stub in llm_stub.py, which produces
+--tokens tokens at --token-ms per token, and checks that the streamed deltas
+add up to the same text as the blocking response, and that a stream cut
+off before its [DONE] event ends with an error and is not cached. Run from
+the repository root:
+
+    python benchmarks/bench_groq_stream.py
+    python benchmarks/bench_groq_stream.py --tokens 200 --token-ms 10
+"""
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_api import GroqAPI  # noqa: E402
+from utils.response_cache import ResponseCache  # noqa: E402
+
+from llm_stub import start_stub  # noqa: E402
+
+
+def report(name, timings):
+    print(
+        f"{name:10s} first token {1000 * statistics.median(t.first_token for t in timings):8.1f} ms  "
+        f"total {1000 * statistics.median(t.total for t in timings):8.1f} ms  "
+        f"chunks {timings[-1].chunks}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GroqAPI streaming benchmark against a local SSE stub")
+    parser.add_argument("--requests", type=int, default=5, help="requests per variant")
+    parser.add_argument("--tokens", type=int, default=100, help="tokens per reply")
+    parser.add_argument("--token-ms", type=float, default=15.0, help="generation time per token")
+    args = parser.parse_args()
+
+    server = start_stub(token_delay=args.token_ms / 1000.0, num_tokens=args.tokens)
+    groq_api = GroqAPI(connect_timeout=2.0, read_timeout=30.0)
+    groq_api.api_url = server.url
+
+    try:
+        blocking = []
+        for _ in range(args.requests):
+            expected = groq_api.generate_response("Hi")
+            blocking.append(groq_api.last_timing)
+
+        streaming = []
+        for _ in range(args.requests):
+            text = "".join(groq_api.generate_response_stream("Hi")).strip()
+            streaming.append(groq_api.last_timing)
+            assert text == expected, (text, expected)
+    finally:
+        server.shutdown()
+
+    report("blocking", blocking)
+    report("streaming", streaming)
+
+    server = start_stub(num_tokens=args.tokens, truncate_streams=True)
+    groq_api = GroqAPI(cache=ResponseCache(), connect_timeout=2.0, read_timeout=30.0)
+    groq_api.api_url = server.url
+    try:
+        deltas = list(groq_api.generate_response_stream("Hi"))
+        assert deltas[-1].startswith("Error"), deltas[-1]
+        assert groq_api.cache.stats()["entries"] == 0, "truncated answer was cached"
+    finally:
+        server.shutdown()
+    print(f"truncated  {len(deltas) - 1} deltas, then {deltas[-1]!r}; not cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Per-request latency of GroqAPI with and without connection reuse.
+
+Starts a local stub of the chat completions endpoint and sends the same
+requests through a bare requests.post per call (the previous GroqAPI
+behavior: a new connection every time) and through GroqAPI's pooled
+keep-alive session. The stub can delay every new connection by
+--handshake-ms to stand in for the TCP + TLS handshake to a remote API,
+which a plain local socket does not have.
+
+Also checks the retry path: the stub answers the first requests with 429
+and a Retry-After header, and GroqAPI must still return the completion.
+Run from the repository root:
+
+    python benchmarks/bench_http_session.py
+    python benchmarks/bench_http_session.py --handshake-ms 60 --requests 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_api import GroqAPI  # noqa: E402
+from utils.http_client import RetryPolicy  # noqa: E402
+
+from llm_stub import start_stub  # noqa: E402
+
+
+def bare_post(url):
+    """The previous GroqAPI request: module-level requests.post, no timeout"""
+    response = requests.post(
+        url,
+        headers={"Content-Type": "application/json", "Authorization": "Bearer test"},
+        json={"model": "stub", "messages": [{"role": "user", "content": "Hi"}], "temperature": 0.7, "max_tokens": 800},
+    )
+    return response.json()["choices"][0]["message"]["content"].strip()
+
+
+def measure(function, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        result = function()
+        latencies.append(1000.0 * (time.perf_counter() - start))
+        assert result == "Hello there.", result
+    return latencies
+
+
+def report(name, latencies, connections):
+    ordered = sorted(latencies)
+    print(
+        f"{name:28s} first {latencies[0]:7.2f} ms  median {statistics.median(latencies):7.2f} ms  "
+        f"p95 {ordered[int(0.95 * (len(ordered) - 1))]:7.2f} ms  connections {connections}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GroqAPI connection reuse benchmark against a local stub")
+    parser.add_argument("--requests", type=int, default=100, help="requests per variant")
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="simulated delay per new connection")
+    args = parser.parse_args()
+
+    server = start_stub(handshake_delay=args.handshake_ms / 1000.0)
+    url = server.url
+
+    try:
+        server.connections = 0
+        report("new connection per request", measure(lambda: bare_post(url), args.requests), server.connections)
+
+        groq_api = GroqAPI(connect_timeout=2.0, read_timeout=10.0)
+        groq_api.api_url = url
+        server.connections = 0
+        report("pooled keep-alive session", measure(lambda: groq_api.generate_response("Hi"), args.requests),
+               server.connections)
+
+        # Retry path: two 429 responses with Retry-After: 0, then success
+        server.throttle_remaining = 2
+        groq_api.retry_policy = RetryPolicy(max_retries=3)
+        start = time.perf_counter()
+        result = groq_api.generate_response("Hi")
+        print(f"{'after two 429 responses':28s} {1000.0 * (time.perf_counter() - start):7.2f} ms  -> {result!r}")
+        assert result == "Hello there.", result
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
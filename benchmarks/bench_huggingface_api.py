@@ -0,0 +1,125 @@
+"""
+HuggingFaceAPI (tokenless path) against the local stub in llm_stub.py:
+
+- connection reuse: a new connection per requests.post, as before, vs the
+  pooled session, with --handshake-ms per new connection
+- time to first token, blocking vs streaming
+- --batch prompts one after another vs generate_responses()
+- a cold model (503 "loading" for --load-ms): the first request without
+  and with warm_up() run ahead of it
+- streams cut off before their final event or ending in an error event:
+  an error is yielded and nothing is cached
+
+Run from the repository root:
+
+    python benchmarks/bench_huggingface_api.py
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from huggingface_api import HuggingFaceAPI  # noqa: E402
+from utils.response_cache import ResponseCache  # noqa: E402
+
+from llm_stub import start_stub  # noqa: E402
+
+
+def client_for(server):
+    client = HuggingFaceAPI()
+    client.api_base = server.url.rsplit("/", 4)[0] + "/models"
+    client.set_model("stub")
+    return client
+
+
+def median_ms(function, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        function()
+        latencies.append(1000 * (time.perf_counter() - start))
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HuggingFaceAPI benchmark against a local stub")
+    parser.add_argument("--requests", type=int, default=10, help="requests per measurement")
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="delay of every new connection")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="generation time per token")
+    parser.add_argument("--batch", type=int, default=16, help="prompts per batch")
+    parser.add_argument("--load-ms", type=float, default=1500.0, help="cold model load time")
+    args = parser.parse_args()
+
+    server = start_stub(handshake_delay=args.handshake_ms / 1000.0, num_tokens=3)
+    try:
+        client = client_for(server)
+        payload = {"inputs": "Hi", "parameters": {"max_new_tokens": 150}}
+        connections = server.connections
+        per_call = median_ms(lambda: requests.post(client.api_url, json=payload), args.requests)
+        print(f"requests.post per call   {per_call:8.1f} ms  connections {server.connections - connections}")
+        connections = server.connections
+        pooled = median_ms(lambda: client.generate_response("Hi"), args.requests)
+        print(f"pooled session           {pooled:8.1f} ms  connections {server.connections - connections}")
+    finally:
+        server.shutdown()
+
+    server = start_stub(token_delay=args.token_ms / 1000.0, num_tokens=40)
+    try:
+        client = client_for(server)
+        blocking = median_ms(lambda: client.generate_response("Hi"), 3)
+
+        def first_token():
+            deltas = client.generate_response_stream("Hi")
+            next(deltas)
+            deltas.close()
+
+        streaming = median_ms(first_token, 3)
+        text = "".join(client.generate_response_stream("Hi")).strip()
+        assert text == client.generate_response("Hi"), text
+        print(f"first token, blocking    {blocking:8.1f} ms")
+        print(f"first token, streaming   {streaming:8.1f} ms")
+
+        prompts = [f"Question {index}" for index in range(args.batch)]
+        sequential = median_ms(lambda: [client.generate_response(prompt) for prompt in prompts], 1)
+        batched = median_ms(lambda: client.generate_responses(prompts), 1)
+        print(f"{args.batch} prompts sequential    {sequential:8.1f} ms")
+        print(f"{args.batch} prompts, {client.max_parallel} parallel  {batched:8.1f} ms")
+    finally:
+        server.shutdown()
+
+    for warm in (False, True):
+        server = start_stub(num_tokens=3, load_time=args.load_ms / 1000.0)
+        try:
+            client = client_for(server)
+            if warm:
+                # At startup; the user's first message comes a little later
+                client.warm_up_in_background()
+                time.sleep(args.load_ms / 1000.0 + 0.5)
+            start = time.perf_counter()
+            reply = client.generate_response("Hi")
+            elapsed = 1000 * (time.perf_counter() - start)
+            label = "after warm-up" if warm else "cold"
+            print(f"first request, {label:13s} {elapsed:8.1f} ms  -> {reply!r}")
+        finally:
+            server.shutdown()
+
+    for name, options in (("truncated", {"truncate_streams": True}), ("error event", {"stream_error": "overloaded"})):
+        server = start_stub(num_tokens=20, **options)
+        try:
+            client = client_for(server)
+            client.cache = ResponseCache()
+            deltas = list(client.generate_response_stream("Hi"))
+            assert deltas[-1].startswith("Error"), deltas[-1]
+            assert client.cache.stats()["entries"] == 0, f"{name} answer was cached"
+        finally:
+            server.shutdown()
+        print(f"stream, {name:11s} {len(deltas) - 1} deltas, then {deltas[-1]!r}; not cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Parity check and benchmark for the KeyPointClassifier backends.
+
+For each backend, reports the cold import + construction time and peak RSS
+(each measured in a fresh interpreter), plus the per-call latency for one
+hand and for a batch of two. When TensorFlow is installed the NumPy backend
+is also checked against the TFLite outputs. Run from the repository root:
+
+    python benchmarks/bench_keypoint_backends.py
+"""
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model.keypoint_classifier.keypoint_classifier import KeyPointClassifier  # noqa: E402
+
+COLD_START = """
+import json, resource, sys, time
+start = time.perf_counter()
+from model.keypoint_classifier.keypoint_classifier import KeyPointClassifier
+classifier = KeyPointClassifier(backend=sys.argv[1])
+classifier([0.0] * 42)
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def available_backends():
+    backends = ["numpy"]
+    try:
+        import tensorflow  # noqa: F401
+    except ImportError:
+        print("tensorflow not installed: skipping the tflite backend and the parity check")
+    else:
+        backends.insert(0, "tflite")
+    return backends
+
+
+def make_features(count, seed=0):
+    """Wrist-relative, max-abs normalized features of random hands"""
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0.0, 1.0, size=(count, 21, 2))
+    relative = (points - points[:, :1]).reshape(count, 42)
+    return (relative / np.abs(relative).max(axis=1, keepdims=True)).astype(np.float32)
+
+
+def check_parity(features):
+    # The .tflite file stores dynamic-range int8 weights while the .npz keeps
+    # the float32 Keras weights, so the two agree up to quantization error
+    reference = KeyPointClassifier(backend="tflite")
+    candidate = KeyPointClassifier(backend="numpy")
+
+    expected = np.concatenate([reference.predict_proba(row) for row in features])
+    actual = candidate.predict_proba(features)
+
+    error = np.abs(expected - actual)
+    agreement = float((expected.argmax(axis=1) == actual.argmax(axis=1)).mean())
+    print(
+        f"parity: mean |p_tflite - p_numpy| = {error.mean():.2e} (max {error.max():.2e}), "
+        f"argmax agreement {agreement:.2%}"
+    )
+    assert agreement >= 0.97, "NumPy backend disagrees with the TFLite model"
+    assert error.mean() < 5e-3, "NumPy backend probabilities drift from the TFLite model"
+
+
+def cold_start(backend):
+    output = subprocess.check_output(
+        [sys.executable, "-c", COLD_START, backend], cwd=ROOT, stderr=subprocess.DEVNULL
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    backends = available_backends()
+    features = make_features(1000)
+
+    if "tflite" in backends:
+        check_parity(features)
+
+    print(f"{'backend':<10}{'import+init':>14}{'max RSS':>12}{'1 hand':>12}{'2 hands':>12}")
+    for backend in backends:
+        startup = cold_start(backend)
+
+        classifier = KeyPointClassifier(backend=backend)
+        one, two = features[:1], features[:2]
+        classifier.classify_batch(one)
+        single = min(timeit.repeat(lambda: classifier.classify_batch(one), number=2000, repeat=5)) / 2000
+        classifier.classify_batch(two)
+        pair = min(timeit.repeat(lambda: classifier.classify_batch(two), number=2000, repeat=5)) / 2000
+
+        print(
+            f"{backend:<10}{startup['seconds'] * 1e3:>11.0f} ms"
+            f"{startup['max_rss_kb'] / 1024:>9.0f} MB"
+            f"{single * 1e6:>9.1f} us{pair * 1e6:>9.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
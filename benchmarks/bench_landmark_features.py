@@ -0,0 +1,156 @@
+"""
+Micro-benchmark for the landmark feature path.
+
+Compares the per-hand loops that used to live in v6.py with the vectorized
+utils.landmark_features module and checks that both produce the same
+output. Run from the repository root:
+
+    python benchmarks/bench_landmark_features.py
+"""
+import copy
+import itertools
+import os
+import sys
+import timeit
+from types import SimpleNamespace
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.landmark_features import (  # noqa: E402
+    calc_hand_features,
+    landmarks_to_array,
+    multi_landmarks_to_array,
+)
+
+IMAGE_WIDTH, IMAGE_HEIGHT = 640, 480
+
+
+# Reference implementation, as previously found in v6.py
+def legacy_calc_bounding_rect(image, landmarks):
+    image_width, image_height = image.shape[1], image.shape[0]
+
+    landmark_array = np.empty((0, 2), int)
+
+    for _, landmark in enumerate(landmarks.landmark):
+        landmark_x = min(int(landmark.x * image_width), image_width - 1)
+        landmark_y = min(int(landmark.y * image_height), image_height - 1)
+
+        landmark_point = [np.array((landmark_x, landmark_y))]
+
+        landmark_array = np.append(landmark_array, landmark_point, axis=0)
+
+    x, y, w, h = cv.boundingRect(landmark_array)
+
+    return [x, y, x + w, y + h]
+
+
+def legacy_calc_landmark_list(image, landmarks):
+    image_width, image_height = image.shape[1], image.shape[0]
+
+    landmark_point = []
+
+    for _, landmark in enumerate(landmarks.landmark):
+        landmark_x = min(int(landmark.x * image_width), image_width - 1)
+        landmark_y = min(int(landmark.y * image_height), image_height - 1)
+
+        landmark_point.append([landmark_x, landmark_y])
+
+    return landmark_point
+
+
+def legacy_pre_process_landmark(landmark_list):
+    temp_landmark_list = copy.deepcopy(landmark_list)
+
+    base_x, base_y = 0, 0
+    for index, landmark_point in enumerate(temp_landmark_list):
+        if index == 0:
+            base_x, base_y = landmark_point[0], landmark_point[1]
+
+        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
+        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
+
+    temp_landmark_list = list(itertools.chain.from_iterable(temp_landmark_list))
+
+    max_value = max(list(map(abs, temp_landmark_list)))
+
+    def normalize_(n):
+        return n / max_value
+
+    return list(map(normalize_, temp_landmark_list))
+
+
+def make_hand(rng):
+    """Fake MediaPipe hand: float32-representable coordinates, some off-frame"""
+    coords = rng.uniform(-0.05, 1.05, size=(21, 2)).astype(np.float32)
+    return SimpleNamespace(
+        landmark=[SimpleNamespace(x=float(x), y=float(y)) for x, y in coords]
+    )
+
+
+def legacy(image, hand):
+    brect = legacy_calc_bounding_rect(image, hand)
+    landmark_list = legacy_calc_landmark_list(image, hand)
+    return landmark_list, brect, legacy_pre_process_landmark(landmark_list)
+
+
+def vectorized(hand):
+    return calc_hand_features(landmarks_to_array(hand), IMAGE_WIDTH, IMAGE_HEIGHT)
+
+
+def check_parity(image, hands):
+    for hand in hands:
+        landmark_list, brect, features = legacy(image, hand)
+        result = vectorized(hand)
+        assert result.points.tolist() == landmark_list
+        assert result.brect.tolist() == brect
+        np.testing.assert_allclose(result.features, features, rtol=1e-6, atol=1e-7)
+
+    batch = calc_hand_features(multi_landmarks_to_array(hands), IMAGE_WIDTH, IMAGE_HEIGHT)
+    for index, hand in enumerate(hands):
+        single = vectorized(hand)
+        assert np.array_equal(batch.points[index], single.points)
+        assert np.array_equal(batch.brect[index], single.brect)
+        assert np.array_equal(batch.features[index], single.features)
+
+
+def bench(label, func, number):
+    best = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{label:<32}{best * 1e6:10.2f} us")
+    return best
+
+
+def main():
+    rng = np.random.default_rng(0)
+    image = np.zeros((IMAGE_HEIGHT, IMAGE_WIDTH, 3), dtype=np.uint8)
+    hands = [make_hand(rng) for _ in range(200)]
+
+    check_parity(image, hands)
+    print(f"parity: OK on {len(hands)} hands")
+
+    hand = hands[0]
+    pair = hands[:2]
+    landmark_array = landmarks_to_array(hand)
+
+    legacy_time = bench("legacy, per hand", lambda: legacy(image, hand), 2000)
+    vector_time = bench("vectorized, per hand", lambda: vectorized(hand), 2000)
+    bench(
+        "vectorized, features only",
+        lambda: calc_hand_features(landmark_array, IMAGE_WIDTH, IMAGE_HEIGHT),
+        2000,
+    )
+    batch_time = bench(
+        "vectorized, batch of 2",
+        lambda: calc_hand_features(
+            multi_landmarks_to_array(pair), IMAGE_WIDTH, IMAGE_HEIGHT
+        ),
+        2000,
+    )
+    print(f"speedup per hand: {legacy_time / vector_time:.1f}x "
+          f"(batch of 2: {2 * legacy_time / batch_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
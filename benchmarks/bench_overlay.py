@@ -0,0 +1,163 @@
+"""
+Per-frame overlay cost, before and after HandOverlayRenderer.
+
+"before" is the previous v6.py path: copy.deepcopy of the camera frame, then
+draw_bounding_rect / draw_landmarks / draw_info_text for each hand (42 cv.line
+and 42 cv.circle calls per hand). "after" draws both hands in place
+with HandOverlayRenderer. Reports draw time and bytes allocated per frame
+(tracemalloc). First checks on the hands of the landmark fixture that both
+draw the same pixels, except where two bones of a hand cross outside the key
+point discs (the renderer puts a hand's outlines under all of its lines);
+exits with status 1 when they differ anywhere else. Run from the repository
+root:
+
+    python benchmarks/bench_overlay.py
+"""
+import copy
+import os
+import sys
+import timeit
+import tracemalloc
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.overlay import HAND_EDGES, HandOverlayRenderer  # noqa: E402
+
+from run_suite import DEFAULT_FIXTURE, LandmarkFixture  # noqa: E402
+
+IMAGE_WIDTH, IMAGE_HEIGHT = 640, 480
+
+
+# Reference implementation, as previously found in v6.py (loop form of the
+# same 21 bones, each drawn as a black line then a white line)
+def legacy_draw_landmarks(image, landmark_point):
+    if len(landmark_point) > 0:
+        for start, end in HAND_EDGES.tolist():
+            cv.line(image, tuple(landmark_point[start]), tuple(landmark_point[end]), (0, 0, 0), 6)
+            cv.line(image, tuple(landmark_point[start]), tuple(landmark_point[end]), (255, 255, 255), 2)
+
+    for index, landmark in enumerate(landmark_point):
+        cv.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255), -1)
+        cv.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
+
+    return image
+
+
+def legacy_draw_info_text(image, brect, info_text):
+    cv.rectangle(image, (brect[0], brect[1]), (brect[2], brect[1] - 22), (0, 0, 0), -1)
+    cv.putText(
+        image, info_text, (brect[0] + 5, brect[1] - 4),
+        cv.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv.LINE_AA,
+    )
+    return image
+
+
+def legacy_draw_bounding_rect(image, brect):
+    cv.rectangle(image, (brect[0], brect[1]), (brect[2], brect[3]), (0, 0, 0), 1)
+    return image
+
+
+def make_hands(rng, count=2):
+    points = rng.integers(40, 400, size=(count, 21, 2)).astype(np.int32)
+    brects = np.concatenate((points.min(axis=1), points.max(axis=1) + 1), axis=1)
+    return points, brects, ["Right:A"] * count
+
+
+def before(frame, points, brects, texts):
+    debug_image = copy.deepcopy(frame)
+    for landmark_list, brect, text in zip(points.tolist(), brects.tolist(), texts):
+        debug_image = legacy_draw_bounding_rect(debug_image, brect)
+        debug_image = legacy_draw_landmarks(debug_image, landmark_list)
+        debug_image = legacy_draw_info_text(debug_image, brect, text)
+    return debug_image
+
+
+def after(renderer, frame, points, brects, texts):
+    return renderer.draw(frame, points, brects, texts)
+
+
+def bone_crossings(points, shape):
+    """Mask of the pixels under the outlines of two bones of a hand, outside its key point discs"""
+    crossings = np.zeros(shape[:2], dtype=bool)
+    for landmark_list in points.tolist():
+        covered = np.zeros(shape[:2], dtype=np.uint8)
+        for start, end in HAND_EDGES.tolist():
+            bone = np.zeros(shape[:2], dtype=np.uint8)
+            cv.line(bone, tuple(landmark_list[start]), tuple(landmark_list[end]), 1, 6)
+            covered += bone
+        discs = np.zeros(shape[:2], dtype=np.uint8)
+        for landmark in landmark_list:
+            cv.circle(discs, tuple(landmark), 5, 1, -1)
+        crossings |= (covered > 1) & (discs == 0)
+    return crossings
+
+
+def check_parity(fixture, renderer):
+    """(frames compared, pixels differing at bone crossings, pixels differing elsewhere)"""
+    frame = np.full((fixture.image_height, fixture.image_width, 3), 128, dtype=np.uint8)
+    frame_size = np.array((fixture.image_width, fixture.image_height))
+    frames, crossing_pixels, other_pixels = 0, 0, 0
+    for index in range(len(fixture)):
+        landmarks = fixture.hands(index)[0]
+        if len(landmarks) == 0:
+            continue
+        points = np.minimum((landmarks * frame_size).astype(np.int32), frame_size - 1)
+        brects = np.concatenate((points.min(axis=1), points.max(axis=1) + 1), axis=1)
+        texts = ["Right:A"] * len(points)
+        legacy = before(frame, points, brects, texts)
+        differing = np.any(legacy != after(renderer, frame.copy(), points, brects, texts), axis=2)
+        crossings = bone_crossings(points, frame.shape)
+        frames += 1
+        crossing_pixels += int(np.count_nonzero(differing & crossings))
+        other_pixels += int(np.count_nonzero(differing & ~crossings))
+    return frames, crossing_pixels, other_pixels
+
+
+def allocated_per_frame(func, frames=50):
+    func()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start, _ = tracemalloc.get_traced_memory()
+    for _ in range(frames):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size for stat in snapshot.statistics("filename"))
+    return peak - start, total
+
+
+def main():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, size=(IMAGE_HEIGHT, IMAGE_WIDTH, 3), dtype=np.uint8)
+    points, brects, texts = make_hands(rng)
+    renderer = HandOverlayRenderer()
+    disabled = HandOverlayRenderer(enabled=False)
+
+    frames, crossing_pixels, other_pixels = check_parity(LandmarkFixture(DEFAULT_FIXTURE), renderer)
+    print(
+        f"parity with before on {frames} fixture frames: {crossing_pixels} pixels differ at bone crossings, "
+        f"{other_pixels} elsewhere"
+    )
+    if other_pixels:
+        print("FAILED the renderer draws other pixels than before")
+        sys.exit(1)
+
+    cases = [
+        ("before: deepcopy + cv.line/circle", lambda: before(frame, points, brects, texts)),
+        ("after: in place, polylines", lambda: after(renderer, frame, points, brects, texts)),
+        ("after: overlay disabled", lambda: after(disabled, frame, points, brects, texts)),
+    ]
+
+    print(f"{'two hands, 640x480':<36}{'draw time':>12}{'peak alloc':>14}")
+    for label, func in cases:
+        seconds = min(timeit.repeat(func, number=200, repeat=5)) / 200
+        peak, _ = allocated_per_frame(func)
+        print(f"{label:<36}{seconds * 1e6:>9.1f} us{peak / 1024:>11.1f} kB")
+
+
+if __name__ == "__main__":
+    main()
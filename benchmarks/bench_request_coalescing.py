@@ -0,0 +1,138 @@
+"""
+Concurrency test of request coalescing and the client-side rate limiter,
+with many threads against the local stub in llm_stub.py.
+
+Coalescing: --threads threads send the same prompt at the same moment
+(blocking and streamed), then --prompts distinct prompts spread over the
+threads; counts upstream requests with and without coalescing and checks
+that every thread gets the full answer.
+
+Rate limiting: the stub serves --quota requests per --window seconds and
+answers 429 beyond that. --limit-threads threads each send --rounds
+distinct prompts, without a limiter, with a limiter that is far too
+generous but follows the rate-limit headers, and with one matching the
+quota. Run from the repository root:
+
+    python benchmarks/bench_request_coalescing.py
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_api import GroqAPI  # noqa: E402
+from utils.http_client import NO_RETRIES  # noqa: E402
+from utils.rate_limiter import RateLimiter  # noqa: E402
+
+from llm_stub import start_stub  # noqa: E402
+
+
+def run_threads(count, target):
+    """Run target(index) in `count` threads released together; returns (results, seconds)"""
+    barrier = threading.Barrier(count + 1)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        results[index] = target(index)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def client_for(server, **options):
+    client = GroqAPI(retry_policy=NO_RETRIES, **options)
+    client.api_url = server.url
+    return client
+
+
+def coalescing(args):
+    server = start_stub(token_delay=args.token_ms / 1000.0, num_tokens=20)
+    try:
+        for coalesce in (False, True):
+            client = client_for(server, coalesce=coalesce)
+            expected = client.generate_response("warm up")
+            label = "coalesced" if coalesce else "separate"
+
+            before = server.requests
+            replies, elapsed = run_threads(args.threads, lambda index: client.generate_response("help"))
+            assert all(reply == expected for reply in replies), set(replies)
+            print(f"{label:9s} same prompt, blocking   upstream {server.requests - before:3d}  {1000 * elapsed:7.1f} ms")
+
+            before = server.requests
+            replies, elapsed = run_threads(
+                args.threads, lambda index: "".join(client.generate_response_stream("hello")).strip()
+            )
+            assert all(reply == expected for reply in replies), set(replies)
+            print(f"{label:9s} same prompt, streamed   upstream {server.requests - before:3d}  {1000 * elapsed:7.1f} ms")
+
+            before = server.requests
+            replies, elapsed = run_threads(
+                args.threads, lambda index: client.generate_response(f"question {index % args.prompts}")
+            )
+            assert all(reply == expected for reply in replies), set(replies)
+            print(f"{label:9s} {args.prompts} prompts, blocking    upstream {server.requests - before:3d}  "
+                  f"{1000 * elapsed:7.1f} ms")
+        print(f"coalescer stats {client.coalescer.stats()}")
+    finally:
+        server.shutdown()
+
+
+def rate_limiting(args):
+    variants = [
+        ("no limiter", None),
+        # The stub's quota only counts requests
+        ("headers only", RateLimiter(requests_per_minute=6000, tokens_per_minute=1e9)),
+        (
+            "matched",
+            RateLimiter(
+                requests_per_minute=60.0 * args.quota / args.window, tokens_per_minute=1e9,
+                burst_requests=args.quota, max_wait=60.0,
+            ),
+        ),
+    ]
+    for name, limiter in variants:
+        server = start_stub(num_tokens=3, quota=args.quota, quota_window=args.window)
+        try:
+            client = client_for(server, rate_limiter=limiter)
+            replies, elapsed = run_threads(
+                args.limit_threads,
+                lambda index: [client.generate_response(f"request {index}.{number}") for number in range(args.rounds)],
+            )
+            replies = [reply for thread_replies in replies for reply in thread_replies]
+            errors = sum(reply.startswith("Error") for reply in replies)
+            print(
+                f"{name:12s} answered {len(replies) - errors:3d}  errors {errors:3d}  "
+                f"429s {server.rejected:3d}  {elapsed:6.2f} s"
+                + (f"  {limiter.stats()}" if limiter is not None else "")
+            )
+        finally:
+            server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request coalescing and rate limiter concurrency test")
+    parser.add_argument("--threads", type=int, default=50, help="concurrent threads")
+    parser.add_argument("--prompts", type=int, default=5, help="distinct prompts in the mixed run")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="generation time per token")
+    parser.add_argument("--quota", type=int, default=10, help="requests the stub serves per window")
+    parser.add_argument("--window", type=float, default=1.0, help="stub quota window in seconds")
+    parser.add_argument("--limit-threads", type=int, default=10, help="concurrent threads in the rate limit test")
+    parser.add_argument("--rounds", type=int, default=5, help="requests per thread in the rate limit test")
+    args = parser.parse_args()
+
+    coalescing(args)
+    rate_limiting(args)
+
+
+if __name__ == "__main__":
+    main()
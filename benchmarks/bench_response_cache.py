@@ -0,0 +1,82 @@
+"""
+Latency of GroqAPI with a ResponseCache: miss, memory hit and SQLite hit.
+
+Uses the local stub in llm_stub.py as the API. A second ResponseCache on
+the same SQLite file stands in for a server restart. Also checks that
+prompts differing only in case and spacing share an entry, that error
+responses are not cached, and that the LRU evicts beyond max_entries. Run
+from the repository root:
+
+    python benchmarks/bench_response_cache.py
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_api import GroqAPI  # noqa: E402
+from utils.http_client import NO_RETRIES  # noqa: E402
+from utils.response_cache import ResponseCache  # noqa: E402
+
+from llm_stub import start_stub  # noqa: E402
+
+
+def timed_us(function, count):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        function()
+        latencies.append(1e6 * (time.perf_counter() - start))
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response cache benchmark against a local stub")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="stub generation time per token")
+    parser.add_argument("--repeat", type=int, default=1000, help="lookups per hit measurement")
+    args = parser.parse_args()
+
+    server = start_stub(token_delay=args.token_ms / 1000.0, num_tokens=30)
+    sqlite_path = os.path.join(tempfile.mkdtemp(), "responses.sqlite3")
+
+    try:
+        cache = ResponseCache(max_entries=4, ttl=3600.0, sqlite_path=sqlite_path)
+        groq_api = GroqAPI(cache=cache)
+        groq_api.api_url = server.url
+
+        miss = timed_us(lambda: groq_api.generate_response("What time is it?"), 1)
+        hit = timed_us(lambda: groq_api.generate_response("what time   is it?"), args.repeat)
+        assert server.requests == 1, server.requests
+        print(f"miss (API call)          {miss:10.1f} us")
+        print(f"memory hit               {hit:10.1f} us")
+
+        # A fresh process: the answer comes from SQLite once, then from memory
+        restarted = GroqAPI(cache=ResponseCache(max_entries=4, ttl=3600.0, sqlite_path=sqlite_path))
+        restarted.api_url = server.url
+        disk_hit = timed_us(lambda: restarted.generate_response("What time is it?"), 1)
+        assert server.requests == 1, server.requests
+        print(f"SQLite hit after restart {disk_hit:10.1f} us")
+
+        # Errors must not be cached
+        server.throttle_remaining = 1
+        groq_api.retry_policy = NO_RETRIES
+        error = groq_api.generate_response("Tell me a joke")
+        assert error.startswith("Error"), error
+        answer = groq_api.generate_response("Tell me a joke")
+        assert not answer.startswith("Error"), answer
+        print(f"error response cached    {'no' if server.requests == 3 else 'YES'}")
+
+        # LRU: five more prompts through a 4-entry memory tier
+        for index in range(5):
+            groq_api.generate_response(f"Question {index}")
+        print(f"stats                    {cache.stats()}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Cold-start benchmark for v6.py, per mode.
+
+Each scenario imports, in a fresh interpreter, the modules that a cold
+Streamlit server loads before it can render the first page for that mode:
+"before" is the old eager import block of v6.py, "after" runs the top-level
+import statements of the current v6.py (read from its source), plus the
+modules a mode then loads through the lazy import layer. Reports wall time,
+peak RSS, how many modules were added to sys.modules and which of the heavy
+ones among them. Run from the repository root:
+
+    python benchmarks/bench_startup.py
+"""
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level imports of v6.py before the lazy import layer, for every mode
+EAGER = [
+    "streamlit",
+    "cv2",
+    "numpy",
+    "gtts",
+    "speech_recognition",
+    "mediapipe",
+    "requests",
+    "groq_api",
+    "tensorflow",
+]
+
+# Modules that should only be loaded by the modes that need them
+HEAVY = ["cv2", "mediapipe", "tensorflow", "gtts", "speech_recognition", "pyaudio"]
+
+
+def top_level_imports(path):
+    """The import statements at the top level of a module's source, as source text"""
+    with open(path) as source:
+        tree = ast.parse(source.read(), path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def imports(modules):
+    return [f"import {name}" for name in modules]
+
+
+BASE = top_level_imports(os.path.join(ROOT, "v6.py"))
+
+SCENARIOS = [
+    ("before", "any mode", imports(EAGER)),
+    ("after", "standard", BASE),
+    ("after", "visually impaired", BASE + imports(["gtts", "speech_recognition"])),
+    ("after", "non-verbal, camera on", BASE + imports(["cv2", "mediapipe"])),
+    ("after", "non-verbal, tflite", BASE + imports(["cv2", "mediapipe", "tensorflow"])),
+]
+
+PROBE = """
+import json, resource, sys, time
+statements, heavy = json.loads(sys.argv[1]), json.loads(sys.argv[2])
+before = set(sys.modules)
+missing = []
+start = time.perf_counter()
+for statement in statements:
+    try:
+        exec(statement, {})
+    except ImportError as e:
+        missing.append(e.name or statement)
+elapsed = time.perf_counter() - start
+loaded = set(sys.modules) - before
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(loaded),
+    "heavy": [name for name in heavy if name in loaded],
+    "missing": sorted(set(missing)),
+}))
+"""
+
+
+def probe(statements, repeat=3):
+    """Best-of-`repeat` cold import time, in a new interpreter each time"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, "-c", PROBE, json.dumps(statements), json.dumps(HEAVY)], cwd=ROOT,
+            stderr=subprocess.DEVNULL,
+        )
+        runs.append(json.loads(output.decode().strip().splitlines()[-1]))
+
+    return min(runs, key=lambda run: run["seconds"])
+
+
+def main():
+    print(f"{'':<8}{'mode':<24}{'import time':>13}{'max RSS':>10}{'modules':>9}  heavy / missing")
+    for label, mode, statements in SCENARIOS:
+        result = probe(statements)
+        print(
+            f"{label:<8}{mode:<24}{result['seconds'] * 1e3:>10.0f} ms"
+            f"{result['max_rss_kb'] / 1024:>7.0f} MB{result['modules']:>9}  "
+            f"{', '.join(result['heavy']) or '-'} / {', '.join(result['missing']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+TTSCache over a simulated Visually Impaired Mode session.
+
+Replays --utterances utterances, mostly fixed feedback phrases (help, clear
+chat, listening paused/resumed, ...) in a random voice mode language and
+otherwise a new answer, and reports the time to audio, hit rate and bytes
+saved for:
+
+- no cache, as before: every utterance is synthesized
+- a cold cache
+- a cache prebuilt with prebuild_system_phrases()
+
+Synthesis is simulated with --synth-ms per call and --bytes-per-char of
+audio, unless --gtts is given (needs network access). Also checks that a
+second TTSCache on the same directory (a restart) serves the clips from
+disk, and that the disk tier stays within its size limit. Run from the
+repository root:
+
+    python benchmarks/bench_tts_cache.py
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_to_speech import SYSTEM_PHRASES, VOICE_LANGUAGES, prebuild_system_phrases, tts_language  # noqa: E402
+from tts_engines import GTTSEngine  # noqa: E402
+from utils.tts_cache import TTSCache, tts_cache_key  # noqa: E402
+
+
+class SimulatedEngine(object):
+    name = GTTSEngine.name
+    mimetype = GTTSEngine.mimetype
+
+    def __init__(self, synth_ms, bytes_per_char):
+        self.synth_ms = synth_ms
+        self.bytes_per_char = bytes_per_char
+
+    def synthesize(self, text, lang):
+        time.sleep(self.synth_ms / 1000.0)
+        return (f"{lang}:{text}".encode("utf-8") * self.bytes_per_char)[: self.bytes_per_char * len(text)]
+
+
+def session(count, answer_share, seed):
+    rng = random.Random(seed)
+    languages = sorted({tts_language(language) for language in VOICE_LANGUAGES.values()})
+    phrases = list(SYSTEM_PHRASES.values())
+    utterances = []
+    for index in range(count):
+        lang = rng.choice(languages)
+        if rng.random() < answer_share:
+            utterances.append((f"Answer number {index}: the weather is mild and sunny today.", lang))
+        else:
+            utterances.append((rng.choice(phrases), lang))
+    return utterances
+
+
+def replay(name, utterances, engine, cache):
+    latencies = []
+    for text, lang in utterances:
+        start = time.perf_counter()
+        if cache is None:
+            audio = engine.synthesize(text, lang)
+        else:
+            audio = cache.fetch(text, lang, engine.name, engine.synthesize)
+        assert audio
+        latencies.append(1000 * (time.perf_counter() - start))
+
+    line = f"{name:9s} time to audio p50 {statistics.median(latencies):7.2f}  mean {statistics.mean(latencies):7.2f} ms"
+    if cache is not None:
+        stats = cache.stats()
+        line += f"  hit rate {stats['hit_rate']:.3f}  saved {stats['bytes_saved'] / 1024:8.1f} kB"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS cache benchmark over a simulated voice session")
+    parser.add_argument("--utterances", type=int, default=200, help="utterances in the session")
+    parser.add_argument("--answer-share", type=float, default=0.3, help="share of utterances that are new answers")
+    parser.add_argument("--synth-ms", type=float, default=25.0, help="simulated synthesis time per call")
+    parser.add_argument("--bytes-per-char", type=int, default=250, help="simulated audio bytes per character")
+    parser.add_argument("--gtts", action="store_true", help="synthesize with gTTS instead of the simulation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = GTTSEngine() if args.gtts else SimulatedEngine(args.synth_ms, args.bytes_per_char)
+    utterances = session(args.utterances, args.answer_share, args.seed)
+
+    replay("uncached", utterances, engine, None)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        replay("cold", utterances, engine, TTSCache(cache_dir=cache_dir))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        synthesized, _, failed = prebuild_system_phrases(
+            TTSCache(cache_dir=cache_dir), engine_for=lambda lang: engine
+        )
+        print(f"prebuild  {synthesized} clips in {time.perf_counter() - start:.2f} s, {failed} failed")
+
+        # A fresh process finds the prebuilt clips on disk
+        restarted = TTSCache(cache_dir=cache_dir)
+        replay("prebuilt", utterances, engine, restarted)
+        stats = restarted.stats()
+        assert stats["disk_hits"] > 0, stats
+        print(f"          {stats}")
+
+    # Disk tier bounded by size: least recently used clips go first
+    with tempfile.TemporaryDirectory() as cache_dir:
+        clip = b"x" * 10000
+        cache = TTSCache(max_entries=2, cache_dir=cache_dir, max_disk_bytes=45000)
+        keys = [tts_cache_key(f"phrase {index}", "en", GTTSEngine.name) for index in range(6)]
+        for key in keys[:4]:
+            cache.put(key, clip)
+        assert cache.get(keys[0]) == clip
+        for key in keys[4:]:
+            cache.put(key, clip)
+        on_disk = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+        assert on_disk <= 45000, on_disk
+        assert keys[0] in cache and keys[1] not in cache and keys[2] not in cache, cache.stats()
+        print(f"eviction  {len(os.listdir(cache_dir))} clips, {on_disk} bytes on disk, {cache.stats()['disk_evictions']} evicted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+TTS engines on a fixed phrase corpus (the voice feedback phrases in
+text_to_speech.SYSTEM_PHRASES): per-phrase latency, characters
+synthesized per second, audio bytes, and throughput with --threads
+concurrent requests. Engines that are not installed are reported and
+skipped; gTTS also needs --network.
+
+Then TTSEngineChain's fallback, with simulated engines in front of a
+working one: a primary that always fails, one that is slower than
+--slow-after, and one that recovers after a cooldown. Finally a long
+answer spoken sentence by sentence into one audio stream, with the MP3
+primary down from the start (the whole answer falls back to the WAV
+engine) and failing halfway (the rest of the answer cannot switch
+formats, so those sentences are counted as failed). Run from the
+repository root:
+
+    python benchmarks/bench_tts_engines.py
+    python benchmarks/bench_tts_engines.py --network --languages en de
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import io
+import os
+import statistics
+import sys
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_to_speech import SYSTEM_PHRASES  # noqa: E402
+from tts_engines import ClipSynthesizer, EspeakEngine, GTTSEngine, TTSEngineChain, TTSError  # noqa: E402
+from utils.audio_server import AudioStream  # noqa: E402
+from utils.chunked_speech import ChunkedSpeechSynthesizer  # noqa: E402
+
+
+def simulated_audio(text, mimetype):
+    """A silent WAV, or bytes starting like an MP3 frame, about as long as `text` spoken"""
+    if mimetype == "audio/mpeg":
+        return b"\xff\xf3" + text.encode("utf-8")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(8000)
+        wav.writeframes(b"\0\0" * 500 * len(text))
+    return buffer.getvalue()
+
+
+class SimulatedEngine(object):
+    """Answers after `delay` seconds, or fails while `failing` is set (or after `fail_after` calls)"""
+
+    def __init__(self, name, delay=0.0, failing=False, mimetype="audio/wav", fail_after=None):
+        self.name = name
+        self.delay = delay
+        self.failing = failing
+        self.mimetype = mimetype
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def available(self):
+        return True
+
+    def synthesize(self, text, lang):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.failing or (self.fail_after is not None and self.calls > self.fail_after):
+            raise TTSError(f"{self.name} is down")
+        return simulated_audio(text, self.mimetype)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[int(round(q * (len(values) - 1)))]
+
+
+def measure_engine(engine, phrases, languages, threads):
+    latencies = []
+    audio_bytes = 0
+    characters = 0
+    start = time.perf_counter()
+    for lang in languages:
+        for text in phrases:
+            started = time.perf_counter()
+            audio_bytes += len(engine.synthesize(text, lang))
+            latencies.append(1000 * (time.perf_counter() - started))
+            characters += len(text)
+    sequential = time.perf_counter() - start
+
+    jobs = [(text, lang) for lang in languages for text in phrases]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda job: engine.synthesize(*job), jobs))
+    concurrent = time.perf_counter() - start
+
+    print(
+        f"{engine.name:8s} p50 {statistics.median(latencies):7.1f}  p95 {percentile(latencies, 0.95):7.1f} ms  "
+        f"{characters / sequential:7.0f} chars/s  x{threads} {len(jobs) / concurrent:6.1f} phrases/s  "
+        f"{audio_bytes / len(latencies) / 1024:6.1f} kB/phrase ({engine.mimetype})"
+    )
+
+
+def measure_chain(name, chain, phrases):
+    latencies = []
+    used = {}
+    for text in phrases:
+        start = time.perf_counter()
+        _, engine = chain.synthesize(text, "en")
+        latencies.append(1000 * (time.perf_counter() - start))
+        used[engine.name] = used.get(engine.name, 0) + 1
+    print(
+        f"{name:26s} p50 {statistics.median(latencies):7.1f}  max {max(latencies):7.1f} ms  "
+        f"answered by {used}  fallbacks {chain.fallbacks}  slow {chain.slow}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS engine latency/throughput and fallback benchmark")
+    parser.add_argument("--network", action="store_true", help="include gTTS (needs network access)")
+    parser.add_argument("--languages", nargs="+", default=["en"], help="languages to synthesize the corpus in")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent requests in the throughput run")
+    parser.add_argument("--slow-after", type=float, default=0.2, help="seconds before the chain tries the next engine")
+    args = parser.parse_args()
+
+    phrases = list(SYSTEM_PHRASES.values())
+    print(f"corpus: {len(phrases)} phrases, {sum(len(text) for text in phrases)} characters, languages {args.languages}")
+    local = None
+    for engine in (EspeakEngine(), GTTSEngine()):
+        if not engine.available():
+            print(f"{engine.name:8s} not installed, skipped")
+            continue
+        if engine.name == GTTSEngine.name and not args.network:
+            print(f"{engine.name:8s} skipped, needs --network")
+            continue
+        measure_engine(engine, phrases, args.languages, args.threads)
+        if engine.name == EspeakEngine.name:
+            local = engine
+
+    # The last engine in each chain always works: espeak if installed, else a stand-in
+    if local is None:
+        local = SimulatedEngine("local", delay=0.01)
+    print(f"fallback chains ending in {local.name}:")
+    measure_chain("primary works", TTSEngineChain([SimulatedEngine("primary", 0.03), local]), phrases)
+
+    down = SimulatedEngine("primary", 0.03, failing=True)
+    chain = TTSEngineChain([down, local], failure_threshold=2, cooldown=0.5, slow_after=args.slow_after)
+    measure_chain("primary down", chain, phrases)
+    print(f"{'':26s} primary called {down.calls} times, then skipped during its cooldown")
+    down.failing = False
+    time.sleep(0.6)
+    measure_chain("primary recovered", chain, phrases)
+
+    slow = SimulatedEngine("primary", delay=5 * args.slow_after)
+    measure_chain("primary slow", TTSEngineChain([slow, local], slow_after=args.slow_after), phrases)
+
+    try:
+        TTSEngineChain([SimulatedEngine("a", failing=True), SimulatedEngine("b", failing=True)]).synthesize("Hi", "en")
+    except TTSError as e:
+        print(f"all engines down: TTSError({e})")
+
+    # A spoken answer is one clip in one format, settled by its first sentence
+    answer = " ".join(phrases)
+    for name, primary in (
+        ("answer, MP3 primary works", SimulatedEngine("primary", 0.01, mimetype="audio/mpeg")),
+        ("answer, MP3 primary down", SimulatedEngine("primary", 0.01, failing=True, mimetype="audio/mpeg")),
+        ("answer, MP3 fails halfway", SimulatedEngine("primary", 0.01, mimetype="audio/mpeg", fail_after=4)),
+    ):
+        chain = TTSEngineChain([primary, SimulatedEngine("local", 0.01)], slow_after=args.slow_after)
+        synthesizer = ChunkedSpeechSynthesizer(ClipSynthesizer(chain), max_workers=1)
+        stream = AudioStream(None)
+        turn = synthesizer.start_turn("en", stream)
+        turn.feed(answer)
+        turn.finish()
+        turn.wait()
+        synthesizer.executor.shutdown()
+        print(f"{name:26s} {stream.mimetype:10s} chunks {turn.chunks:2d}  spoken {len(stream.chunks):2d}  failed {turn.failed}")
+
+
+if __name__ == "__main__":
+    main()
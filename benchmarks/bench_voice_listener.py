@@ -0,0 +1,197 @@
+"""
+Continuous listening over a simulated voice session: the loop voice mode
+used to run on every rerun (open the microphone, calibrate the noise floor
+for a second, listen with a 5 s timeout, answer, rerun) against
+VoiceListener, which keeps the microphone open in a background thread while
+the rerun loop only polls it.
+
+The user says --phrases phrases of 1.5 to 3 s with pauses of --min-gap to
+--max-gap seconds. Every rerun costs --rerun-ms, and every recognized phrase
+--answer-ms of recognition and answering on the script thread. A phrase is
+"whole" if the microphone was listening when it began, "clipped" if it was
+already underway (its start is lost), and "missed" if the microphone was
+closed throughout. Also reports the delay from the end of a phrase to the
+script picking it up, and how often the device was opened. Finally checks
+that restarting a listener stopped in the middle of a phrase does not wait
+for the phrase to end. Time runs --speed times faster than real time. Run
+from the repository root:
+
+    python benchmarks/bench_voice_listener.py
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.voice_listener import VoiceListener  # noqa: E402
+
+
+class NoPhrase(Exception):
+    """Stands in for speech_recognition.WaitTimeoutError"""
+
+
+class Session(object):
+    """The user's phrases on a simulated clock, and what the microphone heard of them"""
+
+    def __init__(self, phrases, min_gap, max_gap, speed, seed):
+        rng = random.Random(seed)
+        self.speed = speed
+        self.phrases = []
+        start = 2.0
+        for _ in range(phrases):
+            end = start + rng.uniform(1.5, 3.0)
+            self.phrases.append((start, end))
+            start = end + rng.uniform(min_gap, max_gap)
+        self.length = self.phrases[-1][1] + max_gap
+        self.heard = {}
+        self.picked_up = {}
+        self.opened = 0
+        self.started = time.monotonic()
+
+    def now(self):
+        return (time.monotonic() - self.started) * self.speed
+
+    def sleep(self, seconds):
+        time.sleep(max(0.0, seconds) / self.speed)
+
+    def sleep_until(self, when):
+        self.sleep(when - self.now())
+
+
+class SimulatedMicrophone(object):
+    def __init__(self, session):
+        self.session = session
+
+    def __enter__(self):
+        self.session.opened += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class SimulatedRecognizer(object):
+    """Listens like speech_recognition.Recognizer, on the session's clock"""
+
+    pause_threshold = 0.8
+
+    def __init__(self, session):
+        self.session = session
+        self.energy_threshold = 300.0
+        self.dynamic_energy_threshold = False
+
+    def adjust_for_ambient_noise(self, source, duration=1.0):
+        self.session.sleep(duration)
+
+    def listen(self, source, timeout=None, phrase_time_limit=None):
+        session = self.session
+        now = session.now()
+        for index, (start, end) in enumerate(session.phrases):
+            if end <= now:
+                continue
+            if timeout is not None and start > now + timeout:
+                break
+            session.heard.setdefault(index, "clipped" if start < now else "whole")
+            session.sleep_until(end + self.pause_threshold)
+            return index
+        session.sleep(timeout)
+        raise NoPhrase()
+
+
+def per_rerun(session, args):
+    """The old voice mode loop: a new recognizer and microphone on every rerun"""
+    while session.now() < session.length:
+        session.sleep(args.rerun_ms / 1000.0)
+        recognizer = SimulatedRecognizer(session)
+        with SimulatedMicrophone(session) as source:
+            recognizer.adjust_for_ambient_noise(source)
+            try:
+                index = recognizer.listen(source, timeout=5, phrase_time_limit=10)
+            except NoPhrase:
+                continue
+        session.picked_up[index] = session.now()
+        session.sleep(args.answer_ms / 1000.0)
+
+
+def background(session, args):
+    """VoiceListener: the microphone stays open, the loop polls for utterances"""
+    listener = VoiceListener(
+        recognizer=SimulatedRecognizer(session),
+        microphone=lambda: SimulatedMicrophone(session),
+        calibration_seconds=0.5,
+        wait_timeout_error=NoPhrase,
+    )
+    while session.now() < session.length:
+        session.sleep(args.rerun_ms / 1000.0)
+        utterance = listener.get(timeout=args.poll / session.speed)
+        if utterance is not None:
+            session.picked_up[utterance.audio] = session.now()
+            session.sleep(args.answer_ms / 1000.0)
+    listener.stop(timeout=5)
+    return listener
+
+
+def report(name, session):
+    counts = {outcome: 0 for outcome in ("whole", "clipped", "missed")}
+    for index in range(len(session.phrases)):
+        counts[session.heard.get(index, "missed")] += 1
+    delays = [session.picked_up[index] - session.phrases[index][1] for index in session.picked_up]
+    print(
+        f"{name:10s} whole {counts['whole']:3d}  clipped {counts['clipped']:3d}  missed {counts['missed']:3d}  "
+        f"pickup after phrase p50 {statistics.median(delays):5.2f}  max {max(delays):5.2f} s  "
+        f"microphone opened {session.opened} times"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-rerun microphone against a background VoiceListener")
+    parser.add_argument("--phrases", type=int, default=40, help="phrases the user says")
+    parser.add_argument("--min-gap", type=float, default=1.0, help="shortest pause between phrases, seconds")
+    parser.add_argument("--max-gap", type=float, default=8.0, help="longest pause between phrases, seconds")
+    parser.add_argument("--rerun-ms", type=float, default=300.0, help="time a Streamlit rerun takes")
+    parser.add_argument("--answer-ms", type=float, default=1500.0, help="recognition and answer per phrase")
+    parser.add_argument("--poll", type=float, default=2.0, help="seconds a rerun waits for an utterance")
+    parser.add_argument("--speed", type=float, default=10.0, help="simulated seconds per real second")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    session = Session(args.phrases, args.min_gap, args.max_gap, args.speed, args.seed)
+    print(f"session of {session.length:.0f} s with {len(session.phrases)} phrases")
+    per_rerun(session, args)
+    report("per rerun", session)
+
+    session = Session(args.phrases, args.min_gap, args.max_gap, args.speed, args.seed)
+    listener = background(session, args)
+    report("background", session)
+    assert not listener.running and threading.active_count() == 1, "listener thread still running"
+    print(f"           {listener.stats()}")
+
+    # stop() and start() again while a phrase is being heard: the rerun goes
+    # on at once, and the device is opened again once the old thread is done
+    session = Session(3, args.min_gap, args.max_gap, args.speed, args.seed)
+    listener = VoiceListener(
+        recognizer=SimulatedRecognizer(session),
+        microphone=lambda: SimulatedMicrophone(session),
+        wait_timeout_error=NoPhrase,
+    )
+    listener.start()
+    session.sleep_until(session.phrases[0][0] + 0.5)
+    listener.stop()
+    start = time.perf_counter()
+    listener.get(timeout=0)
+    returned = time.perf_counter() - start
+    while listener.opened < 2:
+        time.sleep(0.01)
+    reopened = session.now() - session.phrases[0][1]
+    listener.stop(timeout=5)
+    assert returned < 0.05, returned
+    print(f"restart    get() returned after {1000 * returned:.1f} ms, device reopened {reopened:.2f} s after the phrase")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Replay check for AdaptiveHandDetector's switches between crop and full frame.
+
+MediaPipe Hands in tracking mode looks for each hand where its landmarks were
+in the previous image, in normalized input coordinates, so they must not be
+carried over into a region of another position or size. The landmark fixture
+is replayed through the detector with a simulated tracking Hands (MediaPipe
+is not needed), and frames where the region changed are compared with the
+others: landmark jitter (movement beyond the true hand movement) and hands
+dropped. A second replay scales the hands up as if close to the camera, where
+the crop would cover most of the frame and every frame is a full-frame
+search; MediaPipe should keep tracking there rather than detect every frame.
+Exits with status 1 when a check fails. Run from the repository root:
+
+    python benchmarks/check_roi_switches.py
+"""
+import argparse
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hand_tracker import AdaptiveHandDetector  # noqa: E402
+
+from run_suite import DEFAULT_FIXTURE, LandmarkFixture, fake_mediapipe_hand  # noqa: E402
+
+
+class SimulatedTrackingHands(object):
+    """
+    Stands in for mediapipe Hands on coordinate frames (see coordinate_frame):
+    reads which part of the frame it was given from the pixels, and the
+    frame's hands from `landmarks`. Like MediaPipe in tracking mode, it looks
+    for each hand where its landmarks were in the previous image, in
+    normalized input coordinates: a hand they miss by more than half its size
+    is lost, otherwise the result is pulled a fifth of the way towards them.
+    Hands without previous landmarks, and every hand after reset(), are
+    detected afresh.
+    """
+
+    def __init__(self, fixture, landmarks, noise_px=0.5, seed=0):
+        self.fixture = fixture
+        self.landmarks = landmarks
+        self.noise_px = noise_px
+        self.rng = np.random.default_rng(seed)
+        self.previous = {}
+        self.detected = 0
+        self.tracked = 0
+        # Hands detected afresh in the last process() call
+        self.last_detected = 0
+
+    def process(self, image):
+        x1, y1, index = (int(value) for value in image[0, 0])
+        x2, y2 = int(image[-1, -1, 0]) + 1, int(image[-1, -1, 1]) + 1
+        size = np.array((x2 - x1, y2 - y1), dtype=np.float32)
+        frame_size = np.array((self.fixture.image_width, self.fixture.image_height), dtype=np.float32)
+
+        found, handedness, tracked = [], [], {}
+        self.last_detected = 0
+        for landmarks, side in zip(self.landmarks[index], self.fixture.hands(index)[1]):
+            points = (landmarks * frame_size - (x1, y1)) / size
+            center = points.mean(axis=0)
+            if not (0.0 <= center[0] <= 1.0 and 0.0 <= center[1] <= 1.0):
+                continue
+            label = side.classification[0].label
+            previous = self.previous.get(label)
+            if previous is None:
+                self.detected += 1
+                self.last_detected += 1
+            else:
+                offset = previous.mean(axis=0) - center
+                if np.abs(offset).max() > 0.5 * (points.max(axis=0) - points.min(axis=0)).max():
+                    continue
+                points = points + 0.2 * offset
+                self.tracked += 1
+            points = points + self.rng.normal(0.0, self.noise_px, points.shape) / size
+            tracked[label] = points
+            found.append(fake_mediapipe_hand(points))
+            handedness.append(side)
+
+        self.previous = tracked
+        return SimpleNamespace(multi_hand_landmarks=found or None, multi_handedness=handedness or None)
+
+    def reset(self):
+        self.previous = {}
+
+
+def coordinate_frame(width, height):
+    """uint16 frame whose pixels hold their own (x, y), plus the frame index in the third channel"""
+    frame = np.zeros((height, width, 3), dtype=np.uint16)
+    frame[:, :, 0] = np.arange(width, dtype=np.uint16)[None, :]
+    frame[:, :, 1] = np.arange(height, dtype=np.uint16)[:, None]
+    return frame
+
+
+def scaled_hands(fixture, scale):
+    """The fixture's hands per frame, each scaled by `scale` about its center"""
+    hands = []
+    for index in range(len(fixture)):
+        landmarks = fixture.hands(index)[0]
+        center = landmarks.mean(axis=1, keepdims=True)
+        hands.append(center + scale * (landmarks - center))
+    return hands
+
+
+def replay(fixture, landmarks, hands):
+    """
+    Replay `landmarks` through AdaptiveHandDetector. Returns
+    {"switch"/"steady": (jitter px, hands dropped, frames)} plus, under
+    "full_runs", (hands found, hands detected afresh) on full-frame frames
+    that follow a full-frame frame, and the detector.
+    """
+    # Full scale, so every region reaches the simulated Hands unresized
+    detector = AdaptiveHandDetector(hands, target_frame_time=float("inf"))
+    frame = coordinate_frame(fixture.image_width, fixture.image_height)
+    frame_size = np.array((fixture.image_width, fixture.image_height), dtype=np.float32)
+    outcome = {kind: [[], 0, 0] for kind in ("switch", "steady")}
+    full_runs = [0, 0]
+    previous_roi, previous = False, {}
+    for index in range(len(fixture)):
+        frame[:, :, 2] = index
+        tracked = detector.process(frame)
+        kind = "switch" if previous_roi is not False and tracked.roi != previous_roi else "steady"
+        if tracked.roi is None and previous_roi is None:
+            full_runs[0] += len(tracked.landmarks)
+            full_runs[1] += getattr(hands, "last_detected", 0)
+        previous_roi = tracked.roi
+        outcome[kind][2] += 1
+
+        truth = dict(
+            (side.classification[0].label, truth_landmarks * frame_size)
+            for truth_landmarks, side in zip(landmarks[index], fixture.hands(index)[1])
+        )
+        current = {}
+        for hand_landmarks, side in zip(tracked.landmarks, tracked.handedness):
+            label = side.classification[0].label
+            current[label] = hand_landmarks * frame_size
+            if label in previous and label in truth:
+                estimate_motion = current[label] - previous[label][0]
+                true_motion = truth[label] - previous[label][1]
+                outcome[kind][0].append(float(np.linalg.norm(estimate_motion - true_motion, axis=1).mean()))
+        outcome[kind][1] += len(set(truth) - set(current))
+        previous = dict((label, (current[label], truth[label])) for label in current if label in truth)
+
+    results = dict(
+        (kind, (float(np.mean(jitter)) if jitter else 0.0, drops, frames))
+        for kind, (jitter, drops, frames) in outcome.items()
+    )
+    results["full_runs"] = tuple(full_runs)
+    return results, detector
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark jitter at AdaptiveHandDetector's region switches")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="landmark fixture (.npz)")
+    parser.add_argument("--close-scale", type=float, default=2.5, help="hand scale in the close-to-camera replay")
+    args = parser.parse_args()
+
+    fixture = LandmarkFixture(args.fixture)
+    failures = []
+
+    landmarks = [fixture.hands(index)[0] for index in range(len(fixture))]
+    # Without reset(), as AdaptiveHandDetector used MediaPipe before
+    never_reset = SimulatedTrackingHands(fixture, landmarks)
+    for name, hands, checked in (
+        ("never reset", SimpleNamespace(process=never_reset.process), False),
+        ("reset on region change", SimulatedTrackingHands(fixture, landmarks), True),
+    ):
+        results, detector = replay(fixture, landmarks, hands)
+        switch_jitter, switch_drops, switches = results["switch"]
+        steady_jitter, steady_drops, steady = results["steady"]
+        print(
+            f"{name:24s} jitter at {switches:3d} switches {switch_jitter:5.2f} px, other frames {steady_jitter:5.2f} px; "
+            f"hands dropped {switch_drops} / {steady_drops}"
+        )
+        if checked and switch_jitter > 1.5 * steady_jitter + 0.5:
+            failures.append(f"{name}: jitter at switches {switch_jitter:.2f} px")
+        if checked and switch_drops / max(switches, 1) > steady_drops / max(steady, 1) + 0.01:
+            failures.append(f"{name}: {switch_drops} hands dropped at {switches} switches")
+
+    hands = SimulatedTrackingHands(fixture, scaled_hands(fixture, args.close_scale))
+    results, detector = replay(fixture, hands.landmarks, hands)
+    stats = detector.stats()
+    found, detected = results["full_runs"]
+    tracked_share = 1.0 - detected / max(found, 1)
+    print(
+        f"{'close to the camera':24s} {stats['full_searches']} full-frame / {stats['roi_frames']} crop frames, "
+        f"{tracked_share:.0%} of {found} hands tracked over consecutive full frames"
+    )
+    if tracked_share < 0.9:
+        failures.append(f"close to the camera: only {tracked_share:.0%} of hands tracked over consecutive full frames")
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
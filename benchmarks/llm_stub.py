@@ -0,0 +1,228 @@
+"""
+Local stub of an OpenAI-compatible chat completions endpoint, for the API
+client benchmarks. Not a benchmark itself.
+
+Answers every POST with a fixed reply of `num_tokens` words, generated at
+`token_delay` seconds per token: as one JSON body, or as server-sent events
+when the request has "stream": true. Each new connection is delayed by
+`handshake_delay` to stand in for the TCP + TLS handshake to a remote API,
+and the next `throttle_remaining` requests are answered with 429 and
+Retry-After: 0. Streams the client hung up on are counted in `aborted`.
+With `truncate_streams`, streams end without their final event ([DONE], or
+the text-generation event carrying generated_text), like a connection cut
+off mid-answer. With `stream_error`, text-generation streams send an
+{"error": stream_error} event halfway instead of the rest of the answer.
+
+For simulations, `latency` is a function returning extra seconds to wait
+before answering each request (e.g. drawn from a distribution), and a
+fraction `error_rate` of requests fails with 500. Requests with "inputs"
+instead of "messages" get a Hugging Face Inference API style reply,
+streamed as text-generation events with "stream": true; the "model" then
+answers 503 "currently loading" until `load_time` seconds after the first
+such request.
+
+With `quota`, at most that many requests are served per `quota_window`
+seconds; every response carries x-ratelimit-*-requests headers like Groq's,
+and requests over the quota get 429 with Retry-After. Arrival times of all
+requests are kept in `request_times`.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def reply_tokens(num_tokens):
+    return [("Hello" if index == 0 else " there") for index in range(num_tokens - 1)] + ["."]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment with TCP_NODELAY, like a real
+    # server; separate small writes stall on Nagle + delayed ACK on keep-alive
+    # connections
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake_delay)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.request_times.append(time.monotonic())
+            throttled = self.server.throttle_remaining > 0
+            if throttled:
+                self.server.throttle_remaining -= 1
+            self.extra_headers, over_quota = self._quota_headers()
+
+        if self.server.latency is not None:
+            time.sleep(self.server.latency())
+
+        if throttled:
+            self._send_json(429, {"error": {"message": "rate limited"}}, {"Retry-After": "0"})
+        elif over_quota:
+            self._send_json(429, {"error": {"message": "rate limit reached"}})
+        elif random.random() < self.server.error_rate:
+            self._send_json(500, {"error": {"message": "internal error"}})
+        elif "inputs" in request:
+            loading = self._loading_remaining()
+            if loading > 0:
+                self._send_json(503, {"error": "Model stub is currently loading", "estimated_time": loading})
+            elif request.get("stream"):
+                self._stream(reply_tokens(self.server.num_tokens), huggingface=True)
+            else:
+                tokens = reply_tokens(self.server.num_tokens)
+                time.sleep(self.server.token_delay * len(tokens))
+                self._send_json(200, [{"generated_text": "".join(tokens)}])
+        elif request.get("stream"):
+            self._stream(reply_tokens(self.server.num_tokens))
+        else:
+            tokens = reply_tokens(self.server.num_tokens)
+            time.sleep(self.server.token_delay * len(tokens))
+            self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": "".join(tokens)}}]})
+
+    def _quota_headers(self):
+        # Called with the server lock held; returns (headers, over quota)
+        server = self.server
+        if server.quota is None:
+            return {}, False
+
+        now = time.monotonic()
+        if server.quota_reset_at is None or now >= server.quota_reset_at:
+            server.quota_reset_at = now + server.quota_window
+            server.quota_used = 0
+        over_quota = server.quota_used >= server.quota
+        if not over_quota:
+            server.quota_used += 1
+        else:
+            server.rejected += 1
+
+        reset = server.quota_reset_at - now
+        headers = {
+            "x-ratelimit-limit-requests": str(server.quota),
+            "x-ratelimit-remaining-requests": str(server.quota - server.quota_used),
+            "x-ratelimit-reset-requests": f"{reset:.3f}s",
+        }
+        if over_quota:
+            headers["Retry-After"] = str(max(1, int(reset + 0.999)))
+        return headers, over_quota
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in dict(self.extra_headers, **(headers or {})).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _loading_remaining(self):
+        with self.server.lock:
+            if self.server.loaded_at is None:
+                self.server.loaded_at = time.monotonic() + self.server.load_time
+            return self.server.loaded_at - time.monotonic()
+
+    def _stream(self, tokens, huggingface=False):
+        self.send_response(200)
+        for name, value in self.extra_headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            for index, token in enumerate(tokens):
+                time.sleep(self.server.token_delay)
+                if huggingface and self.server.stream_error and index == len(tokens) // 2:
+                    self._write_chunk(b"data: " + json.dumps({"error": self.server.stream_error}).encode() + b"\n\n")
+                    break
+                if huggingface:
+                    last = index == len(tokens) - 1 and not self.server.truncate_streams
+                    event = {
+                        "token": {"id": index, "text": token, "special": False},
+                        "generated_text": "".join(tokens) if last else None,
+                    }
+                else:
+                    event = {"choices": [{"index": 0, "delta": {"content": token}}]}
+                self._write_chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+            if not huggingface and not self.server.truncate_streams:
+                self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server.lock:
+                self.server.aborted += 1
+            self.close_connection = True
+
+    def _write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    # Flushing and closing the write buffer of an aborted stream fails again
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def finish(self):
+        try:
+            super().finish()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    # Room for the connection bursts of the concurrency tests
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def start_stub(
+    handshake_delay=0.0,
+    token_delay=0.0,
+    num_tokens=3,
+    latency=None,
+    error_rate=0.0,
+    load_time=0.0,
+    quota=None,
+    quota_window=60.0,
+    truncate_streams=False,
+    stream_error=None,
+):
+    """Serve the stub on a free local port from a background thread; call .shutdown() when done"""
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    server.handshake_delay = handshake_delay
+    server.token_delay = token_delay
+    server.num_tokens = num_tokens
+    server.latency = latency
+    server.error_rate = error_rate
+    server.load_time = load_time
+    server.loaded_at = None
+    server.quota = quota
+    server.quota_window = quota_window
+    server.truncate_streams = truncate_streams
+    server.stream_error = stream_error
+    server.quota_reset_at = None
+    server.quota_used = 0
+    server.rejected = 0
+    server.request_times = []
+    server.connections = 0
+    server.requests = 0
+    server.throttle_remaining = 0
+    server.aborted = 0
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/openai/v1/chat/completions"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
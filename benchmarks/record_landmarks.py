@@ -0,0 +1,154 @@
+"""
+Records hand landmark fixtures for the benchmark suite.
+
+Runs MediaPipe Hands over a video file (or a camera index) and stores the
+normalized landmarks of every frame in an .npz file:
+
+    landmarks   (T, 2, 21, 2) float32, unused hand slots are zero
+    num_hands   (T,) int8
+    handedness  (T, 2) int8, 0 = Left, 1 = Right
+    timestamps  (T,) float64, seconds
+    image_size  (2,) int32, width and height
+
+With --synthesize, writes an animated synthetic session in the same format
+instead, for machines without a camera or MediaPipe. Run from the
+repository root:
+
+    python benchmarks/record_landmarks.py session.mp4 --output benchmarks/fixtures/my_session.npz
+    python benchmarks/record_landmarks.py --synthesize --output benchmarks/fixtures/synthetic_session.npz
+"""
+import argparse
+
+import numpy as np
+
+MAX_HANDS = 2
+HANDEDNESS = ("Left", "Right")
+
+# Open right hand in normalized image coordinates, wrist at the origin
+OPEN_HAND = np.array(
+    [
+        (0.000, 0.000),
+        (-0.040, -0.025), (-0.070, -0.060), (-0.090, -0.095), (-0.105, -0.125),
+        (-0.035, -0.120), (-0.040, -0.170), (-0.043, -0.200), (-0.045, -0.225),
+        (-0.005, -0.125), (-0.005, -0.180), (-0.005, -0.215), (-0.005, -0.240),
+        (0.022, -0.118), (0.026, -0.168), (0.028, -0.200), (0.030, -0.222),
+        (0.045, -0.100), (0.055, -0.138), (0.062, -0.160), (0.067, -0.180),
+    ],
+    dtype=np.float32,
+)
+
+# Finger chains curled by the synthetic animation (thumb, index, ..., little)
+FINGERS = [(1, 2, 3, 4), (5, 6, 7, 8), (9, 10, 11, 12), (13, 14, 15, 16), (17, 18, 19, 20)]
+
+
+def record(source, output, max_frames=None):
+    import cv2 as cv
+    import mediapipe as mp
+
+    cap = cv.VideoCapture(int(source) if source.isdigit() else source)
+    fps = cap.get(cv.CAP_PROP_FPS) or 30.0
+    hands = mp.solutions.hands.Hands(max_num_hands=MAX_HANDS, min_detection_confidence=0.7)
+
+    landmarks, num_hands, handedness, timestamps = [], [], [], []
+    image_size = (0, 0)
+    try:
+        while max_frames is None or len(timestamps) < max_frames:
+            ret, image = cap.read()
+            if not ret:
+                break
+            image_size = (image.shape[1], image.shape[0])
+
+            results = hands.process(cv.cvtColor(cv.flip(image, 1), cv.COLOR_BGR2RGB))
+            frame = np.zeros((MAX_HANDS, 21, 2), dtype=np.float32)
+            sides = np.zeros(MAX_HANDS, dtype=np.int8)
+            count = 0
+            if results.multi_hand_landmarks is not None:
+                for hand_landmarks, hand_handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+                    frame[count] = [(landmark.x, landmark.y) for landmark in hand_landmarks.landmark]
+                    sides[count] = HANDEDNESS.index(hand_handedness.classification[0].label)
+                    count += 1
+
+            landmarks.append(frame)
+            num_hands.append(count)
+            handedness.append(sides)
+            timestamps.append(len(timestamps) / fps)
+    finally:
+        cap.release()
+        hands.close()
+
+    save(output, np.array(landmarks), np.array(num_hands), np.array(handedness), np.array(timestamps), image_size)
+    print(f"recorded {len(timestamps)} frames to {output}")
+
+
+def synthesize(output, num_frames=900, fps=30.0, seed=0):
+    """
+    A 30 s session: one hand moving and changing shape most of the time, a
+    second hand in a third of the frames and no hand in one frame out of ten,
+    with per-frame landmark jitter.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(num_frames) / fps
+
+    landmarks = np.zeros((num_frames, MAX_HANDS, 21, 2), dtype=np.float32)
+    num_hands = np.ones(num_frames, dtype=np.int8)
+    num_hands[(t % 9.0) >= 6.0] = 2
+    num_hands[(t % 10.0) >= 9.0] = 0
+    handedness = np.tile(np.array([1, 0], dtype=np.int8), (num_frames, 1))
+
+    for index in range(num_frames):
+        for hand in range(num_hands[index]):
+            shape = OPEN_HAND.copy()
+
+            # Curl each finger towards its base by a slowly varying amount
+            for finger, chain in enumerate(FINGERS):
+                curl = 0.5 + 0.5 * np.sin(0.7 * t[index] + 1.3 * finger + 2.0 * hand)
+                base = shape[chain[0]]
+                shape[list(chain[1:])] = base + (shape[list(chain[1:])] - base) * (1.0 - 0.7 * curl)
+
+            if hand == 1:
+                shape[:, 0] = -shape[:, 0]
+
+            scale = 1.0 + 0.2 * np.sin(0.3 * t[index])
+            wrist = np.array(
+                (
+                    0.35 + 0.3 * hand + 0.1 * np.sin(0.5 * t[index] + hand),
+                    0.75 + 0.05 * np.cos(0.4 * t[index]),
+                ),
+                dtype=np.float32,
+            )
+            jitter = rng.normal(0.0, 0.002, size=(21, 2))
+            landmarks[index, hand] = np.clip(wrist + scale * shape + jitter, 0.0, 1.0)
+
+    save(output, landmarks, num_hands, handedness, t, (640, 480))
+    print(f"synthesized {num_frames} frames to {output}")
+
+
+def save(output, landmarks, num_hands, handedness, timestamps, image_size):
+    np.savez_compressed(
+        output,
+        landmarks=landmarks.astype(np.float32),
+        num_hands=num_hands.astype(np.int8),
+        handedness=handedness.astype(np.int8),
+        timestamps=timestamps.astype(np.float64),
+        image_size=np.array(image_size, dtype=np.int32),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record hand landmark fixtures for the benchmark suite")
+    parser.add_argument("source", nargs="?", help="video file or camera index")
+    parser.add_argument("--output", required=True, help="fixture file to write (.npz)")
+    parser.add_argument("--max-frames", type=int, help="stop after this many frames")
+    parser.add_argument("--synthesize", action="store_true", help="write a synthetic session instead of recording")
+    args = parser.parse_args()
+
+    if args.synthesize:
+        synthesize(args.output)
+    elif args.source is None:
+        parser.error("a video file or camera index is required unless --synthesize is given")
+    else:
+        record(args.source, args.output, args.max_frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Replay harness for letter commit logic.
+
+Feeds a stream of per-frame predictions through the old fixed-timer logic
+of v6.py (one letter per 1.5 s, space after 2.0 s) and through
+LetterCommitEngine, and reports characters per minute and character error
+rate (edit distance to the target text / target length) for each.
+
+The stream is either synthetic (a simulated signer with noisy transitions
+and misclassified frames, the default) or a JSONL file of recorded frames
+with "timestamp", "label" and "confidence" keys, as written by
+batch_recognize.py. Run from the repository root:
+
+    python benchmarks/replay_letter_commit.py
+    python benchmarks/replay_letter_commit.py --input frames.jsonl --target "HELLO"
+"""
+import argparse
+import json
+import os
+import string
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.letter_commit import LetterCommitEngine  # noqa: E402
+
+LABELS = list(string.ascii_uppercase)
+FPS = 30.0
+
+
+def simulate_signer(text, seed=0, fps=FPS):
+    """
+    Per-frame (timestamp, label, confidence) for a signer spelling `text`.
+
+    Each letter starts with a short, noisy transition, then is held for
+    0.3-0.6 s with ~10% misclassified frames. Repeated letters are separated
+    by a brief release, words by lowering the hand for 2.5 s.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    t = 0.0
+
+    def emit(duration, make):
+        nonlocal t
+        for _ in range(max(1, int(duration * fps))):
+            frames.append((t,) + make())
+            t += 1.0 / fps
+
+    def noise():
+        return LABELS[rng.integers(len(LABELS))], float(rng.uniform(0.2, 0.8))
+
+    previous = None
+    for char in text:
+        if char == " ":
+            emit(2.5, lambda: (None, 0.0))
+            previous = None
+            continue
+
+        if char == previous:
+            emit(0.2, lambda: (None, 0.0))
+
+        emit(rng.uniform(0.1, 0.25), noise)
+
+        def held(char=char):
+            if rng.random() < 0.1:
+                return noise()
+            return char, float(np.clip(rng.normal(0.92, 0.05), 0.0, 1.0))
+
+        emit(rng.uniform(0.3, 0.6), held)
+        previous = char
+
+    emit(2.5, lambda: (None, 0.0))
+    return frames
+
+
+def load_frames(path):
+    frames = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                frames.append((record["timestamp"], record.get("label"), record.get("confidence", 0.0)))
+    return frames
+
+
+def replay_legacy(frames):
+    """Timer logic previously inlined in the v6.py camera loop"""
+    text = ""
+    last_detection_time = last_input_time = frames[0][0] if frames else 0.0
+    for timestamp, label, _ in frames:
+        if label is not None and label != "None":
+            if timestamp - last_detection_time >= 1.5:
+                text += label
+                last_detection_time = timestamp
+                last_input_time = timestamp
+
+        if text and timestamp - last_input_time >= 2.0 and not text.endswith(" "):
+            text += " "
+            last_input_time = timestamp
+    return text
+
+
+def replay_engine(frames, **params):
+    engine = LetterCommitEngine(LABELS, **params)
+    text = ""
+    for timestamp, label, confidence in frames:
+        text += engine.update(label, confidence, timestamp)
+    return text
+
+
+def edit_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, char_b in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (char_a != char_b))
+    return row[-1]
+
+
+def report(name, output, target, duration):
+    output, target = output.strip(), target.strip()
+    letters = len(output.replace(" ", ""))
+    cpm = 60.0 * letters / duration if duration > 0 else 0.0
+    cer = edit_distance(output, target) / max(len(target), 1)
+    print(f"{name:<10}{cpm:>8.1f} cpm{cer:>10.1%} CER   {output!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay per-frame sign predictions through the letter commit logic")
+    parser.add_argument("--input", help="JSONL file of recorded frames (default: simulated signer)")
+    parser.add_argument("--target", default="HELLO WORLD THIS IS A SIGN LANGUAGE TEST", help="expected text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--window", type=int, default=8)
+    parser.add_argument("--min-votes", type=int, default=5)
+    parser.add_argument("--min-confidence", type=float, default=0.7)
+    parser.add_argument("--release-frames", type=int, default=3)
+    parser.add_argument("--space-after", type=float, default=2.0)
+    args = parser.parse_args()
+
+    frames = load_frames(args.input) if args.input else simulate_signer(args.target, seed=args.seed)
+    if not frames:
+        sys.exit("no frames to replay")
+    duration = frames[-1][0] - frames[0][0]
+
+    print(f"{len(frames)} frames, {duration:.1f} s, target {args.target!r}")
+    report("legacy", replay_legacy(frames), args.target, duration)
+    report(
+        "engine",
+        replay_engine(
+            frames,
+            window=args.window,
+            min_votes=args.min_votes,
+            min_confidence=args.min_confidence,
+            release_frames=args.release_frames,
+            space_after=args.space_after,
+        ),
+        args.target,
+        duration,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+"""
+Benchmark suite for the sign recognition pipeline, no camera needed.
+
+Covers the landmark helpers, KeyPointClassifier per call and batched, the
+overlay renderer, the JPEG preview, the letter commit engine, the StageTimer
+overhead and the full per-frame recognize_hand_signs path. The full path
+runs on synthetic frames with hands replayed from a landmark fixture (see
+record_landmarks.py), and additionally with real MediaPipe Hands when it is
+installed.
+
+Every case is timed call by call after a warm-up, with the garbage
+collector disabled and fixed random seeds, and reports the median, p95 and
+p99 latency plus the bytes allocated per call (tracemalloc, in a separate
+pass). Results can be saved as a JSON baseline and two runs compared; the
+comparison exits with status 1 when a case regressed. Run from the
+repository root:
+
+    python benchmarks/run_suite.py --output baseline.json
+    python benchmarks/run_suite.py --output current.json --compare baseline.json
+    python benchmarks/run_suite.py --compare baseline.json current.json
+"""
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import cv2 as cv
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model.keypoint_classifier.keypoint_classifier import KeyPointClassifier  # noqa: E402
+from utils.frame_display import FrameDisplay  # noqa: E402
+from utils.hand_tracker import FullFrameHandDetector, TrackedHands  # noqa: E402
+from utils.landmark_features import calc_hand_features, landmarks_to_array  # noqa: E402
+from utils.letter_commit import LetterCommitEngine, most_confident  # noqa: E402
+from utils.overlay import HandOverlayRenderer  # noqa: E402
+from utils.sign_recognition import read_labels, recognize_hand_signs  # noqa: E402
+from utils.stage_timer import StageTimer  # noqa: E402
+
+DEFAULT_FIXTURE = os.path.join(ROOT, "benchmarks", "fixtures", "synthetic_session.npz")
+HANDEDNESS = ("Left", "Right")
+SCHEMA_VERSION = 1
+
+
+class LandmarkFixture(object):
+    """Landmark session recorded by record_landmarks.py"""
+
+    def __init__(self, path):
+        data = np.load(path)
+        self.landmarks = data["landmarks"]
+        self.num_hands = data["num_hands"]
+        self.handedness = data["handedness"]
+        self.timestamps = data["timestamps"]
+        self.image_width, self.image_height = (int(value) for value in data["image_size"])
+
+        # MediaPipe-style handedness objects, as used for the overlay labels
+        self._handedness = [
+            SimpleNamespace(classification=[SimpleNamespace(label=label, score=1.0)]) for label in HANDEDNESS
+        ]
+
+    def __len__(self):
+        return len(self.num_hands)
+
+    def hands(self, index):
+        """(N, 21, 2) landmarks and handedness objects of frame `index`"""
+        count = self.num_hands[index]
+        return (
+            self.landmarks[index, :count],
+            [self._handedness[side] for side in self.handedness[index, :count]],
+        )
+
+    def frames_with_hands(self, count):
+        return np.flatnonzero(self.num_hands == count)
+
+
+class ReplayHandDetector(object):
+    """Stands in for AdaptiveHandDetector, returning the fixture's frames in a loop"""
+
+    def __init__(self, fixture):
+        self.fixture = fixture
+        self.position = 0
+
+    def process(self, image):
+        landmarks, handedness = self.fixture.hands(self.position)
+        self.position = (self.position + 1) % len(self.fixture)
+        return TrackedHands(landmarks, handedness, None, 1.0)
+
+    def reset(self):
+        self.position = 0
+
+    def stats(self):
+        return {}
+
+
+class NullPlaceholder(object):
+    def image(self, *args, **kwargs):
+        pass
+
+
+def synthetic_frames(count, width, height, seed=0):
+    """BGR frames with smooth shading and sensor noise, so JPEG and MediaPipe do real work"""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(40, 200, width, dtype=np.float32)[None, :, None]
+    frames = []
+    for index in range(count):
+        base = np.broadcast_to(gradient + 10 * index % 30, (height, width, 3))
+        noise = rng.normal(0.0, 6.0, size=(height, width, 3))
+        frames.append(np.clip(base + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def fake_mediapipe_hand(landmarks):
+    return SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=0.0) for x, y in landmarks])
+
+
+def build_cases(fixture, backends):
+    """Name -> zero-argument callable; each call is one timed sample"""
+    width, height = fixture.image_width, fixture.image_height
+    labels = read_labels(os.path.join(ROOT, "model", "keypoint_classifier", "keypoint_classifier_label.csv"))
+
+    one_hand = fixture.frames_with_hands(1)
+    two_hands = fixture.frames_with_hands(2)
+    single = fixture.landmarks[one_hand[0], :1]
+    pair = fixture.landmarks[two_hands[0], :2]
+    mediapipe_hand = fake_mediapipe_hand(single[0])
+
+    # Features of every hand in the fixture, for the classifier cases
+    all_hands = np.concatenate([fixture.hands(index)[0] for index in range(len(fixture))])
+    _, _, all_features = calc_hand_features(all_hands, width, height)
+    batch = np.ascontiguousarray(all_features[:256])
+
+    cases = {}
+    cases["landmarks/to_array"] = lambda: landmarks_to_array(mediapipe_hand)
+    cases["landmarks/features_1_hand"] = lambda: calc_hand_features(single, width, height)
+    cases["landmarks/features_2_hands"] = lambda: calc_hand_features(pair, width, height)
+
+    for backend in backends:
+        classifier = KeyPointClassifier(
+            model_path=os.path.join(
+                ROOT,
+                "model",
+                "keypoint_classifier",
+                "keypoint_classifier.tflite" if backend == "tflite" else "keypoint_classifier.npz",
+            ),
+            backend=backend,
+        )
+        feature = all_features[0]
+        cases[f"classifier/{backend}/call"] = lambda classifier=classifier, feature=feature: classifier(feature)
+        cases[f"classifier/{backend}/batch_2"] = lambda classifier=classifier: classifier.classify_batch(batch[:2])
+        cases[f"classifier/{backend}/batch_256"] = lambda classifier=classifier: classifier.classify_batch(batch)
+
+    frame = synthetic_frames(1, width, height)[0]
+    renderer = HandOverlayRenderer()
+    points, brects, _ = calc_hand_features(pair, width, height)
+    info_texts = ["Right:A", "Left:B"]
+    canvas = frame.copy()
+    cases["overlay/draw_2_hands"] = lambda: renderer.draw(canvas, points, brects, info_texts)
+
+    display = FrameDisplay(NullPlaceholder(), max_fps=float("inf"))
+    cases["display/jpeg_show"] = lambda: display.show(frame)
+
+    engine = LetterCommitEngine(labels)
+    stream = [(labels[index % len(labels)], 0.9, index / 30.0) for index in range(len(labels) * 8)]
+    position = [0]
+
+    def letter_commit():
+        label, confidence, timestamp = stream[position[0] % len(stream)]
+        position[0] += 1
+        return engine.update(label, confidence, timestamp + 10.0 * (position[0] // len(stream)))
+
+    cases["letter_commit/update"] = letter_commit
+
+    stage_timer = StageTimer()
+
+    def stage_timer_span():
+        with stage_timer.span("stage"):
+            pass
+
+    cases["stage_timer/span"] = stage_timer_span
+
+    # Full per-frame path with replayed hands; recognize_hand_signs mirrors in
+    # place, so every call gets a fresh copy of a synthetic frame
+    frames = synthetic_frames(8, width, height)
+    pipeline_classifier = KeyPointClassifier(
+        model_path=os.path.join(ROOT, "model", "keypoint_classifier", "keypoint_classifier.npz"),
+        backend="numpy",
+    )
+    replay = ReplayHandDetector(fixture)
+    counter = [0]
+
+    def pipeline_fixture():
+        image = frames[counter[0] % len(frames)].copy()
+        counter[0] += 1
+        _, hand_signs = recognize_hand_signs(image, replay, pipeline_classifier, labels, overlay_renderer=renderer)
+        return most_confident(hand_signs)
+
+    cases["pipeline/fixture_replay"] = pipeline_fixture
+
+    def pipeline_fixture_timed():
+        image = frames[counter[0] % len(frames)].copy()
+        counter[0] += 1
+        _, hand_signs = recognize_hand_signs(
+            image, replay, pipeline_classifier, labels, overlay_renderer=renderer, stage_timer=stage_timer
+        )
+        return most_confident(hand_signs)
+
+    cases["pipeline/fixture_replay_timed"] = pipeline_fixture_timed
+
+    try:
+        import mediapipe as mp
+    except ImportError:
+        pass
+    else:
+        hands = FullFrameHandDetector(
+            mp.solutions.hands.Hands(max_num_hands=2, min_detection_confidence=0.7, min_tracking_confidence=0.5)
+        )
+
+        def pipeline_mediapipe():
+            image = frames[counter[0] % len(frames)].copy()
+            counter[0] += 1
+            _, hand_signs = recognize_hand_signs(image, hands, pipeline_classifier, labels, overlay_renderer=renderer)
+            return most_confident(hand_signs)
+
+        cases["pipeline/mediapipe_synthetic"] = pipeline_mediapipe
+
+    return cases
+
+
+def available_backends():
+    backends = ["numpy"]
+    try:
+        import tensorflow  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        backends.append("tflite")
+    return backends
+
+
+def measure(function, min_samples, min_time, warmup, alloc_calls):
+    for _ in range(warmup):
+        function()
+
+    # Latency: one sample per call, until both limits are reached
+    timer = time.perf_counter_ns
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        deadline = timer() + int(min_time * 1e9)
+        while len(samples) < min_samples or timer() < deadline:
+            start = timer()
+            function()
+            samples.append(timer() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Allocations: separate pass, tracemalloc slows every allocation down
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        start_size, _ = tracemalloc.get_traced_memory()
+        allocated = 0
+        for _ in range(alloc_calls):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            function()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+        retained = tracemalloc.get_traced_memory()[0] - start_size
+    finally:
+        tracemalloc.stop()
+
+    samples = np.array(samples, dtype=np.float64) / 1e3
+    return {
+        "samples": int(len(samples)),
+        "median_us": round(float(np.median(samples)), 3),
+        "p95_us": round(float(np.percentile(samples, 95)), 3),
+        "p99_us": round(float(np.percentile(samples, 99)), 3),
+        "mean_us": round(float(samples.mean()), 3),
+        "min_us": round(float(samples.min()), 3),
+        "alloc_bytes_per_call": int(round(allocated / alloc_calls)),
+        "retained_bytes_per_call": int(round(retained / alloc_calls)),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv.__version__,
+        "opencv_threads": cv.getNumThreads(),
+        "commit": commit,
+    }
+
+
+def run(args):
+    cv.setNumThreads(args.threads)
+    np.random.seed(0)
+
+    fixture = LandmarkFixture(args.fixture)
+    cases = build_cases(fixture, available_backends())
+
+    results = {}
+    for name, function in cases.items():
+        if args.filter and not any(fnmatch.fnmatch(name, pattern) for pattern in args.filter):
+            continue
+        results[name] = measure(function, args.min_samples, args.min_time, args.warmup, args.alloc_calls)
+        print(format_result(name, results[name]))
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "fixture": os.path.relpath(args.fixture, ROOT),
+        "settings": {
+            "min_samples": args.min_samples,
+            "min_time": args.min_time,
+            "warmup": args.warmup,
+            "alloc_calls": args.alloc_calls,
+            "threads": args.threads,
+        },
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def format_result(name, result):
+    return (
+        f"{name:34s} median {result['median_us']:10.2f} us  p95 {result['p95_us']:10.2f} us  "
+        f"p99 {result['p99_us']:10.2f} us  alloc {result['alloc_bytes_per_call']:9d} B"
+    )
+
+
+def compare(baseline, current, threshold, noise_floor_us):
+    """
+    Print per-case changes and return the names of regressed cases.
+
+    A case regresses when its median grows by more than `threshold` (relative)
+    and `noise_floor_us` (absolute), or when its allocations per call grow by
+    more than `threshold` and 1 kB.
+    """
+    if baseline["environment"].get("machine") != current["environment"].get("machine"):
+        print("warning: runs come from different machines, timings are not comparable")
+
+    regressions = []
+    print(f"{'case':34s} {'median':>22s} {'change':>8s} {'p99 change':>10s} {'alloc':>22s}")
+    for name in sorted(set(baseline["results"]) | set(current["results"])):
+        if name not in current["results"]:
+            print(f"{name:34s} missing from the current run")
+            continue
+        if name not in baseline["results"]:
+            print(f"{name:34s} new case")
+            continue
+
+        before, after = baseline["results"][name], current["results"][name]
+        change = after["median_us"] / max(before["median_us"], 1e-9) - 1.0
+        p99_change = after["p99_us"] / max(before["p99_us"], 1e-9) - 1.0
+        slower = change > threshold and after["median_us"] - before["median_us"] > noise_floor_us
+        alloc_growth = after["alloc_bytes_per_call"] - before["alloc_bytes_per_call"]
+        more_memory = alloc_growth > 1024 and alloc_growth > threshold * before["alloc_bytes_per_call"]
+
+        flags = []
+        if slower:
+            flags.append("SLOWER")
+        if more_memory:
+            flags.append("MORE MEMORY")
+        if flags:
+            regressions.append(name)
+
+        print(
+            f"{name:34s} {before['median_us']:9.2f} -> {after['median_us']:9.2f} us {change:+8.1%} "
+            f"{p99_change:+10.1%} {before['alloc_bytes_per_call']:9d} -> {after['alloc_bytes_per_call']:9d} B "
+            + " ".join(flags)
+        )
+
+    return regressions
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sign pipeline benchmark suite")
+    parser.add_argument("--output", help="write the results of this run to a JSON file")
+    parser.add_argument(
+        "--compare",
+        nargs="+",
+        metavar="RUN",
+        help="baseline JSON to compare this run against, or two JSON runs to compare without benchmarking",
+    )
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="landmark fixture (.npz)")
+    parser.add_argument("--filter", nargs="+", help="only run cases matching these glob patterns")
+    parser.add_argument("--min-samples", type=int, default=200, help="minimum timed calls per case")
+    parser.add_argument("--min-time", type=float, default=0.5, help="minimum seconds per case")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed calls before measuring")
+    parser.add_argument("--alloc-calls", type=int, default=20, help="calls traced for allocations")
+    parser.add_argument("--threads", type=int, default=1, help="OpenCV threads (1 for stable numbers)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    parser.add_argument("--noise-floor", type=float, default=1.0, help="absolute median change (us) ignored")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline, or a baseline and a current run")
+
+    if args.compare and len(args.compare) == 2:
+        current = load(args.compare[1])
+    else:
+        current = run(args)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(current, f, indent=2)
+            print(f"results written to {args.output}")
+
+    if args.compare:
+        print()
+        regressions = compare(load(args.compare[0]), current, args.threshold, args.noise_floor)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Simulation of LLMRouter against local stub backends with configurable
+latency distributions (see llm_stub.py).
+
+Three backends: a fast Groq-style stub with a heavy tail (--tail-prob of
+requests take --tail-ms), a steady slower one, and a Hugging Face style
+stub. Each scenario sends --requests prompts and reports end-to-end latency
+percentiles, which backend answered, hedges and server-side aborts:
+
+- pinned: always the fast backend, as v6.py did before the router
+- routed: fastest healthy backend, no hedging
+- hedged: routed, plus a second request after the p90 latency
+
+Another scenario makes the fast backend fail every request and checks that
+the router fails over and then stops sending it traffic. The last one starts
+from a Groq-style backend answering after --slow-ms and an untried, slower
+Hugging Face style one: without hedging the untried backend gets no
+traffic, with hedging it is measured through hedges and exploration
+requests. Run from the
+repository root:
+
+    python benchmarks/sim_llm_router.py
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from groq_api import GroqAPI  # noqa: E402
+from huggingface_api import HuggingFaceAPI  # noqa: E402
+from llm_router import Backend, LLMRouter, is_error_response  # noqa: E402
+from utils.http_client import NO_RETRIES  # noqa: E402
+
+from llm_stub import start_stub  # noqa: E402
+
+
+def heavy_tail(median, tail_prob, tail):
+    def latency():
+        if random.random() < tail_prob:
+            return tail
+        return random.lognormvariate(0.0, 0.25) * median
+    return latency
+
+
+def groq_client(server):
+    client = GroqAPI(connect_timeout=2.0, read_timeout=10.0, retry_policy=NO_RETRIES)
+    client.api_url = server.url
+    return client
+
+
+def huggingface_client(server):
+    client = HuggingFaceAPI()
+    client.api_base = server.url.rsplit("/", 4)[0] + "/models"
+    return client
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[int(round(q * (len(values) - 1)))]
+
+
+def run(name, router, count, servers):
+    aborted = sum(server.aborted for server in servers.values())
+    counters = (router.hedged, router.hedge_wins, router.failovers)
+    latencies = []
+    errors = 0
+    answered = {}
+    for index in range(count):
+        start = time.perf_counter()
+        text = router.generate_response(f"Question {index}")
+        latencies.append(1000 * (time.perf_counter() - start))
+        if is_error_response(text):
+            errors += 1
+        elif router.last_backend is not None:
+            answered[router.last_backend.name] = answered.get(router.last_backend.name, 0) + 1
+
+    time.sleep(0.2)
+    aborted = sum(server.aborted for server in servers.values()) - aborted
+    hedged, hedge_wins, failovers = (now - before for now, before in zip(
+        (router.hedged, router.hedge_wins, router.failovers), counters
+    ))
+    print(
+        f"{name:8s} p50 {statistics.median(latencies):6.1f}  p95 {percentile(latencies, 0.95):6.1f}  "
+        f"p99 {percentile(latencies, 0.99):6.1f}  max {max(latencies):6.1f} ms  errors {errors}  "
+        f"hedged {hedged}  hedge wins {hedge_wins}  failovers {failovers}  aborted {aborted}"
+    )
+    print(f"         answered by {answered}")
+    return latencies
+
+
+def make_router(servers, hedge):
+    backends = [
+        Backend("fast", groq_client(servers["fast"]), "model-a", failure_threshold=3, cooldown=60.0),
+        Backend("steady", groq_client(servers["steady"]), "model-b"),
+        Backend("huggingface", huggingface_client(servers["huggingface"]), "model-c"),
+    ]
+    # A short hedge delay until the p90 is known, so the first requests are covered too
+    return LLMRouter(backends, hedge=hedge, hedge_delay=0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLMRouter simulation against local stubs")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--fast-ms", type=float, default=20.0, help="median latency of the fast backend")
+    parser.add_argument("--tail-prob", type=float, default=0.08, help="probability of a slow fast-backend request")
+    parser.add_argument("--tail-ms", type=float, default=400.0, help="latency of a slow fast-backend request")
+    parser.add_argument("--steady-ms", type=float, default=60.0, help="latency of the steady backend")
+    parser.add_argument("--huggingface-ms", type=float, default=150.0, help="latency of the Hugging Face stub")
+    parser.add_argument("--slow-ms", type=float, default=1100.0, help="latency of the measured backend when starting slow")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    servers = {
+        "fast": start_stub(
+            token_delay=0.002, num_tokens=20,
+            latency=heavy_tail(args.fast_ms / 1000.0, args.tail_prob, args.tail_ms / 1000.0),
+        ),
+        "steady": start_stub(token_delay=0.002, num_tokens=20, latency=lambda: args.steady_ms / 1000.0),
+        "huggingface": start_stub(token_delay=0.002, num_tokens=20, latency=lambda: args.huggingface_ms / 1000.0),
+    }
+
+    try:
+        pinned = make_router(servers, hedge=False)
+        pinned.backends = pinned.backends[:1]
+        baseline = run("pinned", pinned, args.requests, servers)
+
+        routed = make_router(servers, hedge=False)
+        run("routed", routed, args.requests, servers)
+
+        hedged_router = make_router(servers, hedge=True)
+        hedged = run("hedged", hedged_router, args.requests, servers)
+        for row in hedged_router.stats()["backends"]:
+            print(f"         {row}")
+
+        print(f"hedging p99 {percentile(baseline, 0.99):.1f} -> {percentile(hedged, 0.99):.1f} ms")
+
+        # The fast backend goes down
+        servers["fast"].error_rate = 1.0
+        requests_before = servers["fast"].requests
+        run("outage", hedged_router, 50, servers)
+        fast = hedged_router.backend("fast:model-a")
+        print(
+            f"         fast backend got {servers['fast'].requests - requests_before} of 50 requests, "
+            f"healthy {fast.healthy()}"
+        )
+
+        # Slower than a second, against a backend nothing is known about yet
+        servers["fast"].error_rate = 0.0
+        servers["fast"].latency = lambda: args.slow_ms / 1000.0
+        servers["huggingface"].latency = lambda: 2.0 * args.slow_ms / 1000.0
+        for hedge in (False, True):
+            router = make_router(servers, hedge=hedge)
+            router.backends = [router.backends[0], router.backends[2]]
+            router.explore_every = 4
+            requests_before = servers["huggingface"].requests
+            run("slow, hedged" if hedge else "slow", router, 8, servers)
+            print(
+                f"         untried backend got {servers['huggingface'].requests - requests_before} of 8 requests "
+                f"({router.explored} explorations, {router.hedged} hedges)"
+            )
+    finally:
+        for server in servers.values():
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
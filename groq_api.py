@@ -1,53 +1,331 @@
-import requests
+from collections import deque, namedtuple
+import hashlib
 import json
+import time
+
+import requests
+
+from utils.conversation_context import ConversationContext
+from utils.http_client import RetryPolicy, get_session, request_with_retries
+from utils.rate_limiter import RateLimitExceeded, get_rate_limiter
+from utils.request_coalescer import get_request_coalescer
+from utils.response_cache import response_cache_key
+
+# Per-request timing in seconds: time to the first token and to the end of the response
+RequestTiming = namedtuple("RequestTiming", ["model", "streamed", "cached", "first_token", "total", "chunks", "ok"])
 
 class GroqAPI:
     """
     A class to interact with Groq's API for fast language model inference.
+
+    Requests go through the process-wide pooled session, so consecutive
+    messages reuse the same keep-alive connection. Every request has a
+    connect and a read timeout, and 429 / 5xx responses and connection
+    failures are retried with jittered exponential backoff, honoring
+    Retry-After. The timing of the last `timing_history` requests is kept in
+    `timings`.
+
+    With a ResponseCache, answers are looked up by normalized prompt, model
+    and sampling parameters before calling the API, and successful answers
+    are stored.
+
+    Prior chat messages passed as `history` are sent along as context, as
+    much as the ConversationContext token budget allows; the context is
+    part of the cache key.
+
+    Identical requests in flight at the same time, from any client in the
+    process, share one upstream call through the RequestCoalescer. With a
+    RateLimiter, requests wait for (or are refused by) the client-side
+    requests and tokens per minute limit, which follows the rate-limit
+    headers of the responses. With `rate_limits` (RateLimiter options)
+    instead, the client uses the process-wide RateLimiter of its API key,
+    and switches to another one with set_api_key().
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        connect_timeout=5.0,
+        read_timeout=60.0,
+        retry_policy=None,
+        timing_history=100,
+        cache=None,
+        context=None,
+        coalesce=True,
+        rate_limiter=None,
+        rate_limits=None,
+    ):
         # Default API key - should be provided by the user
         self.api_key = ""  # User needs to provide their own API key
         # API URL
         self.api_url = "https://api.groq.com/openai/v1/chat/completions"
         # Default model
         self.model = "meta-llama/llama-4-scout-17b-16e-instruct"
+        # Sampling parameters
+        self.temperature = 0.7
+        self.max_tokens = 800
+        # Response cache shared between clients, or None
+        self.cache = cache
+        # Selects the prior messages sent with each prompt
+        self.context = context if context is not None else ConversationContext()
+        # HTTP settings
+        self.session = get_session()
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        # Process-wide request coalescing and, optionally, rate limiting
+        self.coalescer = get_request_coalescer() if coalesce else None
+        self.rate_limits = rate_limits
+        self.rate_limiter = rate_limiter if rate_limits is None else self._key_rate_limiter()
+        # Timing of recent requests, newest last
+        self.timings = deque(maxlen=timing_history)
 
     def set_api_key(self, api_key):
         """Set the Groq API key"""
         if api_key and api_key.strip():
             self.api_key = api_key
+            # Quotas belong to the key: don't share another key's limiter
+            if self.rate_limits is not None:
+                self.rate_limiter = self._key_rate_limiter()
+
+    def _key_rate_limiter(self):
+        # Named by a fingerprint, so the key itself is not kept in the registry
+        fingerprint = hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:16]
+        return get_rate_limiter(f"groq:{fingerprint}", **self.rate_limits)
 
     def set_model(self, model):
         """Set the model to use for inference"""
         self.model = model
 
-    def generate_response(self, prompt):
-        """Generate a response using the Groq API"""
+    @property
+    def last_timing(self):
+        return self.timings[-1] if self.timings else None
+
+    def generate_response(self, prompt, history=None):
+        """Generate a response using the Groq API, with prior chat messages as context"""
+        start = time.perf_counter()
+        messages = self.build_messages(prompt, history)
+        cache_key = self.cache_key(messages)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                total = time.perf_counter() - start
+                self.timings.append(RequestTiming(self.model, False, True, total, total, 1, True))
+                return cached
+
+        ok = False
+        try:
+            if self.coalescer is not None:
+                response_text, ok = self.coalescer.call(
+                    self._coalesce_key(messages), lambda: self._complete(messages, cache_key)
+                )
+            else:
+                response_text, ok = self._complete(messages, cache_key)
+            return response_text
+        finally:
+            total = time.perf_counter() - start
+            self.timings.append(RequestTiming(self.model, False, False, total, total, 1, ok))
+
+    def generate_response_stream(self, prompt, history=None):
+        """
+        Generate a response using the Groq API, yielding text deltas as they
+        arrive (OpenAI-compatible server-sent events). Errors are yielded as
+        text, like generate_response returns them. A cached answer is
+        yielded as a single delta.
+        """
+        start = time.perf_counter()
+        messages = self.build_messages(prompt, history)
+        cache_key = self.cache_key(messages)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                total = time.perf_counter() - start
+                self.timings.append(RequestTiming(self.model, True, True, total, total, 1, True))
+                yield cached
+                return
+
+        if self.coalescer is not None:
+            deltas = self.coalescer.stream(
+                self._coalesce_key(messages), lambda: self._stream_completion(messages, cache_key)
+            )
+        else:
+            deltas = self._stream_completion(messages, cache_key)
+
+        first_token = None
+        chunks = 0
+        ok = False
         try:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
+            while True:
+                try:
+                    delta = next(deltas)
+                except StopIteration as stop:
+                    ok = bool(stop.value)
+                    break
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                chunks += 1
+                yield delta
+        finally:
+            deltas.close()
+            total = time.perf_counter() - start
+            self.timings.append(
+                RequestTiming(
+                    self.model, True, False, first_token if first_token is not None else total, total, chunks, ok
+                )
+            )
+
+    def build_messages(self, prompt, history=None):
+        """Request messages for `prompt`, preceded by as much of `history` as the context budget allows"""
+        if not history:
+            return [{"role": "user", "content": prompt}]
+        return self.context.build(prompt, history)
+
+    def request_parts(self, messages, stream=False):
+        """Headers and JSON body of a chat completion request for `messages`"""
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        data = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+        if stream:
+            data["stream"] = True
 
-            data = {
-                "model": self.model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.7,
-                "max_tokens": 800
-            }
+        return headers, data
 
-            response = requests.post(self.api_url, headers=headers, json=data)
+    def request_key(self, messages):
+        """Key identifying the answer to `messages` with the current model and sampling parameters"""
+        params = {"temperature": self.temperature, "max_tokens": self.max_tokens}
+        # The prompt alone keys a request without context, as before
+        if len(messages) > 1:
+            params["context"] = [[message["role"], message["content"]] for message in messages[:-1]]
+        return response_cache_key(messages[-1]["content"], self.model, **params)
+
+    def cache_key(self, messages):
+        """Response cache key of `messages`, or None without a cache"""
+        if self.cache is None:
+            return None
+        return self.request_key(messages)
+
+    def estimate_tokens(self, messages):
+        """Tokens a request for `messages` may use, for the rate limiter: the prompt (estimated) and max_tokens"""
+        return sum(self.context.count(message) for message in messages) + self.max_tokens
+
+    def _coalesce_key(self, messages):
+        # Requests with different API keys may get different answers (or errors)
+        return (self.api_key, self.request_key(messages))
+
+    def _complete(self, messages, cache_key):
+        # One upstream request; returns (response text, ok)
+        try:
+            response = self._post(messages, stream=False)
 
             if response.status_code == 200:
                 result = response.json()
-                return result["choices"][0]["message"]["content"].strip()
+                response_text = result["choices"][0]["message"]["content"].strip()
+                if cache_key is not None:
+                    self.cache.put(cache_key, response_text)
+                return response_text, True
             else:
-                return f"Error: API returned status code {response.status_code}. {response.text}"
+                return f"Error: API returned status code {response.status_code}. {response.text}", False
 
+        except requests.exceptions.ReadTimeout:
+            return f"Error with Groq API: no response within {self.timeout[1]:g} seconds", False
         except Exception as e:
-            return f"Error with Groq API: {str(e)}"
+            return f"Error with Groq API: {str(e)}", False
+
+    def _stream_completion(self, messages, cache_key):
+        # One upstream streamed request: yields its deltas, returns whether it succeeded
+        deltas = []
+        try:
+            response = self._post(messages, stream=True)
+
+            # Closed on every path, so the pooled connection is released
+            with response:
+                if response.status_code != 200:
+                    yield f"Error: API returned status code {response.status_code}. {response.text}"
+                    return False
+
+                complete = False
+                leading = True
+                for delta in self._iter_deltas(response):
+                    if delta is STREAM_DONE:
+                        complete = True
+                        break
+                    # Match generate_response, which strips the reply
+                    if leading:
+                        delta = delta.lstrip()
+                        if not delta:
+                            continue
+                        leading = False
+                    deltas.append(delta)
+                    yield delta
+
+            # A stream cut off before [DONE] is a truncated answer: not cached
+            if not complete:
+                yield "Error with Groq API: the response stream ended early"
+                return False
+            if cache_key is not None:
+                self.cache.put(cache_key, "".join(deltas).strip())
+            return True
+
+        except requests.exceptions.ReadTimeout:
+            yield f"Error with Groq API: no response within {self.timeout[1]:g} seconds"
+        except Exception as e:
+            yield f"Error with Groq API: {str(e)}"
+        return False
+
+    def _post(self, messages, stream):
+        headers, data = self.request_parts(messages, stream)
+        if self.rate_limiter is not None and not self.rate_limiter.acquire(
+            self.model, self.estimate_tokens(messages)
+        ):
+            raise RateLimitExceeded(f"client-side rate limit for {self.model} reached, try again shortly")
+
+        response = request_with_retries(
+            self.session,
+            "POST",
+            self.api_url,
+            retry_policy=self.retry_policy,
+            headers=headers,
+            json=data,
+            timeout=self.timeout,
+            stream=stream,
+        )
+        if self.rate_limiter is not None:
+            self.rate_limiter.update_from_headers(self.model, response.headers)
+        return response
+
+    @staticmethod
+    def _iter_deltas(response):
+        """Content deltas of an SSE chat completion stream, then STREAM_DONE if it was complete"""
+        # chunk_size=None hands over each chunk as soon as it arrives
+        for line in response.iter_lines(chunk_size=None):
+            content = parse_sse_line(line)
+            if content is STREAM_DONE:
+                yield STREAM_DONE
+                return
+            if content:
+                yield content
+
+# Returned by parse_sse_line at the end of a stream
+STREAM_DONE = object()
+
+def parse_sse_line(line):
+    """Content delta of one server-sent events line (bytes), STREAM_DONE, or None"""
+    if not line.startswith(b"data:"):
+        return None
+
+    payload = line[5:].strip()
+    if payload == b"[DONE]":
+        return STREAM_DONE
+
+    choices = json.loads(payload).get("choices") or []
+    if not choices:
+        return None
+    return choices[0].get("delta", {}).get("content")
 
 # List of available models on Groq
 AVAILABLE_MODELS = [
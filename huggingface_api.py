@@ -1,86 +1,344 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
 import json
-import os
-from huggingface_hub import InferenceClient
+import threading
+import time
+
+import requests
+
+from utils.conversation_context import ConversationContext
+from utils.http_client import RETRY_STATUSES, RetryPolicy, get_session, request_with_retries
+from utils.lazy_import import lazy_import
+from utils.response_cache import response_cache_key
+
+# Only needed once an API token is set
+huggingface_hub = lazy_import("huggingface_hub")
 
 class HuggingFaceAPI:
     """
     A class to interact with Hugging Face's free inference API for text generation.
     This provides a free alternative to OpenAI's API.
+
+    Without a token, requests go through the process-wide pooled session
+    with connect and read timeouts and retries, like GroqAPI. A 503 "model
+    is loading" answer is waited out (up to `load_timeout` seconds, polling
+    at the estimated load time) instead of being returned as an error;
+    warm_up() does this ahead of the first real request. With a token, one
+    InferenceClient is kept for as long as the token does not change.
+
+    With a ResponseCache, answers are looked up by normalized prompt, model
+    and generation parameters before calling the API, and successful answers
+    are stored. A streamed answer only counts as successful when its last
+    event says generation finished.
+
+    Prior chat messages passed as `history` are prepended to the prompt as a
+    plain-text transcript, within the ConversationContext token budget.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache=None,
+        context=None,
+        connect_timeout=5.0,
+        read_timeout=60.0,
+        retry_policy=None,
+        load_timeout=120.0,
+        max_parallel=4,
+    ):
         # Default API token - users can set their own
         self.api_token = ""
         # Default model - a good free alternative that doesn't require API token
         self.model = "google/flan-t5-large"
         # Inference API URL
-        self.api_url = f"https://api-inference.huggingface.co/models/{self.model}"
+        self.api_base = "https://api-inference.huggingface.co/models"
+        self.api_url = f"{self.api_base}/{self.model}"
         # Initialize the client as None until token is set
         self.client = None
+        # Generation parameters
+        self.max_new_tokens = 150
+        self.temperature = 0.7
+        self.repetition_penalty = 1.2
+        # Response cache shared between clients, or None
+        self.cache = cache
+        # Selects the prior messages sent with each prompt
+        self.context = context if context is not None else ConversationContext()
+        # HTTP settings; 503 means "model loading" here and is handled separately
+        self.session = get_session()
+        self.timeout = (connect_timeout, read_timeout)
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy(
+            retry_statuses=[status for status in RETRY_STATUSES if status != 503]
+        )
+        self.load_timeout = load_timeout
+        # Concurrent requests of generate_responses()
+        self.max_parallel = max_parallel
         
     def set_api_token(self, api_token):
         """Set the Hugging Face API token"""
+        if api_token == self.api_token:
+            return
         self.api_token = api_token
         # Initialize the client with the token
-        if api_token:
-            self.client = InferenceClient(api_token)
+        self.client = huggingface_hub.InferenceClient(token=api_token, timeout=self.timeout[1]) if api_token else None
         
     def set_model(self, model):
         """Set the model to use for inference"""
         self.model = model
-        self.api_url = f"https://api-inference.huggingface.co/models/{self.model}"
+        self.api_url = f"{self.api_base}/{self.model}"
         
-    def generate_response(self, prompt):
-        """Generate a response using the Hugging Face Inference API"""
+    def generate_response(self, prompt, history=None):
+        """Generate a response using the Hugging Face Inference API, with prior chat messages as context"""
+        prompt = self.build_prompt(prompt, history)
+        cache_key = self.cache_key(prompt)
+        if cache_key is None:
+            return self._generate_response(prompt)[0]
+
+        response_text = self.cache.get(cache_key)
+        if response_text is None:
+            response_text, ok = self._generate_response(prompt)
+            if ok:
+                self.cache.put(cache_key, response_text)
+        return response_text
+
+    def generate_response_stream(self, prompt, history=None):
+        """
+        Generate a response, yielding text deltas as the model produces them.
+        Errors are yielded as text, like generate_response returns them. A
+        cached answer is yielded as a single delta.
+        """
+        prompt = self.build_prompt(prompt, history)
+        cache_key = self.cache_key(prompt)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        deltas = []
+        complete = False
+        try:
+            if self.client and self.api_token:
+                tokens = self._client_tokens(prompt)
+            else:
+                tokens = self._stream_tokens(prompt)
+
+            leading = True
+            for delta in tokens:
+                if delta is STREAM_DONE:
+                    complete = True
+                    break
+                # Match generate_response, which strips the reply
+                if leading:
+                    delta = delta.lstrip()
+                    if not delta:
+                        continue
+                    leading = False
+                deltas.append(delta)
+                yield delta
+        except HuggingFaceError as e:
+            yield str(e)
+            return
+        except requests.exceptions.ReadTimeout:
+            yield f"Error with Hugging Face API: no response within {self.timeout[1]:g} seconds"
+            return
+        except Exception as e:
+            yield f"Error with Hugging Face API: {str(e)}"
+            return
+
+        # A stream cut off before its final event is a truncated answer: not cached
+        if not complete:
+            yield "Error with Hugging Face API: the response stream ended early"
+            return
+        if cache_key is not None:
+            self.cache.put(cache_key, "".join(deltas).strip())
+
+    def generate_responses(self, prompts, max_parallel=None):
+        """Responses to several independent prompts, requested concurrently; in the order of `prompts`"""
+        prompts = list(prompts)
+        if not prompts:
+            return []
+
+        workers = min(max_parallel or self.max_parallel, len(prompts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="huggingface") as executor:
+            return list(executor.map(self.generate_response, prompts))
+
+    def warm_up(self):
+        """
+        Load the model on the inference servers with a one-token request, so
+        the first user request does not wait for it; returns (ok, seconds)
+        """
+        start = time.perf_counter()
+        try:
+            if self.client and self.api_token:
+                self.client.text_generation("Hello", model=self.model, max_new_tokens=1)
+                ok = True
+            else:
+                response = self._post({"inputs": "Hello", "parameters": {"max_new_tokens": 1}})
+                ok = response.status_code == 200
+                response.close()
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    def warm_up_in_background(self):
+        """Run warm_up() in a daemon thread; returns the thread"""
+        thread = threading.Thread(target=self.warm_up, name="huggingface-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def build_prompt(self, prompt, history=None):
+        """`prompt`, preceded by a transcript of as much of `history` as the context budget allows"""
+        if not history:
+            return prompt
+
+        lines = [
+            message["content"] if message["role"] == "system" else f"{message['role'].capitalize()}: {message['content']}"
+            for message in self.context.build(prompt, history)
+        ]
+        return "\n".join(lines) + "\nAssistant:"
+
+    def cache_key(self, prompt):
+        """Response cache key of `prompt` with the current model and generation parameters, or None without a cache"""
+        if self.cache is None:
+            return None
+        return response_cache_key(prompt, self.model, **self._parameters())
+
+    def _parameters(self):
+        return {
+            "max_new_tokens": self.max_new_tokens,
+            "temperature": self.temperature,
+            "repetition_penalty": self.repetition_penalty,
+        }
+
+    def _generate_response(self, prompt):
+        # (text, ok); only a generated text is ok, errors and other payloads are returned as text
         # If using client with API token
         if self.client and self.api_token:
             try:
                 # Use the client for inference
-                response = self.client.text_generation(
-                    prompt,
-                    model=self.model,
-                    max_new_tokens=150,
-                    temperature=0.7,
-                    repetition_penalty=1.2
-                )
-                return response
+                response = self.client.text_generation(prompt, model=self.model, **self._parameters())
+                return response, True
             except Exception as e:
-                return f"Error with Hugging Face API: {str(e)}"
+                return f"Error with Hugging Face API: {str(e)}", False
         
         # Fallback to direct API call without token (limited usage)
         try:
-            headers = {}
-            if self.api_token:
-                headers["Authorization"] = f"Bearer {self.api_token}"
-                
             payload = {
                 "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": 150,
-                    "temperature": 0.7,
-                    "repetition_penalty": 1.2,
-                    "return_full_text": False
-                }
+                "parameters": dict(self._parameters(), return_full_text=False)
             }
             
-            response = requests.post(self.api_url, headers=headers, json=payload)
+            response = self._post(payload)
             
             if response.status_code == 200:
                 result = response.json()
                 # Handle different response formats
                 if isinstance(result, list) and len(result) > 0:
                     if "generated_text" in result[0]:
-                        return result[0]["generated_text"]
+                        return result[0]["generated_text"], True
                     else:
-                        return str(result[0])
+                        return str(result[0]), False
                 else:
-                    return str(result)
+                    return str(result), False
             else:
-                return f"Error: API returned status code {response.status_code}. {response.text}"
+                return f"Error: API returned status code {response.status_code}. {response.text}", False
                 
+        except requests.exceptions.ReadTimeout:
+            return f"Error with Hugging Face API: no response within {self.timeout[1]:g} seconds", False
         except Exception as e:
-            return f"Error with Hugging Face API: {str(e)}"
+            return f"Error with Hugging Face API: {str(e)}", False
+
+    def _client_tokens(self, prompt):
+        # InferenceClient stream with details, so its end can be told apart from a cut-off
+        outputs = self.client.text_generation(prompt, model=self.model, stream=True, details=True, **self._parameters())
+        for output in outputs:
+            if output.token.text and not output.token.special:
+                yield output.token.text
+            if output.generated_text is not None or output.details is not None:
+                yield STREAM_DONE
+                return
+
+    def _stream_tokens(self, prompt):
+        # Server-sent events of the tokenless API, one token per event, then STREAM_DONE if it was complete
+        payload = {
+            "inputs": prompt,
+            "parameters": dict(self._parameters(), return_full_text=False),
+            "stream": True
+        }
+        with self._post(payload, stream=True) as response:
+            if response.status_code != 200:
+                raise HuggingFaceError(f"Error: API returned status code {response.status_code}. {response.text}")
+
+            # chunk_size=None hands over each chunk as soon as it arrives
+            for line in response.iter_lines(chunk_size=None):
+                text, finished = parse_token_line(line)
+                if text:
+                    yield text
+                if finished:
+                    yield STREAM_DONE
+                    return
+
+    def _post(self, payload, stream=False):
+        headers = {}
+        if self.api_token:
+            headers["Authorization"] = f"Bearer {self.api_token}"
+
+        deadline = time.monotonic() + self.load_timeout
+        while True:
+            response = request_with_retries(
+                self.session,
+                "POST",
+                self.api_url,
+                retry_policy=self.retry_policy,
+                headers=headers,
+                json=payload,
+                timeout=self.timeout,
+                stream=stream,
+            )
+            wait = loading_wait_seconds(response)
+            if wait is None or time.monotonic() + wait > deadline:
+                return response
+            response.close()
+            time.sleep(wait)
+
+
+class HuggingFaceError(Exception):
+    """An error answer of the API, raised while streaming and yielded as text"""
+
+
+def loading_wait_seconds(response, max_wait=5.0):
+    """Seconds to wait before retrying a 503 "model is loading" response, or None for any other response"""
+    if response.status_code != 503:
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    if not isinstance(body, dict) or "loading" not in str(body.get("error", "")):
+        return None
+    return min(max(float(body.get("estimated_time") or 1.0), 0.1), max_wait)
+
+
+# Yielded by the token streams after their final event
+STREAM_DONE = object()
+
+def parse_token_line(line):
+    """
+    (text or None, finished) of one text-generation server-sent events line
+    (bytes); the final event carries the generated text or finish details.
+    Raises HuggingFaceError for an error event or one without a token.
+    """
+    if not line.startswith(b"data:"):
+        return None, False
+
+    event = json.loads(line[5:])
+    if not isinstance(event, dict) or "error" in event or "token" not in event:
+        error = event.get("error") if isinstance(event, dict) else None
+        raise HuggingFaceError(f"Error with Hugging Face API: {error or str(event)[:200]}")
+
+    finished = event.get("generated_text") is not None or bool((event.get("details") or {}).get("finish_reason"))
+    token = event["token"] or {}
+    if token.get("special"):
+        return None, finished
+    return token.get("text"), finished
 
 # List of free models that work well for chat
 AVAILABLE_MODELS = [
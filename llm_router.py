@@ -0,0 +1,354 @@
+from collections import deque
+import copy
+import queue
+import threading
+import time
+
+import groq_api
+import huggingface_api
+
+# Events sent by attempt threads to LLMRouter.generate_response_stream
+_DELTA = "delta"
+_END = "end"
+
+
+def is_error_response(text):
+    """The API clients return errors as text starting with "Error" instead of raising"""
+    return text.lstrip().startswith("Error")
+
+
+class Backend:
+    """
+    One provider/model pair the router can send requests to, with rolling
+    statistics over its last `window` requests: time to the first token of
+    successful requests, and outcomes. After `failure_threshold` consecutive
+    failures the backend is unhealthy for `cooldown` seconds; the next request
+    after that decides whether it recovers.
+    """
+
+    def __init__(self, provider, client, model, window=50, failure_threshold=3, cooldown=30.0):
+        self.provider = provider
+        self.client = client
+        self.model = model
+        self.name = f"{provider}:{model}"
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.wins = 0
+        self.cancelled = 0
+
+    def stream(self, prompt, history=None):
+        """Text deltas of a response from this backend"""
+        # A shallow copy per request: concurrent requests to different models
+        # share the client's settings, session and cache without racing on set_model
+        client = copy.copy(self.client)
+        client.set_model(self.model)
+
+        generate_stream = getattr(client, "generate_response_stream", None)
+        if generate_stream is not None:
+            return generate_stream(prompt, history=history)
+        return iter([client.generate_response(prompt, history=history)])
+
+    def healthy(self, now=None):
+        return (now if now is not None else time.monotonic()) >= self.unhealthy_until
+
+    def latency_estimate(self):
+        """Median time to first token, or None before the first sample"""
+        return self.percentile(0.5)
+
+    def untried(self):
+        """Never sent a request that finished, so nothing is known about it"""
+        return not self.latencies and not self.outcomes
+
+    def percentile(self, q):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        return latencies[int(round(q * (len(latencies) - 1)))]
+
+    def error_rate(self):
+        with self._lock:
+            outcomes = list(self.outcomes)
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+    def record_success(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
+            self.outcomes.append(True)
+            self.consecutive_failures = 0
+            self.unhealthy_until = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            self.outcomes.append(False)
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.unhealthy_until = time.monotonic() + self.cooldown
+
+    def record_cancelled(self, elapsed):
+        # Lost a hedge before its first token: `elapsed` is a lower bound of
+        # its latency, kept so a backend that keeps losing does not look fast
+        with self._lock:
+            self.latencies.append(elapsed)
+            self.cancelled += 1
+
+    def stats(self):
+        p50 = self.percentile(0.5)
+        p90 = self.percentile(0.9)
+        return {
+            "backend": self.name,
+            "healthy": self.healthy(),
+            "requests": self.requests,
+            "wins": self.wins,
+            "cancelled": self.cancelled,
+            "p50_ms": round(1000 * p50, 1) if p50 is not None else None,
+            "p90_ms": round(1000 * p90, 1) if p90 is not None else None,
+            "error_rate": round(self.error_rate(), 3),
+        }
+
+
+class _Attempt(object):
+    """A request to one backend, streamed from a worker thread into the router's event queue"""
+
+    def __init__(self, backend, prompt, history, events):
+        self.backend = backend
+        self.events = events
+        self.cancelled = threading.Event()
+        self.started = time.perf_counter()
+        self.first_delta = None
+        self._thread = threading.Thread(
+            target=self._run, args=(prompt, history), name=f"llm-{backend.name}", daemon=True
+        )
+        backend.requests += 1
+        self._thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _run(self, prompt, history):
+        deltas = None
+        try:
+            deltas = self.backend.stream(prompt, history)
+            for delta in deltas:
+                if self.cancelled.is_set():
+                    break
+                if self.first_delta is None:
+                    self.first_delta = delta
+                    if is_error_response(delta):
+                        self.backend.record_failure()
+                    else:
+                        self.backend.record_success(time.perf_counter() - self.started)
+                self.events.put((self, _DELTA, delta))
+        except Exception as e:
+            if self.first_delta is None:
+                self.first_delta = f"Error with {self.backend.name}: {str(e)}"
+                self.backend.record_failure()
+                self.events.put((self, _DELTA, self.first_delta))
+        finally:
+            # Closing the generator closes its HTTP response
+            close = getattr(deltas, "close", None)
+            if close is not None:
+                close()
+            if self.first_delta is None:
+                if self.cancelled.is_set():
+                    self.backend.record_cancelled(time.perf_counter() - self.started)
+                else:
+                    self.backend.record_failure()
+            self.events.put((self, _END, None))
+
+
+class LLMRouter:
+    """
+    Sends each request to the fastest healthy backend, by median time to
+    the first token over its recent requests, and falls back to the next one
+    when it fails. Backends without a latency sample rank after all others,
+    in the order of `backends` (see prefer()), so traffic never moves to one
+    on a guess.
+
+    Unmeasured backends are explored instead: with hedging, every
+    `explore_every`-th request goes first to the untried backend with the
+    fewest requests, and is hedged with the best measured one after that
+    one's own hedge delay, so exploring costs no more than a normal hedge.
+
+    With `hedge`, a second request goes to the next backend if the first has
+    not produced a token within its p90 latency (`hedge_delay` until it has
+    `min_samples` successes). Whichever answers first wins and the other is
+    cancelled: it stops at its next chunk, which closes its connection. A
+    client without streaming can only be abandoned, not interrupted.
+    """
+
+    def __init__(
+        self, backends, hedge=True, hedge_quantile=0.9, hedge_delay=2.0, min_hedge_delay=0.05, min_samples=5,
+        explore_every=20,
+    ):
+        self.backends = list(backends)
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_samples = min_samples
+        self.explore_every = explore_every
+
+        self.requests = 0
+        self.explored = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.last_backend = None
+
+    def backend(self, name):
+        for backend in self.backends:
+            if backend.name == name:
+                return backend
+        raise KeyError(name)
+
+    def prefer(self, name):
+        """Move a backend to the front, so it wins ties and is tried first while latencies are unknown"""
+        backend = self.backend(name)
+        self.backends.remove(backend)
+        self.backends.insert(0, backend)
+
+    def ranked(self):
+        """Backends in the order they would be tried: healthy ones first, fastest first, unmeasured last"""
+        now = time.monotonic()
+        order = {backend: index for index, backend in enumerate(self.backends)}
+
+        def key(backend):
+            latency = backend.latency_estimate()
+            return (not backend.healthy(now), latency is None, latency or 0.0, order[backend])
+
+        return sorted(self.backends, key=key)
+
+    def exploration(self, candidates):
+        """The untried backend to send this request to first, if it is an exploring one"""
+        if not self.hedge or not self.explore_every or self.requests % self.explore_every:
+            return None
+        now = time.monotonic()
+        untried = [backend for backend in candidates if backend.untried() and backend.healthy(now)]
+        if not untried or untried[0] is candidates[0]:
+            return None
+        return min(untried, key=lambda backend: backend.requests)
+
+    def hedge_delay_for(self, backend):
+        if len(backend.latencies) < self.min_samples:
+            return self.hedge_delay
+        return max(backend.percentile(self.hedge_quantile), self.min_hedge_delay)
+
+    def generate_response(self, prompt, history=None):
+        """Generate a response from the best backend"""
+        return "".join(self.generate_response_stream(prompt, history)).strip()
+
+    def generate_response_stream(self, prompt, history=None):
+        """Text deltas of a response from the best backend, hedged and with fallback"""
+        candidates = self.ranked()
+        self.requests += 1
+        explored = self.exploration(candidates)
+        # Hedged after the delay the best measured backend would get
+        hedge_delay = self.hedge_delay_for(candidates[0]) if candidates else None
+        if explored is not None:
+            self.explored += 1
+            candidates.remove(explored)
+            candidates.insert(0, explored)
+        events = queue.Queue()
+        attempts = []
+        running = set()
+        winner = None
+        last_error = "Error: no LLM backend available"
+
+        def launch():
+            attempt = _Attempt(candidates[len(attempts)], prompt, history, events)
+            attempts.append(attempt)
+            running.add(attempt)
+            return attempt
+
+        try:
+            if not candidates:
+                yield last_error
+                return
+
+            hedge_at = None
+            hedge = None
+            launch()
+            if self.hedge and len(candidates) > 1:
+                hedge_at = time.perf_counter() + hedge_delay
+
+            # Wait for the first good token from any attempt
+            while winner is None:
+                if not running:
+                    if len(attempts) == len(candidates):
+                        yield last_error
+                        return
+                    # Everything in flight failed: fall back to the next backend
+                    self.failovers += 1
+                    launch()
+
+                timeout = max(hedge_at - time.perf_counter(), 0.0) if hedge_at is not None else None
+                try:
+                    attempt, kind, delta = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedge_at = None
+                    if len(attempts) < len(candidates):
+                        self.hedged += 1
+                        hedge = launch()
+                    continue
+
+                # Until there is a winner, a delta from a running attempt is its first
+                if kind == _END or attempt not in running:
+                    running.discard(attempt)
+                elif is_error_response(delta):
+                    last_error = delta
+                    attempt.cancel()
+                    running.discard(attempt)
+                else:
+                    winner = attempt
+                    yield delta
+
+            winner.backend.wins += 1
+            self.last_backend = winner.backend
+            if winner is hedge:
+                self.hedge_wins += 1
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.cancel()
+
+            # Then stream the rest of the winner's response
+            while True:
+                attempt, kind, delta = events.get()
+                if attempt is not winner:
+                    continue
+                if kind == _END:
+                    return
+                yield delta
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    def stats(self):
+        return {
+            "explored": self.explored,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "backends": [backend.stats() for backend in self.ranked()],
+        }
+
+
+def build_backends(groq_client=None, huggingface_client=None, **backend_options):
+    """Backends for every model in AVAILABLE_MODELS of groq_api.py and huggingface_api.py, for the given clients"""
+    backends = []
+    if groq_client is not None:
+        backends += [Backend("groq", groq_client, model["id"], **backend_options) for model in groq_api.AVAILABLE_MODELS]
+    if huggingface_client is not None:
+        backends += [
+            Backend("huggingface", huggingface_client, model["id"], **backend_options)
+            for model in huggingface_api.AVAILABLE_MODELS
+        ]
+    return backends
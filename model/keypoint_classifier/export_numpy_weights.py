@@ -0,0 +1,108 @@
+"""
+Export the keypoint classifier weights to a compact .npz for the NumPy backend.
+
+The BatchNormalization layer in front of the MLP is folded into the first
+Dense layer, so the exported file only contains one (kernel, bias) pair per
+Dense layer. Only needs numpy and h5py, not TensorFlow:
+
+    python model/keypoint_classifier/export_numpy_weights.py
+"""
+import argparse
+import io
+import json
+import zipfile
+
+import h5py
+import numpy as np
+
+
+def load_keras_layers(keras_path):
+    """Return [(class_name, config, [weights...]), ...] from a Keras v3 .keras archive"""
+    with zipfile.ZipFile(keras_path) as archive:
+        config = json.loads(archive.read("config.json"))
+        weights_file = h5py.File(io.BytesIO(archive.read("model.weights.h5")), "r")
+
+    # Weighted layers are stored in creation order under generic names
+    # (batch_normalization, dense, dense_1, ...), numbered per class
+    counters = {}
+    layers = []
+    with weights_file:
+        for layer in config["config"]["layers"]:
+            class_name = layer["class_name"]
+            if class_name not in ("BatchNormalization", "Dense"):
+                continue
+
+            base_name = "batch_normalization" if class_name == "BatchNormalization" else "dense"
+            count = counters.get(base_name, 0)
+            counters[base_name] = count + 1
+            group_name = base_name if count == 0 else f"{base_name}_{count}"
+
+            # Archives saved on Windows use a backslash as the path separator
+            if f"layers/{group_name}" in weights_file:
+                group = weights_file[f"layers/{group_name}/vars"]
+            else:
+                group = weights_file[f"layers\\{group_name}"]["vars"]
+            weights = [np.array(group[str(index)]) for index in range(len(group))]
+            layers.append((class_name, layer["config"], weights))
+
+    return layers
+
+
+def fold_layers(layers):
+    """Fold BatchNormalization into the following Dense layer"""
+    kernels, biases, activations = [], [], []
+    scale, shift = None, None
+
+    for class_name, config, weights in layers:
+        if class_name == "BatchNormalization":
+            gamma, beta, moving_mean, moving_variance = weights
+            scale = gamma / np.sqrt(moving_variance + config["epsilon"])
+            shift = beta - moving_mean * scale
+            continue
+
+        kernel, bias = weights
+        if scale is not None:
+            bias = shift @ kernel + bias
+            kernel = scale[:, np.newaxis] * kernel
+            scale, shift = None, None
+
+        kernels.append(kernel.astype(np.float32))
+        biases.append(bias.astype(np.float32))
+        activations.append(config["activation"])
+
+    return kernels, biases, activations
+
+
+def export(keras_path, output_path):
+    kernels, biases, activations = fold_layers(load_keras_layers(keras_path))
+
+    arrays = {"activations": np.array(activations)}
+    for index, (kernel, bias) in enumerate(zip(kernels, biases)):
+        arrays[f"kernel_{index}"] = kernel
+        arrays[f"bias_{index}"] = bias
+
+    np.savez_compressed(output_path, **arrays)
+
+    return activations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--keras",
+        default="model/keypoint_classifier/keypoint_classifier.keras",
+        help="source .keras model",
+    )
+    parser.add_argument(
+        "--output",
+        default="model/keypoint_classifier/keypoint_classifier.npz",
+        help="destination .npz file",
+    )
+    args = parser.parse_args()
+
+    activations = export(args.keras, args.output)
+    print(f"Exported {len(activations)} dense layers ({', '.join(activations)}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,16 @@
 import numpy as np
-import tensorflow as tf
 
 
-class KeyPointClassifier(object):
+class TFLiteBackend(object):
     def __init__(
         self,
         model_path="model/keypoint_classifier/keypoint_classifier.tflite",
         num_threads=1,
+        max_batch_size=2,
     ):
+        # Imported here so the NumPy backend never pulls in TensorFlow
+        import tensorflow as tf
+
         self.interpreter = tf.lite.Interpreter(
             model_path=model_path, num_threads=num_threads
         )
@@ -16,20 +19,160 @@ class KeyPointClassifier(object):
         self.input_details = self.interpreter.get_input_details()
         self.output_details = self.interpreter.get_output_details()
 
+        self._input_index = self.input_details[0]["index"]
+        self._output_index = self.output_details[0]["index"]
+        self.num_features = self.input_details[0]["shape"][-1]
+        self._batch_size = self.input_details[0]["shape"][0]
+
+        # Reused for every call so a frame never allocates its own input array
+        self._input_buffer = np.zeros(
+            (max(max_batch_size, 1), self.num_features), dtype=np.float32
+        )
+
+    def predict_proba(self, landmark_batch):
+        batch_size = len(landmark_batch)
+
+        if batch_size > len(self._input_buffer):
+            self._input_buffer = np.zeros(
+                (batch_size, self.num_features), dtype=np.float32
+            )
+
+        # The interpreter is only re-allocated when the number of hands changes
+        if batch_size != self._batch_size:
+            self.interpreter.resize_tensor_input(
+                self._input_index, [batch_size, self.num_features]
+            )
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch_size
+
+        input_tensor = self._input_buffer[:batch_size]
+        input_tensor[:] = landmark_batch
+        self.interpreter.set_tensor(self._input_index, input_tensor)
+        self.interpreter.invoke()
+
+        return self.interpreter.get_tensor(self._output_index)
+
+
+class NumpyBackend(object):
+    """
+    Pure NumPy forward pass of the keypoint MLP.
+
+    Reads the .npz written by export_numpy_weights.py, where BatchNorm is
+    already folded into the first Dense layer.
+    """
+
+    def __init__(
+        self,
+        model_path="model/keypoint_classifier/keypoint_classifier.npz",
+    ):
+        with np.load(model_path) as weights:
+            activations = [str(name) for name in weights["activations"]]
+            self.layers = [
+                (weights[f"kernel_{index}"], weights[f"bias_{index}"], activation)
+                for index, activation in enumerate(activations)
+            ]
+
+        self.num_features = self.layers[0][0].shape[0]
+
+        unsupported = set(activations) - {"mish", "relu", "softmax"}
+        if unsupported:
+            raise ValueError(f"Unsupported activations in {model_path}: {sorted(unsupported)}")
+
+    def predict_proba(self, landmark_batch):
+        x = landmark_batch
+        for kernel, bias, activation in self.layers:
+            x = x @ kernel
+            x += bias
+
+            if activation == "mish":
+                x = _mish(x)
+            elif activation == "relu":
+                np.maximum(x, 0, out=x)
+            elif activation == "softmax":
+                x = _softmax(x)
+
+        return x
+
+
+def _mish(x):
+    # mish(x) = x * tanh(softplus(x)) = x * n / (n + 2) with n = e^x * (e^x + 2)
+    n = np.minimum(x, 20.0)
+    np.exp(n, out=n)
+    tmp = n + 2.0
+    n *= tmp
+    np.add(n, 2.0, out=tmp)
+    n /= tmp
+    n *= x
+    return n
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    e /= e.sum(axis=-1, keepdims=True)
+    return e
+
+
+BACKENDS = {
+    "tflite": TFLiteBackend,
+    "numpy": NumpyBackend,
+}
+
+
+class KeyPointClassifier(object):
+    def __init__(
+        self,
+        model_path=None,
+        num_threads=1,
+        max_batch_size=2,
+        backend="tflite",
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown backend {backend!r}, expected one of {sorted(BACKENDS)}"
+            )
+
+        kwargs = {} if model_path is None else {"model_path": model_path}
+        if backend == "tflite":
+            kwargs.update(num_threads=num_threads, max_batch_size=max_batch_size)
+
+        self.backend_name = backend
+        self.backend = BACKENDS[backend](**kwargs)
+        self._num_features = self.backend.num_features
+
     def __call__(
         self,
         landmark_list,
     ):
-        input_details_tensor_index = self.input_details[0]["index"]
-        self.interpreter.set_tensor(
-            input_details_tensor_index, np.array([landmark_list], dtype=np.float32)
+        result_index, _ = self.classify_batch([landmark_list])
+
+        return result_index[0, 0]
+
+    def predict_proba(self, landmark_batch):
+        """Return the (N, num_classes) softmax output for N feature vectors"""
+        landmark_batch = np.asarray(landmark_batch, dtype=np.float32).reshape(
+            -1, self._num_features
         )
-        self.interpreter.invoke()
 
-        output_details_tensor_index = self.output_details[0]["index"]
+        return self.backend.predict_proba(landmark_batch)
+
+    def classify_batch(self, landmark_batch, top_k=1):
+        """
+        Classify every hand of a frame with a single forward pass.
+
+        Returns (indices, probabilities), both of shape (N, top_k) and
+        ordered from the most to the least likely class.
+        """
+        if len(landmark_batch) == 0:
+            return (
+                np.empty((0, top_k), dtype=np.int64),
+                np.empty((0, top_k), dtype=np.float32),
+            )
 
-        result = self.interpreter.get_tensor(output_details_tensor_index)
+        probabilities = self.predict_proba(landmark_batch)
 
-        result_index = np.argmax(np.squeeze(result))
+        if top_k == 1:
+            result_index = np.argmax(probabilities, axis=1)[:, np.newaxis]
+        else:
+            result_index = np.argsort(-probabilities, axis=1, kind="stable")[:, :top_k]
 
-        return result_index
+        return result_index, np.take_along_axis(probabilities, result_index, axis=1)
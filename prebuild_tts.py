@@ -0,0 +1,53 @@
+"""
+Pre-synthesize the fixed voice feedback of Visually Impaired Mode.
+
+Every phrase in text_to_speech.SYSTEM_PHRASES is synthesized in every
+language of VOICE_LANGUAGES, by the first available engine for the language
+(TTS_ENGINES / TTS_LANGUAGE_ENGINES, as in the app), and written to the
+on-disk TTS cache, so
+command feedback plays without a synthesis round trip. Phrases already in
+the cache are skipped. Run it as part of the deployment, with the same
+directory as the app's TTS_CACHE_DIR:
+
+    python prebuild_tts.py --cache-dir tts_cache
+"""
+import argparse
+import os
+import sys
+import time
+
+from text_to_speech import prebuild_system_phrases
+from tts_engines import TTSEngineChain, build_engines, parse_engine_list, parse_language_engines
+from utils.tts_cache import TTSCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-synthesize the fixed voice feedback phrases")
+    parser.add_argument("--cache-dir", default=os.environ.get("TTS_CACHE_DIR", "tts_cache"), help="TTS cache directory")
+    parser.add_argument("--languages", nargs="+", help="TTS language codes (default: every voice mode language)")
+    parser.add_argument(
+        "--max-disk-mb", type=float, default=float(os.environ.get("TTS_CACHE_DISK_MB", 64)), help="TTS cache size limit"
+    )
+    parser.add_argument(
+        "--engines", default=os.environ.get("TTS_ENGINES", "gtts,espeak"), help="TTS engines in order of preference"
+    )
+    args = parser.parse_args()
+
+    cache = TTSCache(cache_dir=args.cache_dir, max_disk_bytes=int(args.max_disk_mb * 1024 * 1024))
+    languages = parse_language_engines(os.environ.get("TTS_LANGUAGE_ENGINES", ""))
+    engine_names = parse_engine_list(args.engines)
+    for names in languages.values():
+        engine_names += [name for name in names if name not in engine_names]
+    engines = TTSEngineChain(build_engines(engine_names), languages=languages)
+    start = time.perf_counter()
+    synthesized, cached, failed = prebuild_system_phrases(cache, languages=args.languages, engine_for=engines.primary)
+    stats = cache.stats()
+    print(
+        f"{synthesized} synthesized, {cached} already cached, {failed} failed in {time.perf_counter() - start:.1f} s; "
+        f"{stats['disk_entries']} clips, {stats['disk_bytes'] / 1024:.0f} kB in {args.cache_dir}"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+from tts_engines import GTTSEngine
+from utils.tts_cache import tts_cache_key
+
+# Recognition languages offered in Visually Impaired Mode
+VOICE_LANGUAGES = {
+    "English (US)": "en-US",
+    "English (UK)": "en-GB",
+    "French": "fr-FR",
+    "Spanish": "es-ES",
+    "German": "de-DE",
+}
+
+# Fixed voice feedback of Visually Impaired Mode, pre-synthesized by prebuild_tts.py
+SYSTEM_PHRASES = {
+    "welcome": (
+        "Welcome to the voice assistant. Voice mode is now active and listening. You can speak commands or "
+        "questions at any time. Say help to hear available commands."
+    ),
+    "listening_active": "Continuous listening is now active. You can speak at any time.",
+    "continuous_enabled": "Continuous listening enabled. You can speak at any time.",
+    "continuous_disabled": "Continuous listening disabled.",
+    "chat_cleared": "Chat history cleared",
+    "help": (
+        "Available commands are: clear chat, stop listening, start listening, help, switch to standard mode, "
+        "switch to voice mode, and switch to non-verbal mode."
+    ),
+    "paused_by_voice": "Listening paused. Say start listening to resume.",
+    "resumed": "Listening resumed. You can speak now.",
+    "to_standard_mode": "Switching to standard text mode",
+    "already_voice_mode": "Already in voice mode",
+    "to_non_verbal_mode": "Switching to sign language mode",
+    "space_pressed": "Space key pressed. Listening now. Speak your message.",
+    "paused_by_button": "Listening paused. Click Start Listening to resume.",
+    "started": "Listening started. You can speak now.",
+}
+
+
+def tts_language(voice_language):
+    """gTTS language code for a recognition language like "fr-FR\""""
+    return voice_language[:2]
+
+
+def prebuild_system_phrases(cache, languages=None, phrases=None, engine_for=None):
+    """
+    Synthesize every phrase in every language into `cache` with the engine
+    engine_for(lang) returns (default: gTTS), unless it is already there;
+    returns (synthesized, already cached, failed) counts
+    """
+    if languages is None:
+        languages = sorted({tts_language(language) for language in VOICE_LANGUAGES.values()} | {"en"})
+    if phrases is None:
+        phrases = SYSTEM_PHRASES.values()
+    if engine_for is None:
+        engine = GTTSEngine()
+        engine_for = lambda lang: engine  # noqa: E731
+
+    synthesized = cached = failed = 0
+    for lang in languages:
+        engine = engine_for(lang)
+        for text in phrases:
+            if engine is None:
+                failed += 1
+                continue
+            key = tts_cache_key(text, lang, engine.name)
+            if key in cache:
+                cached += 1
+                continue
+            try:
+                cache.put(key, engine.synthesize(text, lang))
+                synthesized += 1
+            except Exception:
+                failed += 1
+    return synthesized, cached, failed
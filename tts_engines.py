@@ -0,0 +1,273 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import importlib.util
+import io
+import shutil
+import subprocess
+import threading
+import time
+
+from utils.lazy_import import lazy_import
+
+gtts = lazy_import("gtts")
+
+
+class TTSError(Exception):
+    """A TTS engine could not synthesize a text"""
+
+
+class GTTSEngine(object):
+    """Google Translate's text-to-speech via gTTS: good voices, but a network round trip per call; MP3"""
+
+    name = "gtts"
+    mimetype = "audio/mpeg"
+
+    def available(self):
+        return importlib.util.find_spec("gtts") is not None
+
+    def synthesize(self, text, lang):
+        buffer = io.BytesIO()
+        gtts.gTTS(text=text, lang=lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class EspeakEngine(object):
+    """
+    Offline text-to-speech with the espeak-ng (or espeak) command line
+    program: runs on the CPU in a few milliseconds per sentence, with no
+    network access, but with a robotic voice; WAV. `voices` maps language
+    codes to espeak voice names where they differ.
+    """
+
+    name = "espeak"
+    mimetype = "audio/wav"
+
+    def __init__(self, executable=None, rate=175, voices=None, timeout=10.0):
+        self.executable = executable or shutil.which("espeak-ng") or shutil.which("espeak")
+        self.rate = rate
+        self.voices = voices or {}
+        self.timeout = timeout
+
+    def available(self):
+        return self.executable is not None
+
+    def synthesize(self, text, lang):
+        if self.executable is None:
+            raise TTSError("espeak-ng is not installed")
+        try:
+            result = subprocess.run(
+                [self.executable, "--stdout", "--stdin", "-v", self.voices.get(lang, lang), "-s", str(self.rate)],
+                input=text.encode("utf-8"),
+                capture_output=True,
+                timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired:
+            raise TTSError(f"espeak timed out after {self.timeout} s")
+        if result.returncode != 0 or not result.stdout:
+            raise TTSError(result.stderr.decode("utf-8", "replace").strip() or f"espeak exited with {result.returncode}")
+        return result.stdout
+
+
+ENGINES = {
+    GTTSEngine.name: GTTSEngine,
+    EspeakEngine.name: EspeakEngine,
+}
+
+
+def build_engines(names):
+    """Engine instances for a list of names (see ENGINES)"""
+    engines = []
+    for name in names:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown TTS engine {name!r}, expected one of {', '.join(ENGINES)}")
+        engines.append(ENGINES[name]())
+    return engines
+
+
+def parse_engine_list(value):
+    """["gtts", "espeak"] from "gtts,espeak\""""
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def parse_language_engines(value):
+    """{"de": ["espeak", "gtts"], "fr": ["gtts"]} from "de=espeak,gtts;fr=gtts\""""
+    languages = {}
+    for entry in value.split(";"):
+        if "=" not in entry:
+            continue
+        lang, names = entry.split("=", 1)
+        languages[lang.strip()] = parse_engine_list(names)
+    return languages
+
+
+class _EngineHealth(object):
+    def __init__(self, window=50):
+        self.latencies = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+
+class TTSEngineChain(object):
+    """
+    Synthesizes with the first of several TTS engines that works.
+
+    Engines are tried in the order given, or in the order listed for the
+    language in `languages` ({lang: [engine names]}); engines that are not
+    installed are left out. When an engine has not answered within
+    `slow_after` seconds, the next one is started alongside it, and the
+    first audio to arrive is used. When it fails, the next one is tried
+    right away. An engine that failed `failure_threshold` times in a row is
+    tried last for `cooldown` seconds. With a TTSCache, every engine looks
+    up and stores its audio there under its own name.
+    """
+
+    def __init__(
+        self,
+        engines,
+        languages=None,
+        cache=None,
+        slow_after=4.0,
+        failure_threshold=2,
+        cooldown=60.0,
+        max_workers=8,
+    ):
+        self.engines = {engine.name: engine for engine in engines}
+        self.order = [engine.name for engine in engines]
+        self.languages = languages or {}
+        self.cache = cache
+        self.slow_after = slow_after
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-engine")
+        self._health = {name: _EngineHealth() for name in self.order}
+        self._lock = threading.Lock()
+
+        self.fallbacks = 0
+        self.slow = 0
+
+    def engines_for(self, lang, mimetype=None):
+        """Available engines for `lang` in the order they are tried, optionally only those producing `mimetype`"""
+        names = self.languages.get(lang, self.order)
+        engines = [
+            self.engines[name] for name in names
+            if name in self.engines and self.engines[name].available()
+            and (mimetype is None or self.engines[name].mimetype == mimetype)
+        ]
+        now = time.monotonic()
+        # Stable sort: healthy engines keep their order, ahead of unhealthy ones
+        return sorted(engines, key=lambda engine: self._health[engine.name].unhealthy_until > now)
+
+    def primary(self, lang):
+        """The engine tried first for `lang`, or None if none is available"""
+        engines = self.engines_for(lang)
+        return engines[0] if engines else None
+
+    def synthesize(self, text, lang, mimetype=None):
+        """(audio, engine) for `text` from the first engine that delivers; raises TTSError if none does"""
+        engines = self.engines_for(lang, mimetype)
+        if not engines:
+            raise TTSError(f"No TTS engine available for {lang!r}" + (f" producing {mimetype}" if mimetype else ""))
+
+        pending = {}
+        errors = []
+        remaining = list(engines)
+
+        def start_next():
+            engine = remaining.pop(0)
+            pending[self.executor.submit(self._attempt, engine, text, lang)] = engine
+
+        start_next()
+        while pending:
+            done, _ = wait(pending, timeout=self.slow_after if remaining else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # Too slow: start the next engine alongside; the first audio wins
+                self.slow += 1
+                start_next()
+                continue
+
+            for future in done:
+                engine = pending.pop(future)
+                try:
+                    audio = future.result()
+                except Exception as e:
+                    errors.append(f"{engine.name}: {e}")
+                    if remaining:
+                        start_next()
+                    continue
+                if engine is not engines[0]:
+                    self.fallbacks += 1
+                return audio, engine
+
+        raise TTSError("; ".join(errors))
+
+    def stats(self):
+        rows = []
+        now = time.monotonic()
+        with self._lock:
+            for name in self.order:
+                health = self._health[name]
+                latencies = sorted(health.latencies)
+                rows.append({
+                    "engine": name,
+                    "available": self.engines[name].available(),
+                    "healthy": health.unhealthy_until <= now,
+                    "requests": health.requests,
+                    "failures": health.failures,
+                    "p50_ms": round(1000 * latencies[len(latencies) // 2], 1) if latencies else None,
+                })
+        return {"engines": rows, "fallbacks": self.fallbacks, "slow": self.slow}
+
+    def _attempt(self, engine, text, lang):
+        health = self._health[engine.name]
+        start = time.perf_counter()
+        with self._lock:
+            health.requests += 1
+        try:
+            if self.cache is not None:
+                audio = self.cache.fetch(text, lang, engine.name, engine.synthesize)
+            else:
+                audio = engine.synthesize(text, lang)
+            if not audio:
+                raise TTSError("no audio")
+        except Exception:
+            with self._lock:
+                health.failures += 1
+                health.consecutive_failures += 1
+                if health.consecutive_failures >= self.failure_threshold:
+                    health.unhealthy_until = time.monotonic() + self.cooldown
+            raise
+
+        with self._lock:
+            health.latencies.append(time.perf_counter() - start)
+            health.consecutive_failures = 0
+            health.unhealthy_until = 0.0
+        return audio
+
+
+class ClipSynthesizer(object):
+    """
+    synthesize(text, lang) for the chunks of one clip, which have to share
+    an audio format. The first chunk may come from any engine of `chain`,
+    so a clip falls back to an engine of another format when the preferred
+    one is down or slow. The format of the first chunk to arrive is kept in
+    `mimetype`, and later chunks only come from engines producing it; a
+    chunk synthesized in another format before that was settled is
+    synthesized again.
+    """
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.mimetype = None
+        self._lock = threading.Lock()
+
+    def __call__(self, text, lang):
+        audio, engine = self.chain.synthesize(text, lang, self.mimetype)
+        with self._lock:
+            if self.mimetype is None:
+                self.mimetype = engine.mimetype
+        if engine.mimetype != self.mimetype:
+            audio, engine = self.chain.synthesize(text, lang, self.mimetype)
+        return audio
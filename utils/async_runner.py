@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+class BackgroundLoop(object):
+    """
+    An asyncio event loop running in a daemon thread.
+
+    Lets synchronous code such as the Streamlit script start coroutines
+    without blocking on them: submit() returns a concurrent.futures.Future,
+    and cancelling that future cancels the coroutine on the loop.
+    """
+
+    def __init__(self, name="asyncio"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """Schedule `coroutine` on the loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine, timeout=None):
+        """Run `coroutine` on the loop and wait for its result"""
+        return self.submit(coroutine).result(timeout)
+
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def stop(self, timeout=1.0):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+
+def get_background_loop():
+    """Process-wide BackgroundLoop, started on first use"""
+    global _background_loop
+
+    with _background_loop_lock:
+        if _background_loop is None or not _background_loop.running:
+            _background_loop = BackgroundLoop()
+
+        return _background_loop
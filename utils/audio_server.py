@@ -0,0 +1,375 @@
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import re
+import secrets
+import struct
+import threading
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+EXTENSIONS = {"audio/mpeg": "mp3", "audio/wav": "wav", "audio/ogg": "ogg"}
+
+# Data size of a WAV file whose length is not known yet
+_WAV_STREAMING_SIZE = 0xFFFFFFFF - 36
+
+
+def split_wav(audio):
+    """(fmt chunk, PCM data) of a WAV file; the data size field is ignored, since streamed WAVs leave it unset"""
+    if audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        raise ValueError("not a WAV file")
+    position, fmt = 12, None
+    while position + 8 <= len(audio):
+        chunk_id, size = audio[position:position + 4], struct.unpack("<I", audio[position + 4:position + 8])[0]
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data before its format")
+            return fmt, audio[position + 8:]
+        if chunk_id == b"fmt ":
+            fmt = audio[position + 8:position + 8 + size]
+        position += 8 + size + (size & 1)
+    raise ValueError("WAV file without data")
+
+
+def audio_mimetype(audio):
+    """Mimetype of MP3, WAV or Ogg audio from its first bytes, or None if not recognized"""
+    if audio[:4] == b"RIFF" and audio[8:12] == b"WAVE":
+        return "audio/wav"
+    if audio[:4] == b"OggS":
+        return "audio/ogg"
+    if audio[:3] == b"ID3" or (len(audio) > 1 and audio[0] == 0xFF and audio[1] & 0xE0 == 0xE0):
+        return "audio/mpeg"
+    return None
+
+
+def wav_header(fmt, data_size):
+    return (
+        b"RIFF" + struct.pack("<I", min(20 + len(fmt) + data_size, 0xFFFFFFFF)) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+class AudioStream(object):
+    """
+    Audio that is still being produced, e.g. a long answer synthesized
+    sentence by sentence: chunks are appended in playback order and served
+    to the browser as they arrive, as one continuous clip.
+
+    MP3 chunks play back to back as they are. WAV chunks are joined into
+    one WAV: the first keeps its header, marked as of unknown length until
+    the stream is closed, and later ones contribute their samples only
+    (they must have the same format).
+
+    With `mimetype` None, the format of the first chunk is used. Chunks
+    recognizably of another format are refused with ValueError, since one
+    clip cannot switch formats.
+    """
+
+    def __init__(self, mimetype="audio/mpeg"):
+        self.mimetype = mimetype
+        self.chunks = []
+        self.done = False
+        self._condition = threading.Condition()
+        self._wav_format = None
+        self._wav_data_size = 0
+
+    def append(self, audio):
+        with self._condition:
+            mimetype = audio_mimetype(audio)
+            if self.mimetype is None:
+                self.mimetype = mimetype
+            elif mimetype is not None and mimetype != self.mimetype:
+                raise ValueError(f"cannot join {mimetype} audio to a {self.mimetype} stream")
+            if self.mimetype == "audio/wav":
+                audio = self._wav_part(audio)
+            self.chunks.append(audio)
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            if self._wav_format is not None:
+                # The complete clip gets its real length
+                header = wav_header(self._wav_format, _WAV_STREAMING_SIZE)
+                self.chunks[0] = wav_header(self._wav_format, self._wav_data_size) + self.chunks[0][len(header):]
+            self.done = True
+            self._condition.notify_all()
+
+    def read(self, index, timeout=None):
+        """(chunks from `index` on, done), waiting up to `timeout` seconds for one if there are none yet"""
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.chunks) > index or self.done, timeout)
+            return self.chunks[index:], self.done
+
+    def _wav_part(self, audio):
+        fmt, data = split_wav(audio)
+        self._wav_data_size += len(data)
+        if self._wav_format is None:
+            self._wav_format = fmt
+            return wav_header(fmt, _WAV_STREAMING_SIZE) + data
+        if fmt != self._wav_format:
+            raise ValueError("WAV chunks of different formats")
+        return data
+
+
+class AudioClipStore(object):
+    """
+    In-memory audio clips of one browser session: at most `max_clips` clips
+    and `max_bytes` bytes, the oldest dropped first. Clips are addressed by
+    a hash of their content, so a repeated phrase keeps its URL and the
+    browser can play it from its own cache. AudioStreams count towards
+    `max_clips` only.
+    """
+
+    def __init__(self, max_clips=16, max_bytes=8 * 1024 * 1024):
+        self.max_clips = max_clips
+        self.max_bytes = max_bytes
+
+        self._clips = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, audio, mimetype="audio/mpeg"):
+        """Store `audio`; returns its clip id"""
+        clip_id = hashlib.sha256(audio).hexdigest()[:32]
+        with self._lock:
+            if clip_id in self._clips:
+                self._clips.move_to_end(clip_id)
+                return clip_id
+
+            self._clips[clip_id] = (audio, mimetype)
+            self._bytes += len(audio)
+            self._evict()
+        return clip_id
+
+    def add_stream(self, stream):
+        """Store an AudioStream under a new random id; returns the id"""
+        stream_id = secrets.token_hex(16)
+        with self._lock:
+            self._clips[stream_id] = (stream, stream.mimetype)
+            self._evict()
+        return stream_id
+
+    def get(self, clip_id):
+        """(audio or AudioStream, mimetype) of a stored clip, or None"""
+        with self._lock:
+            return self._clips.get(clip_id)
+
+    def stats(self):
+        return {"clips": len(self._clips), "bytes": self._bytes}
+
+    def _evict(self):
+        while len(self._clips) > 1 and (len(self._clips) > self.max_clips or self._bytes > self.max_bytes):
+            _, (evicted, _) = self._clips.popitem(last=False)
+            if not isinstance(evicted, AudioStream):
+                self._bytes -= len(evicted)
+
+
+class AudioRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /audio/<session>/<clip id>.<extension>, with ETag revalidation and
+    byte ranges (needed by Safari). An AudioStream still being produced is
+    sent with chunked transfer encoding as its chunks arrive.
+    """
+
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        clip = None
+        if len(parts) == 3 and parts[0] == "audio":
+            store = self.server.audio_server.store(parts[1], create=False)
+            if store is not None:
+                clip = store.get(parts[2].split(".", 1)[0])
+        if clip is None:
+            self._send_empty(404)
+            return
+
+        audio, mimetype = clip
+        if isinstance(audio, AudioStream):
+            if not audio.done:
+                self._send_stream(audio)
+                return
+            audio, mimetype = b"".join(audio.chunks), audio.mimetype or "application/octet-stream"
+        etag = '"%s"' % parts[2].split(".", 1)[0]
+        headers = {
+            "Content-Type": mimetype,
+            "Cache-Control": f"private, max-age={self.server.audio_server.max_age}, immutable",
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+        }
+        if self.headers.get("If-None-Match") == etag:
+            self._send_empty(304, headers)
+            return
+
+        status, body = 200, audio
+        requested = _RANGE.match(self.headers.get("Range", ""))
+        if requested is not None and (requested.group(1) or requested.group(2)):
+            if requested.group(1):
+                start = int(requested.group(1))
+                end = min(int(requested.group(2)), len(audio) - 1) if requested.group(2) else len(audio) - 1
+            else:
+                start, end = max(len(audio) - int(requested.group(2)), 0), len(audio) - 1
+            if start > end:
+                self._send_empty(416, {"Content-Range": f"bytes */{len(audio)}"})
+                return
+            status, body = 206, audio[start:end + 1]
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(audio)}"
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.audio_server.lock:
+            self.server.audio_server.served_bytes += len(body)
+
+    def _send_stream(self, stream):
+        # The first chunk settles the format of a stream opened without one
+        chunks, done = stream.read(0, self.server.audio_server.stream_timeout)
+        self.send_response(200)
+        self.send_header("Content-Type", stream.mimetype or "application/octet-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        index = 0
+        while True:
+            if index:
+                chunks, done = stream.read(index, self.server.audio_server.stream_timeout)
+            for chunk in chunks:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.flush()
+            index += len(chunks)
+            with self.server.audio_server.lock:
+                self.server.audio_server.served_bytes += sum(len(chunk) for chunk in chunks)
+            if done or not chunks:
+                break
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    # The browser drops the connection when playback is cut short
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def finish(self):
+        try:
+            super().finish()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class AudioServer(object):
+    """
+    Serves synthesized audio to the browser by URL instead of inlining it
+    into the page as base64.
+
+    Every browser session gets an AudioClipStore under an unguessable
+    session id; publish() stores a clip and returns its URL, which is
+    served as binary with long-lived private caching headers. At most
+    `max_sessions` stores are kept, the least recently used dropped first,
+    so sessions that went away without notice do not accumulate. The
+    server listens on `host`:`port` (0 picks a free port) from a daemon
+    thread; `public_url` is the base URL browsers use to reach it, if it
+    differs from http://localhost:<port> (e.g. behind a reverse proxy).
+    open_stream() publishes audio that is still being synthesized; a
+    request for it ends if no audio arrives for `stream_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        public_url=None,
+        max_sessions=256,
+        max_clips=16,
+        max_bytes=8 * 1024 * 1024,
+        max_age=86400,
+        stream_timeout=30.0,
+    ):
+        self.max_sessions = max_sessions
+        self.max_clips = max_clips
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stream_timeout = stream_timeout
+
+        self._stores = OrderedDict()
+        self.lock = threading.Lock()
+        self.published = 0
+        self.published_bytes = 0
+        self.served_bytes = 0
+
+        self._server = _HTTPServer((host, port), AudioRequestHandler)
+        self._server.audio_server = self
+        self.port = self._server.server_address[1]
+        self.public_url = (public_url or f"http://localhost:{self.port}").rstrip("/")
+        threading.Thread(target=self._server.serve_forever, name="audio-server", daemon=True).start()
+
+    @staticmethod
+    def new_session():
+        """A new unguessable session id"""
+        return secrets.token_urlsafe(16)
+
+    def store(self, session_id, create=True):
+        """AudioClipStore of a session; None if it does not exist and `create` is False"""
+        with self.lock:
+            store = self._stores.get(session_id)
+            if store is None:
+                if not create:
+                    return None
+                store = self._stores[session_id] = AudioClipStore(self.max_clips, self.max_bytes)
+                while len(self._stores) > self.max_sessions:
+                    self._stores.popitem(last=False)
+            self._stores.move_to_end(session_id)
+            return store
+
+    def publish(self, session_id, audio, mimetype="audio/mpeg"):
+        """Store a clip for a session; returns the URL the browser fetches it from"""
+        clip_id = self.store(session_id).add(audio, mimetype)
+        with self.lock:
+            self.published += 1
+            self.published_bytes += len(audio)
+        return f"{self.public_url}/audio/{session_id}/{clip_id}.{EXTENSIONS.get(mimetype, 'bin')}"
+
+    def open_stream(self, session_id, mimetype="audio/mpeg"):
+        """
+        A new AudioStream for a session and the URL the browser fetches it
+        from; with `mimetype` None, the format is that of the first chunk
+        """
+        stream = AudioStream(mimetype)
+        stream_id = self.store(session_id).add_stream(stream)
+        extension = f".{EXTENSIONS.get(mimetype, 'bin')}" if mimetype is not None else ""
+        return stream, f"{self.public_url}/audio/{session_id}/{stream_id}{extension}"
+
+    def stats(self):
+        with self.lock:
+            return {
+                "sessions": len(self._stores),
+                "published": self.published,
+                "published_bytes": self.published_bytes,
+                "served_bytes": self.served_bytes,
+            }
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
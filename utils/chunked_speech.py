@@ -0,0 +1,259 @@
+from concurrent.futures import ThreadPoolExecutor
+import re
+import threading
+import time
+
+from utils.audio_server import AudioStream, audio_mimetype
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+_CLAUSE_END = re.compile(r"[,;:)—]\s")
+_SPEAKABLE = re.compile(r"\w")
+
+
+def _cut(text, limit):
+    """Where to cut `text` to at most `limit` characters: after a clause, else between words"""
+    head = text[:limit + 1]
+    clauses = list(_CLAUSE_END.finditer(head))
+    if clauses and clauses[-1].start() > 0:
+        return clauses[-1].start() + 1
+    space = head.rfind(" ")
+    return space if space > 0 else limit
+
+
+class SentenceChunker(object):
+    """
+    Splits text into sentence-sized chunks for speech synthesis as it
+    arrives. A sentence longer than `max_chars` is cut after a clause (or
+    between words). The first chunk is cut at `first_chars` already, so
+    that its audio is ready sooner. Chunks without anything speakable are
+    dropped.
+    """
+
+    def __init__(self, max_chars=200, first_chars=80):
+        self.max_chars = max_chars
+        self.first_chars = first_chars
+        self.chunks = 0
+        self._buffer = ""
+
+    def feed(self, text):
+        """Add text; returns the chunks completed by it"""
+        self._buffer += text
+        chunks = []
+        while self._buffer:
+            limit = self.first_chars if self.chunks == 0 else self.max_chars
+            match = _SENTENCE_END.search(self._buffer)
+            if match is not None and match.start() <= limit:
+                chunk, self._buffer = self._buffer[:match.start()], self._buffer[match.end():]
+            elif len(self._buffer) > limit:
+                cut = _cut(self._buffer, limit)
+                chunk, self._buffer = self._buffer[:cut], self._buffer[cut:].lstrip()
+            else:
+                break
+            self._emit(chunk, chunks)
+        return chunks
+
+    def flush(self):
+        """The remaining chunks once the text is complete"""
+        chunks = self.feed("")
+        chunk, self._buffer = self._buffer, ""
+        self._emit(chunk, chunks)
+        return chunks
+
+    def _emit(self, chunk, chunks):
+        chunk = chunk.strip()
+        if _SPEAKABLE.search(chunk):
+            chunks.append(chunk)
+            self.chunks += 1
+
+
+def split_into_chunks(text, max_chars=200, first_chars=80):
+    """Sentence-sized chunks of a complete text, see SentenceChunker"""
+    chunker = SentenceChunker(max_chars, first_chars)
+    return chunker.feed(text) + chunker.flush()
+
+
+class SpeechTurn(object):
+    """
+    One answer being spoken. Text is fed as it arrives (or all at once),
+    split by a SentenceChunker, and every chunk is synthesized on the
+    synthesizer's thread pool. The audio is appended to `sink` strictly in
+    order as soon as each chunk and all chunks before it are ready, and the
+    sink is closed after the last one. A chunk that fails to synthesize, or
+    that the sink refuses, is skipped and counted in `failed`.
+
+    time_to_first_audio is the time from the start of the turn to the first
+    audio handed to the sink (None until then). playing_until estimates when
+    (time.monotonic()) the audio handed over so far has finished playing,
+    each chunk taking its length over the synthesizer's `chars_per_second`.
+    """
+
+    def __init__(self, synthesizer, lang, sink, synthesize=None):
+        self.synthesizer = synthesizer
+        self.lang = lang
+        self.sink = sink
+        self.synthesize = synthesize or synthesizer.synthesize
+        self.started = time.perf_counter()
+        self.first_audio = None
+        self.completed = None
+        self.playing_until = None
+        self.failed = 0
+
+        self._chunker = SentenceChunker(synthesizer.max_chars, synthesizer.first_chars)
+        self._futures = []
+        self._delivered = 0
+        self._finished = False
+        self._closed = threading.Event()
+        self._lock = threading.RLock()
+
+    @property
+    def chunks(self):
+        return len(self._futures)
+
+    @property
+    def time_to_first_audio(self):
+        return None if self.first_audio is None else self.first_audio - self.started
+
+    @property
+    def done(self):
+        return self._closed.is_set()
+
+    def feed(self, text):
+        for chunk in self._chunker.feed(text):
+            self._submit(chunk)
+
+    def tee(self, deltas):
+        """Pass text deltas through while speaking them; the turn is finished when they are exhausted"""
+        try:
+            for delta in deltas:
+                self.feed(delta)
+                yield delta
+        finally:
+            self.finish()
+
+    def finish(self):
+        """No more text is coming"""
+        for chunk in self._chunker.flush():
+            self._submit(chunk)
+        with self._lock:
+            self._finished = True
+        self._deliver_ready()
+
+    def cancel(self):
+        """Stop speaking: drop the chunks not synthesized yet and close the sink"""
+        with self._lock:
+            self._finished = True
+            pending, self._futures = self._futures[self._delivered:], self._futures[:self._delivered]
+        for future in pending:
+            future.cancel()
+        self._deliver_ready()
+
+    def wait(self, timeout=None):
+        """Wait until the last chunk has been handed to the sink; returns False on timeout"""
+        return self._closed.wait(timeout)
+
+    def _submit(self, chunk):
+        with self._lock:
+            if self._finished:
+                return
+            future = self.synthesizer.executor.submit(self.synthesize, chunk, self.lang)
+            future.chars = len(chunk)
+            self._futures.append(future)
+        future.add_done_callback(lambda _: self._deliver_ready())
+
+    def _deliver_ready(self):
+        with self._lock:
+            while self._delivered < len(self._futures) and self._futures[self._delivered].done():
+                future = self._futures[self._delivered]
+                self._delivered += 1
+                if future.cancelled() or future.exception() is not None:
+                    self.failed += 1
+                    continue
+                audio = future.result()
+                if audio:
+                    try:
+                        self.sink.append(audio)
+                    except ValueError:
+                        # Audio the sink cannot join, e.g. of another format
+                        self.failed += 1
+                        continue
+                    if self.first_audio is None:
+                        self.first_audio = time.perf_counter()
+                    # Played after the audio before it, or at once after a gap
+                    now = time.monotonic()
+                    start = now if self.playing_until is None else max(now, self.playing_until)
+                    self.playing_until = start + future.chars / self.synthesizer.chars_per_second
+
+            if self._finished and not self._closed.is_set() and self._delivered == len(self._futures):
+                self.completed = time.perf_counter()
+                self.sink.close()
+                self._closed.set()
+
+
+class ClipQueue(object):
+    """
+    Sink of a SpeechTurn that keeps each chunk's audio as a clip of its own,
+    for a player that plays clips one after another rather than one
+    continuous stream; the clips may then be of different formats. take()
+    hands over the clips not taken yet, in order, as (audio, mimetype).
+    """
+
+    def __init__(self):
+        self.clips = []
+        self.done = False
+        self._taken = 0
+        self._condition = threading.Condition()
+
+    def append(self, audio):
+        with self._condition:
+            self.clips.append((audio, audio_mimetype(audio) or "audio/mpeg"))
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self.done = True
+            self._condition.notify_all()
+
+    def take(self, timeout=None):
+        """(clips not taken yet, done), waiting up to `timeout` seconds for one if there are none yet"""
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.clips) > self._taken or self.done, timeout)
+            clips, self._taken = self.clips[self._taken:], len(self.clips)
+            return clips, self.done
+
+
+class ChunkedSpeechSynthesizer(object):
+    """
+    Speaks long texts chunk by chunk: `synthesize(text, lang)` returns the
+    audio bytes of one chunk and runs on a pool of at most `max_workers`
+    threads shared by all turns, so the first chunk can play while later
+    ones are still being synthesized. Chunks are sized by `max_chars` and
+    `first_chars` (see SentenceChunker). Audio formats that can be played
+    back to back by concatenation (MP3) are assumed. start_turn() and
+    synthesize_text() can be given their own `synthesize` function, e.g. to
+    pin a turn to engines producing one format. `chars_per_second` is the
+    speaking rate assumed to estimate how long the audio plays.
+    """
+
+    def __init__(self, synthesize, max_workers=4, max_chars=200, first_chars=80, chars_per_second=15.0):
+        self.synthesize = synthesize
+        self.max_chars = max_chars
+        self.first_chars = first_chars
+        self.chars_per_second = chars_per_second
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+
+    def start_turn(self, lang, sink, synthesize=None):
+        """A SpeechTurn appending to `sink` (an AudioStream, a ClipQueue, or any object with append(bytes) and close())"""
+        return SpeechTurn(self, lang, sink, synthesize)
+
+    def synthesize_text(self, text, lang, mimetype="audio/mpeg", synthesize=None):
+        """
+        (audio, mimetype, failed chunks) of a complete text, its chunks
+        synthesized in parallel and joined; with `mimetype` None, the format
+        is that of the first chunk
+        """
+        stream = AudioStream(mimetype)
+        turn = self.start_turn(lang, stream, synthesize)
+        turn.feed(text)
+        turn.finish()
+        turn.wait()
+        return b"".join(stream.chunks), stream.mimetype, turn.failed
@@ -0,0 +1,149 @@
+from collections import OrderedDict
+import re
+import threading
+
+# Tokens a chat message costs on top of its content (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text):
+    """
+    Fast local estimate of the token count of `text`: about 4 characters per
+    token for English with BPE tokenizers, which is close enough for a budget
+    and needs no tokenizer download.
+    """
+    return (len(text) + 3) // 4
+
+
+def is_context_message(message):
+    """Error strings returned by the API clients are shown in the chat but not sent back as context"""
+    content = message.get("content") or ""
+    return bool(content.strip()) and not content.startswith("Error")
+
+
+class ConversationContext(object):
+    """
+    Builds the messages of a chat completion request from the chat history,
+    within a token budget.
+
+    The newest turns are kept verbatim, as many as fit in `token_budget`
+    tokens together with the prompt. If not all of them fit, `summary_tokens`
+    of the budget go to a rolling summary of the older turns instead, one
+    short line per message, newest first (0 drops them). Token counts and
+    summary lines are cached per message content, so a rerun with one more
+    message only measures that message. One context may be shared by the
+    clients of a session, which call build() from their own threads.
+    """
+
+    def __init__(self, token_budget=2000, summary_tokens=200, summary_chars=120, max_cached=4096):
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summary_chars = summary_chars
+        self.max_cached = max_cached
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.last_stats = None
+
+    def count(self, message):
+        """Estimated token cost of one message"""
+        return self._measure(message)[0]
+
+    def build(self, prompt, history=None):
+        """Messages for a request answering `prompt` after the `history` messages (oldest first)"""
+        prompt_message = {"role": "user", "content": prompt}
+        budget = self.token_budget - self.count(prompt_message)
+
+        history = [message for message in (history or ()) if is_context_message(message)]
+        # Reserve room for the summary once the history no longer fits
+        if sum(self.count(message) for message in history) > budget:
+            budget -= self.summary_tokens
+        kept = []
+        index = len(history)
+        while index > 0:
+            tokens = self.count(history[index - 1])
+            if tokens > budget:
+                break
+            budget -= tokens
+            index -= 1
+            kept.append(history[index])
+
+        kept.reverse()
+        # Start the kept turns with a user message
+        while kept and kept[0]["role"] != "user":
+            kept.pop(0)
+            index += 1
+
+        messages = [{"role": message["role"], "content": message["content"]} for message in kept]
+        summary = self.summarize(history[:index], self.summary_tokens)
+        if summary:
+            messages.insert(0, {"role": "system", "content": summary})
+        messages.append(prompt_message)
+
+        self.last_stats = {
+            "history": len(history),
+            "kept": len(kept),
+            "summarized": index,
+            "tokens": sum(self.count(message) for message in messages),
+        }
+        return messages
+
+    def summarize(self, messages, max_tokens):
+        """Rolling summary of `messages`: their summary lines, newest first, within `max_tokens`"""
+        if not messages or max_tokens <= 0:
+            return ""
+
+        header = "Summary of the earlier conversation:"
+        tokens = estimate_tokens(header) + MESSAGE_OVERHEAD_TOKENS
+        lines = []
+        for message in reversed(messages):
+            line = self._measure(message)[1]
+            line_tokens = estimate_tokens(line) + 1
+            if tokens + line_tokens > max_tokens:
+                break
+            tokens += line_tokens
+            lines.append(line)
+
+        if not lines:
+            return ""
+        lines.reverse()
+        return "\n".join([header] + lines)
+
+    def stats(self):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "cached_messages": len(self._cache),
+            "hit_rate": round(self.cache_hits / lookups, 3) if lookups else 0.0,
+            "last_build": self.last_stats,
+        }
+
+    def _measure(self, message):
+        # (token count, summary line) of a message, cached by role and content
+        key = (message["role"], message["content"])
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self.cache_hits += 1
+                self._cache.move_to_end(key)
+                return entry
+            self.cache_misses += 1
+
+        content = message["content"]
+        entry = (estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS, self._summary_line(message["role"], content))
+        with self._lock:
+            self._cache[key] = entry
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return entry
+
+    def _summary_line(self, role, content):
+        # First sentence, shortened to summary_chars
+        text = " ".join(content.split())
+        text = _SENTENCE_END.split(text, 1)[0]
+        if len(text) > self.summary_chars:
+            text = text[: self.summary_chars - 3].rstrip() + "..."
+        return f"- {role.capitalize()}: {text}"
@@ -1,21 +1,47 @@
 from collections import deque
-import cv2 as cv
+
+from utils.lazy_import import lazy_import
+
+cv = lazy_import("cv2")
+
+
+class RollingMean(object):
+    """Mean of the last `buffer_len` values, kept as a running sum so add() and get() are O(1)"""
+
+    def __init__(self, buffer_len=1):
+        self._values = deque(maxlen=buffer_len)
+        self._sum = 0.0
+
+    def add(self, value):
+        if len(self._values) == self._values.maxlen:
+            self._sum -= self._values[0]
+        self._values.append(value)
+        self._sum += value
+
+    def get(self):
+        if not self._values:
+            return 0.0
+
+        return self._sum / len(self._values)
+
+    def __len__(self):
+        return len(self._values)
 
 
 class CvFpsCalc(object):
     def __init__(self, buffer_len=1):
         self._start_tick = cv.getTickCount()
         self._freq = 1000.0 / cv.getTickFrequency()
-        self._difftimes = deque(maxlen=buffer_len)
+        self._difftimes = RollingMean(buffer_len)
 
     def get(self):
         current_tick = cv.getTickCount()
         different_time = (current_tick - self._start_tick) * self._freq
         self._start_tick = current_tick
 
-        self._difftimes.append(different_time)
+        self._difftimes.add(different_time)
 
-        fps = 1000.0 / (sum(self._difftimes) / len(self._difftimes))
+        fps = 1000.0 / max(self._difftimes.get(), 1e-9)
         fps_rounded = round(fps, 2)
 
         return fps_rounded
@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+
+from utils.lazy_import import lazy_import
+
+cv = lazy_import("cv2")
+
+
+class FrameDisplay(object):
+    """
+    Rate-limited JPEG preview for a Streamlit placeholder (st.empty()).
+
+    Frames are JPEG-encoded before they are handed to Streamlit instead of
+    shipping raw RGB arrays, and at most `max_fps` frames per second are sent,
+    independently of how fast the caller produces them. A frame is also
+    skipped when its overlay key matches the last frame sent and the picture
+    itself has not visibly changed, e.g. an empty, static scene.
+    """
+
+    def __init__(self, placeholder, max_fps=12.0, jpeg_quality=75, change_threshold=2.0):
+        self.placeholder = placeholder
+        self.max_fps = max_fps
+        self.jpeg_quality = jpeg_quality
+        self.change_threshold = change_threshold
+
+        self._encode_params = [int(cv.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        self._last_sent_time = None
+        self._last_key = None
+        self._last_thumbnail = None
+        self._start_time = time.perf_counter()
+
+        self.sent = 0
+        self.bytes_sent = 0
+        self.skipped_rate = 0
+        self.skipped_unchanged = 0
+        self.encode_time = 0.0
+
+    def show(self, image, overlay_key=None, channels="BGR"):
+        """Send `image` to the browser unless rate-limited or unchanged; returns True if sent"""
+        now = time.perf_counter()
+        if self._last_sent_time is not None and now - self._last_sent_time < 1.0 / self.max_fps:
+            self.skipped_rate += 1
+            return False
+
+        thumbnail = cv.resize(image, (16, 12), interpolation=cv.INTER_AREA).astype(np.int16)
+        if (
+            overlay_key is not None
+            and overlay_key == self._last_key
+            and self._last_thumbnail is not None
+            and np.abs(thumbnail - self._last_thumbnail).mean() < self.change_threshold
+        ):
+            self.skipped_unchanged += 1
+            return False
+
+        if channels == "RGB":
+            image = cv.cvtColor(image, cv.COLOR_RGB2BGR)
+
+        start = time.perf_counter()
+        ok, encoded = cv.imencode(".jpg", image, self._encode_params)
+        self.encode_time += time.perf_counter() - start
+        if not ok:
+            return False
+
+        self.placeholder.image(encoded.tobytes(), output_format="JPEG")
+
+        self._last_sent_time = now
+        self._last_key = overlay_key
+        self._last_thumbnail = thumbnail
+        self.sent += 1
+        self.bytes_sent += len(encoded)
+
+        return True
+
+    def stats(self):
+        elapsed = max(time.perf_counter() - self._start_time, 1e-9)
+
+        return {
+            "fps": round(self.sent / elapsed, 2),
+            "sent": self.sent,
+            "skipped_rate": self.skipped_rate,
+            "skipped_unchanged": self.skipped_unchanged,
+            "bytes_per_second": round(self.bytes_sent / elapsed),
+            "mean_frame_bytes": round(self.bytes_sent / max(self.sent, 1)),
+            "encode_ms": round(1000.0 * self.encode_time / max(self.sent, 1), 2),
+        }
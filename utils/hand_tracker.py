@@ -0,0 +1,220 @@
+from collections import namedtuple
+import time
+
+import numpy as np
+
+from utils.landmark_features import NUM_LANDMARKS, multi_landmarks_to_array
+from utils.lazy_import import lazy_import
+
+cv = lazy_import("cv2")
+
+
+TrackedHands = namedtuple("TrackedHands", ["landmarks", "handedness", "roi", "scale"])
+
+
+class AdaptiveHandDetector(object):
+    """
+    ROI-tracked, resolution-adaptive wrapper around mediapipe Hands.
+
+    While hands are tracked, only an expanded crop around the previous
+    detection is sent to MediaPipe. The crop stays put while the hands remain
+    well inside it and is re-centered when they approach its border. A
+    full-frame search runs when tracking is lost and every
+    `full_search_interval` frames to pick up hands entering elsewhere in the
+    picture.
+
+    MediaPipe tracks a hand from its landmarks in the previous image, in that
+    image's normalized coordinates, which point elsewhere in an image of
+    another position or size. `hands` is therefore reset whenever the region
+    differs from the previous frame's (crop to full frame and back, crop
+    re-centered or resized), and keeps tracking while it stays the same,
+    including over consecutive full-frame searches.
+
+    The image given to MediaPipe (crop or full frame) is additionally
+    downscaled by `scale`, which adapts so that process() stays within
+    `target_frame_time` seconds. Landmarks are always returned in normalized
+    full-frame coordinates, as a (N, 21, 2) float32 array.
+    """
+
+    def __init__(
+        self,
+        hands,
+        target_frame_time=1.0 / 30,
+        min_scale=0.4,
+        max_scale=1.0,
+        roi_margin=0.5,
+        min_input_size=160,
+        full_search_interval=15,
+    ):
+        self.hands = hands
+        self.target_frame_time = target_frame_time
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.roi_margin = roi_margin
+        self.min_input_size = min_input_size
+        self.full_search_interval = full_search_interval
+
+        self.scale = max_scale
+        self.roi = None
+        self._frames_since_full_search = 0
+        self._mean_process_time = None
+        # (x1, y1, x2, y2) of the previous frame's region
+        self._region = None
+
+        self.full_searches = 0
+        self.roi_frames = 0
+        self.lost = 0
+        self.tracking_resets = 0
+
+    def process(self, image):
+        """Detect hands in an RGB frame; returns TrackedHands"""
+        image_height, image_width = image.shape[0], image.shape[1]
+
+        roi = self.roi
+        if roi is None or self._frames_since_full_search >= self.full_search_interval:
+            roi = None
+            x1, y1, x2, y2 = 0, 0, image_width, image_height
+            self._frames_since_full_search = 0
+            self.full_searches += 1
+        else:
+            x1, y1, x2, y2 = roi
+            self._frames_since_full_search += 1
+            self.roi_frames += 1
+
+        # Landmarks tracked in another region would land in the wrong place
+        if self._region is not None and self._region != (x1, y1, x2, y2) and hasattr(self.hands, "reset"):
+            self.hands.reset()
+            self.tracking_resets += 1
+        self._region = (x1, y1, x2, y2)
+
+        region = image[y1:y2, x1:x2]
+        region_width, region_height = x2 - x1, y2 - y1
+
+        # Never shrink the MediaPipe input below min_input_size pixels
+        scale = max(self.scale, min(1.0, self.min_input_size / min(region_width, region_height)))
+        if scale < 1.0:
+            region = cv.resize(
+                region,
+                (max(1, round(region_width * scale)), max(1, round(region_height * scale))),
+                interpolation=cv.INTER_AREA,
+            )
+        else:
+            region = np.ascontiguousarray(region)
+
+        region.flags.writeable = False
+        start = time.perf_counter()
+        results = self.hands.process(region)
+        self._update_scale(time.perf_counter() - start)
+
+        if results.multi_hand_landmarks is None:
+            if roi is not None:
+                self.lost += 1
+            self.roi = None
+            return TrackedHands(
+                np.empty((0, NUM_LANDMARKS, 2), dtype=np.float32), [], roi, scale
+            )
+
+        # Map crop-normalized coordinates back to the full frame
+        landmarks = multi_landmarks_to_array(results.multi_hand_landmarks)
+        if roi is not None:
+            landmarks *= np.array(
+                (region_width / image_width, region_height / image_height), dtype=np.float32
+            )
+            landmarks += np.array((x1 / image_width, y1 / image_height), dtype=np.float32)
+
+        self.roi = self._next_roi(landmarks, image_width, image_height)
+
+        return TrackedHands(landmarks, list(results.multi_handedness), roi, scale)
+
+    def reset(self):
+        """Forget the tracked region, forcing a full-frame search"""
+        self.roi = None
+
+    def stats(self):
+        return {
+            "scale": round(self.scale, 2),
+            "roi": self.roi,
+            "full_searches": self.full_searches,
+            "roi_frames": self.roi_frames,
+            "lost": self.lost,
+            "tracking_resets": self.tracking_resets,
+            "process_ms": round(1000.0 * (self._mean_process_time or 0.0), 2),
+        }
+
+    def _update_scale(self, process_time):
+        if self._mean_process_time is None:
+            self._mean_process_time = process_time
+        else:
+            self._mean_process_time += 0.2 * (process_time - self._mean_process_time)
+
+        if self._mean_process_time > self.target_frame_time:
+            self.scale = max(self.min_scale, self.scale * 0.9)
+        elif self._mean_process_time < 0.6 * self.target_frame_time:
+            self.scale = min(self.max_scale, self.scale * 1.05)
+
+    def _next_roi(self, landmarks, image_width, image_height):
+        # Bounding box of every detected hand, in pixels
+        size = np.array((image_width, image_height), dtype=np.float32)
+        hand_min = landmarks.reshape(-1, 2).min(axis=0) * size
+        hand_max = landmarks.reshape(-1, 2).max(axis=0) * size
+        hand_size = float((hand_max - hand_min).max())
+
+        # Keep the current crop while the hands stay inside its inner area and
+        # it is not much larger than needed
+        if self.roi is not None:
+            x1, y1, x2, y2 = self.roi
+            inset = 0.1 * min(x2 - x1, y2 - y1)
+            inside = (
+                hand_min[0] >= x1 + inset and hand_min[1] >= y1 + inset
+                and hand_max[0] <= x2 - inset and hand_max[1] <= y2 - inset
+            )
+            if inside and max(x2 - x1, y2 - y1) <= (1.0 + 4.0 * self.roi_margin) * hand_size:
+                return self.roi
+
+        # Square crop around the hands, expanded by roi_margin on each side
+        center = (hand_min + hand_max) / 2.0
+        half = hand_size * (0.5 + self.roi_margin)
+        x1, y1 = np.maximum(center - half, 0).astype(int)
+        x2, y2 = np.minimum(center + half, size).astype(int)
+
+        if x2 - x1 < 2 or y2 - y1 < 2:
+            return None
+
+        # A crop covering most of the frame is no cheaper than a full search
+        if (x2 - x1) * (y2 - y1) >= 0.8 * image_width * image_height:
+            return None
+
+        return (int(x1), int(y1), int(x2), int(y2))
+
+
+class FullFrameHandDetector(object):
+    """Plain full-frame mediapipe Hands, with the same interface as AdaptiveHandDetector"""
+
+    def __init__(self, hands):
+        self.hands = hands
+        self.frames = 0
+
+    def process(self, image):
+        """Detect hands in an RGB frame; returns TrackedHands"""
+        image.flags.writeable = False
+        results = self.hands.process(image)
+        image.flags.writeable = True
+        self.frames += 1
+
+        if results.multi_hand_landmarks is None:
+            return TrackedHands(np.empty((0, NUM_LANDMARKS, 2), dtype=np.float32), [], None, 1.0)
+
+        return TrackedHands(
+            multi_landmarks_to_array(results.multi_hand_landmarks),
+            list(results.multi_handedness),
+            None,
+            1.0,
+        )
+
+    def reset(self):
+        """Drop MediaPipe's tracking state, e.g. before a new video"""
+        if hasattr(self.hands, "reset"):
+            self.hands.reset()
+
+    def stats(self):
+        return {"scale": 1.0, "roi": None, "frames": self.frames}
@@ -0,0 +1,177 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.lazy_import import lazy_import
+
+# Only needed by the asyncio clients
+httpx = lazy_import("httpx")
+
+# Status codes worth retrying: rate limited, or a transient server-side failure
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_async_sessions = {}
+
+
+def get_session(pool_connections=4, pool_maxsize=8):
+    """
+    Process-wide requests.Session shared by all API clients.
+
+    Connections are kept alive and pooled per host, so only the first request
+    to an API pays for the TCP and TLS handshakes. The pool sizes only apply
+    when the session is first created.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+
+        return _session
+
+
+def retry_after_seconds(response, now=None):
+    """Delay requested by a Retry-After header (seconds or HTTP date), or None"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_time = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_time is None:
+        return None
+
+    return max(0.0, retry_time.timestamp() - (time.time() if now is None else now))
+
+
+class RetryPolicy(object):
+    """
+    Jittered exponential backoff for HTTP requests.
+
+    Attempt n (from 0) waits a random time between 0 and
+    min(backoff_max, backoff_base * 2**n) ("full jitter"), so clients that
+    failed together do not retry together. A Retry-After header on the
+    response takes precedence; if it asks for more than `max_retry_after`
+    seconds the request is not retried at all, rather than blocking the
+    caller that long.
+    """
+
+    def __init__(
+        self,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=8.0,
+        max_retry_after=30.0,
+        retry_statuses=RETRY_STATUSES,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def delay(self, attempt, response=None):
+        """Seconds to wait before retrying after `attempt` failed, or None to give up"""
+        if attempt >= self.max_retries:
+            return None
+
+        if response is not None:
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_retry_after else None
+
+        return random.uniform(0.0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+NO_RETRIES = RetryPolicy(max_retries=0)
+
+
+def request_with_retries(session, method, url, retry_policy=NO_RETRIES, sleep=time.sleep, **kwargs):
+    """
+    session.request() with retries on connection failures and retryable
+    status codes. Returns the last response, or raises the last connection
+    error. Read timeouts are not retried: the caller has already waited the
+    full timeout once.
+    """
+    attempt = 0
+    while True:
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.ConnectionError:
+            # Includes ConnectTimeout, but not ReadTimeout
+            delay = retry_policy.delay(attempt)
+            if delay is None:
+                raise
+        else:
+            if response.status_code not in retry_policy.retry_statuses:
+                return response
+            delay = retry_policy.delay(attempt, response)
+            if delay is None:
+                return response
+            # Release the connection back to the pool before sleeping
+            response.close()
+
+        sleep(delay)
+        attempt += 1
+
+
+def get_async_session(max_connections=8):
+    """
+    httpx.AsyncClient shared by all asyncio API clients on the running event
+    loop, the counterpart of get_session(). Must be called from a coroutine.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_sessions.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        _async_sessions[loop] = client
+
+    return client
+
+
+async def async_send_with_retries(client, method, url, retry_policy=NO_RETRIES, **kwargs):
+    """
+    Asyncio version of request_with_retries() for an httpx.AsyncClient.
+
+    The response is returned with its body still unread (stream=True), so
+    the caller can consume it incrementally; it must be closed with
+    aclose(). Cancelling the calling task closes the connection.
+    """
+    request = client.build_request(method, url, **kwargs)
+    attempt = 0
+    while True:
+        try:
+            response = await client.send(request, stream=True)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            delay = retry_policy.delay(attempt)
+            if delay is None:
+                raise
+        else:
+            if response.status_code not in retry_policy.retry_statuses:
+                return response
+            delay = retry_policy.delay(attempt, response)
+            if delay is None:
+                return response
+            await response.aclose()
+
+        await asyncio.sleep(delay)
+        attempt += 1
@@ -0,0 +1,73 @@
+from collections import namedtuple
+import itertools
+
+import numpy as np
+
+
+NUM_LANDMARKS = 21
+
+HandFeatures = namedtuple("HandFeatures", ["points", "brect", "features"])
+
+
+def landmarks_to_array(hand_landmarks, out=None):
+    """Copy a MediaPipe landmark list into a (21, 2) float32 array of x, y"""
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 2), dtype=np.float32)
+
+    coords = itertools.chain.from_iterable(
+        (landmark.x, landmark.y) for landmark in hand_landmarks.landmark
+    )
+    out.reshape(-1)[:] = np.fromiter(coords, dtype=np.float32, count=NUM_LANDMARKS * 2)
+
+    return out
+
+
+def multi_landmarks_to_array(multi_hand_landmarks):
+    """Stack every detected hand into a single (N, 21, 2) float32 array"""
+    out = np.empty((len(multi_hand_landmarks), NUM_LANDMARKS, 2), dtype=np.float32)
+    for index, hand_landmarks in enumerate(multi_hand_landmarks):
+        landmarks_to_array(hand_landmarks, out[index])
+
+    return out
+
+
+def calc_hand_features(landmark_array, image_width, image_height):
+    """
+    Compute pixel points, bounding rect and classifier features in one pass.
+
+    `landmark_array` holds normalized MediaPipe coordinates, either a single
+    hand of shape (21, 2) or a batch of shape (N, 21, 2). Returns a
+    HandFeatures tuple:
+
+    - points: int32 pixel coordinates, same shape as the input
+    - brect: int32 [x1, y1, x2, y2], shape (4,) or (N, 4)
+    - features: float32 wrist-relative, max-abs normalized vector,
+      shape (42,) or (N, 42)
+    """
+    landmark_array = np.asarray(landmark_array, dtype=np.float32)
+    limit = np.array((image_width - 1, image_height - 1), dtype=np.int32)
+
+    # Pixel coordinates: the multiplication is done in float64 so truncation
+    # matches int(landmark.x * image_width) on the Python floats exactly
+    points = (landmark_array * (limit + 1.0)).astype(np.int32)
+    np.minimum(points, limit, out=points)
+
+    # Bounding rect, same convention as cv.boundingRect (x2, y2 exclusive)
+    brect = np.empty(points.shape[:-2] + (4,), dtype=np.int32)
+    points.min(axis=-2, out=brect[..., :2])
+    points.max(axis=-2, out=brect[..., 2:])
+    brect[..., 2:] += 1
+
+    # Convert to coordinates relative to the wrist and flatten
+    features = np.subtract(points, points[..., :1, :], dtype=np.float32)
+    features = features.reshape(points.shape[:-2] + (NUM_LANDMARKS * 2,))
+
+    # Normalization
+    max_value = np.abs(features).max(axis=-1, keepdims=True)
+    if points.ndim == 2:
+        if max_value[0] != 0:
+            features /= max_value
+    else:
+        np.divide(features, max_value, out=features, where=max_value != 0)
+
+    return HandFeatures(points, brect, features)
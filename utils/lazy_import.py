@@ -0,0 +1,49 @@
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is only imported on first attribute access.
+
+    Once loaded, the real module's namespace is copied onto the stand-in so
+    later lookups no longer go through __getattr__.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+            self.__dict__["_lazy_module"] = module
+
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """Return `name` if it is already imported, otherwise a LazyModule for it"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    return LazyModule(name)
+
+
+def is_loaded(name):
+    """True once the real module has been imported by anyone"""
+    return name in sys.modules
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+class LetterCommitEngine(object):
+    """
+    Streaming decision engine turning per-frame sign predictions into text.
+
+    The top class and its probability for each frame go into a fixed-size
+    ring buffer of the last `window` frames. A letter is committed as soon as
+    `min_votes` of those frames agree on it with at least `min_confidence`.
+    After a commit the buffer is cleared, and the same letter can only be
+    committed again once it has been absent for `release_frames` consecutive
+    frames (hysteresis), so holding a sign produces one letter while a
+    deliberate release and repeat produces a double letter. A space is
+    emitted after `space_after` seconds without a new letter (None disables
+    it).
+    """
+
+    def __init__(
+        self,
+        labels,
+        window=8,
+        min_votes=5,
+        min_confidence=0.7,
+        release_frames=3,
+        space_after=2.0,
+        ignore_labels=("None",),
+    ):
+        if not 0 < min_votes <= window:
+            raise ValueError("min_votes must be between 1 and window")
+
+        self.labels = list(labels)
+        self.window = window
+        self.min_votes = min_votes
+        self.min_confidence = min_confidence
+        self.release_frames = release_frames
+        self.space_after = space_after
+        self._label_index = {label: index for index, label in enumerate(self.labels)}
+        self._ignored = {self._label_index[label] for label in ignore_labels if label in self._label_index}
+
+        self._classes = np.full(window, -1, dtype=np.int32)
+        self._confidences = np.zeros(window, dtype=np.float32)
+        self._position = 0
+        self.reset()
+
+    def reset(self):
+        """Forget buffered frames, e.g. after the detected text was submitted"""
+        self._classes.fill(-1)
+        self._confidences.fill(0.0)
+        self._last_committed = -1
+        self._absent_frames = 0
+        self._last_commit_time = None
+        self._space_pending = False
+
+        self.frames = 0
+        self.committed = 0
+
+    def update(self, label, confidence, timestamp):
+        """
+        Feed the most confident prediction of one frame (label None when no
+        hand was seen) and return the text to append: "", a letter or " ".
+        """
+        self.frames += 1
+        class_id = self._label_index.get(label, -1) if label is not None else -1
+
+        self._classes[self._position] = class_id
+        self._confidences[self._position] = confidence if class_id >= 0 else 0.0
+        self._position = (self._position + 1) % self.window
+
+        # Hysteresis: track how long the last committed letter has been absent
+        if class_id == self._last_committed and confidence >= self.min_confidence:
+            self._absent_frames = 0
+        else:
+            self._absent_frames += 1
+            if self._absent_frames >= self.release_frames and self._last_committed >= 0:
+                # Released: votes from the held sign must not count towards a repeat
+                self._classes[self._classes == self._last_committed] = -1
+                self._last_committed = -1
+
+        candidate = self._vote()
+        if candidate >= 0 and candidate != self._last_committed:
+            self._classes.fill(-1)
+            self._last_committed = candidate
+            self._absent_frames = 0
+            self._last_commit_time = timestamp
+            self._space_pending = True
+            self.committed += 1
+            return self.labels[candidate]
+
+        if (
+            self.space_after is not None
+            and self._space_pending
+            and timestamp - self._last_commit_time >= self.space_after
+        ):
+            self._space_pending = False
+            return " "
+
+        return ""
+
+    def _vote(self):
+        confident = self._classes[self._confidences >= self.min_confidence]
+        confident = confident[confident >= 0]
+        if len(confident) < self.min_votes:
+            return -1
+
+        counts = np.bincount(confident, minlength=len(self.labels))
+        best = int(counts.argmax())
+        if counts[best] < self.min_votes or best in self._ignored:
+            return -1
+
+        return best
+
+
+def most_confident(hand_signs):
+    """(label, probability) with the highest probability, or (None, 0.0) for no hands"""
+    if not hand_signs:
+        return None, 0.0
+
+    return max(hand_signs, key=lambda hand_sign: hand_sign[1])
@@ -0,0 +1,98 @@
+import numpy as np
+
+from utils.lazy_import import lazy_import
+
+cv = lazy_import("cv2")
+
+
+# MediaPipe hand skeleton as (start, end) landmark index pairs
+HAND_EDGES = np.array(
+    [
+        # Thumb
+        (2, 3), (3, 4),
+        # Index finger
+        (5, 6), (6, 7), (7, 8),
+        # Middle finger
+        (9, 10), (10, 11), (11, 12),
+        # Ring finger
+        (13, 14), (14, 15), (15, 16),
+        # Little finger
+        (17, 18), (18, 19), (19, 20),
+        # Palm
+        (0, 1), (1, 2), (2, 5), (5, 9), (9, 13), (13, 17), (17, 0),
+    ],
+    dtype=np.intp,
+)
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+
+class HandOverlayRenderer(object):
+    """
+    Draws hand skeletons, bounding boxes and labels directly onto a frame,
+    pixel for pixel as the per-line drawing it replaced, except where two
+    bones of a hand cross (outlines go under lines for the whole hand).
+
+    The bones of each hand go out in two cv.polylines calls (outline and
+    fill), gathered from the static HAND_EDGES table into a reused buffer.
+    Key points stay cv.circle discs: thick zero-length polylines are no
+    faster and draw a wider disc. Nothing is drawn when `enabled` is False.
+    """
+
+    def __init__(self, enabled=True, draw_brect=True, draw_info=True):
+        self.enabled = enabled
+        self.draw_brect = draw_brect
+        self.draw_info = draw_info
+
+        # Reused for the segment array handed to cv.polylines
+        self._bones = np.empty((len(HAND_EDGES), 2, 2), dtype=np.int32)
+
+    def draw(self, image, hand_points, brects, info_texts):
+        """
+        Draw N hands onto `image` in place and return it.
+
+        `hand_points` is a (N, 21, 2) int array of pixel coordinates, `brects`
+        a (N, 4) array of [x1, y1, x2, y2] and `info_texts` N strings.
+        """
+        if not self.enabled or len(hand_points) == 0:
+            return image
+
+        for points, brect, info_text in zip(hand_points, np.asarray(brects).tolist(), info_texts):
+            if self.draw_brect:
+                cv.rectangle(image, (brect[0], brect[1]), (brect[2], brect[3]), BLACK, 1)
+
+            # Bones: black outline under a white line; mode="clip" keeps
+            # np.take from buffering the result before copying it to out
+            np.take(points, HAND_EDGES, axis=0, out=self._bones, mode="clip")
+            cv.polylines(image, self._bones, False, BLACK, 6)
+            cv.polylines(image, self._bones, False, WHITE, 2)
+
+            # Key points: white discs of radius 5 with a black rim
+            for x, y in points.tolist():
+                cv.circle(image, (x, y), 5, WHITE, -1)
+                cv.circle(image, (x, y), 5, BLACK, 1)
+
+            if self.draw_info:
+                cv.rectangle(image, (brect[0], brect[1]), (brect[2], brect[1] - 22), BLACK, -1)
+                cv.putText(
+                    image,
+                    info_text,
+                    (brect[0] + 5, brect[1] - 4),
+                    cv.FONT_HERSHEY_SIMPLEX,
+                    0.6,
+                    WHITE,
+                    1,
+                    cv.LINE_AA,
+                )
+
+        return image
+
+
+def hand_info_text(handedness, hand_sign_text):
+    """'Left:A' style label drawn above each hand"""
+    info_text = handedness.classification[0].label[0:]
+    if hand_sign_text != "":
+        info_text = info_text + ":" + hand_sign_text
+
+    return info_text
@@ -0,0 +1,214 @@
+import re
+import threading
+import time
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SECONDS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value):
+    """Seconds of a rate-limit reset duration like "7.66s", "2m59.56s" or "120ms", or None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_SECONDS[unit] for number, unit in parts)
+
+
+class RateLimitExceeded(Exception):
+    """A request would have to wait longer than the rate limiter allows"""
+
+
+class TokenBucket(object):
+    """
+    Token bucket holding up to `capacity` tokens, refilled at `rate` tokens
+    per second. Reservations may take the level below zero; the caller then
+    waits until the refill has paid them back, so concurrent callers queue up
+    in reservation order. block_until() stops all reservations until a time,
+    e.g. when the server reports the limit exhausted.
+    """
+
+    def __init__(self, capacity, rate, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.clock = clock
+        self.level = self.capacity
+        self.updated = clock()
+        self.blocked_until = 0.0
+
+    def reserve(self, amount):
+        """Take `amount` tokens; returns the seconds to wait before using them"""
+        now = self._refill()
+        self.level -= min(amount, self.capacity)
+        delay = -self.level / self.rate if self.level < 0 else 0.0
+        return max(delay, self.blocked_until - now)
+
+    def cancel(self, amount):
+        """Give back a reservation that will not be used"""
+        self._refill()
+        self.level = min(self.level + min(amount, self.capacity), self.capacity)
+
+    def sync(self, remaining, reset=None):
+        """Lower the level to what the server reports as remaining; block until `reset` seconds if nothing is left"""
+        now = self._refill()
+        self.level = min(self.level, float(remaining))
+        if remaining <= 0 and reset:
+            self.block_until(now + reset)
+
+    def block_until(self, until):
+        self.blocked_until = max(self.blocked_until, until)
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+
+class RateLimiter(object):
+    """
+    Client-side limit of requests and tokens per minute, per model, shared by
+    every client using the same API key.
+
+    Each model gets a requests bucket and a tokens bucket, allowing bursts
+    of `burst_requests` / `burst_tokens` (default: a full minute's worth).
+    After every response, the buckets are lowered to the remaining requests
+    and tokens the server reports in its x-ratelimit-* headers, and a
+    Retry-After blocks the model, so the client never gets more optimistic
+    than the server. A request that would have to wait longer than
+    `max_wait` seconds is refused instead.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=30,
+        tokens_per_minute=6000,
+        burst_requests=None,
+        burst_tokens=None,
+        max_wait=30.0,
+        clock=time.monotonic,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst_requests = burst_requests if burst_requests is not None else requests_per_minute
+        self.burst_tokens = burst_tokens if burst_tokens is not None else tokens_per_minute
+        self.max_wait = max_wait
+        self.clock = clock
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.delayed = 0
+        self.refused = 0
+        self.waited = 0.0
+
+    def reserve(self, model, tokens):
+        """Reserve one request of `tokens` tokens; returns the seconds to wait first, or None if refused"""
+        with self._lock:
+            requests_bucket, tokens_bucket = self._model_buckets(model)
+            delay = max(requests_bucket.reserve(1), tokens_bucket.reserve(tokens))
+            if delay > self.max_wait:
+                requests_bucket.cancel(1)
+                tokens_bucket.cancel(tokens)
+                self.refused += 1
+                return None
+
+            self.requests += 1
+            if delay > 0:
+                self.delayed += 1
+                self.waited += delay
+            return delay
+
+    def cancel(self, model, tokens):
+        """Give back a reservation of reserve() whose request is not sent"""
+        with self._lock:
+            requests_bucket, tokens_bucket = self._model_buckets(model)
+            requests_bucket.cancel(1)
+            tokens_bucket.cancel(tokens)
+            self.requests -= 1
+
+    def acquire(self, model, tokens, sleep=time.sleep):
+        """reserve() and wait, also for blocks learned from responses meanwhile; returns False if refused"""
+        delay = self.reserve(model, tokens)
+        if delay is None:
+            return False
+        sent = False
+        try:
+            while delay is not None and delay > 0:
+                sleep(delay)
+                delay = self.blocked_for(model)
+            sent = delay is not None
+        finally:
+            if not sent:
+                self.cancel(model, tokens)
+        return sent
+
+    def blocked_for(self, model):
+        """Seconds `model` is still blocked by the server's limits; None if longer than max_wait"""
+        with self._lock:
+            now = self.clock()
+            delay = max(max(bucket.blocked_until for bucket in self._model_buckets(model)) - now, 0.0)
+            if delay > self.max_wait:
+                self.refused += 1
+                return None
+            if delay > 0:
+                self.waited += delay
+            return delay
+
+    def update_from_headers(self, model, headers):
+        """Sync with the x-ratelimit-remaining-* / x-ratelimit-reset-* and Retry-After headers of a response"""
+        with self._lock:
+            requests_bucket, tokens_bucket = self._model_buckets(model)
+            for name, bucket in (("requests", requests_bucket), ("tokens", tokens_bucket)):
+                remaining = headers.get(f"x-ratelimit-remaining-{name}")
+                if remaining is None:
+                    continue
+                try:
+                    remaining = float(remaining)
+                except ValueError:
+                    continue
+                bucket.sync(remaining, parse_duration(headers.get(f"x-ratelimit-reset-{name}")))
+
+            retry_after = parse_duration(headers.get("retry-after"))
+            if retry_after:
+                until = self.clock() + retry_after
+                requests_bucket.block_until(until)
+                tokens_bucket.block_until(until)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "refused": self.refused,
+            "waited_s": round(self.waited, 3),
+        }
+
+    def _model_buckets(self, model):
+        buckets = self._buckets.get(model)
+        if buckets is None:
+            buckets = self._buckets[model] = (
+                TokenBucket(self.burst_requests, self.requests_per_minute / 60.0, self.clock),
+                TokenBucket(self.burst_tokens, self.tokens_per_minute / 60.0, self.clock),
+            )
+        return buckets
+
+
+def get_rate_limiter(name, **options):
+    """Process-wide RateLimiter for `name` (e.g. a provider and API key); `options` apply when it is first created"""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(name)
+        if limiter is None:
+            limiter = _rate_limiters[name] = RateLimiter(**options)
+
+        return limiter
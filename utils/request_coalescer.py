@@ -0,0 +1,184 @@
+import threading
+
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+
+class _Flight(object):
+    """One upstream call and everything it has produced so far"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.deltas = []
+        self.done = False
+        self.result = None
+        self.error = None
+        self.subscribers = 0
+        self.abandoned = False
+
+
+class Subscription(object):
+    """
+    Iterator over the deltas of a coalesced stream, from the first one on,
+    whenever it joined. `result` is the return value of the upstream
+    generator once the iterator is exhausted.
+    """
+
+    def __init__(self, coalescer, key, flight):
+        self._coalescer = coalescer
+        self._key = key
+        self._flight = flight
+        self._index = 0
+        self._closed = False
+        self.result = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        flight = self._flight
+        with flight.condition:
+            while self._index >= len(flight.deltas) and not flight.done:
+                flight.condition.wait()
+            if self._index < len(flight.deltas):
+                delta = flight.deltas[self._index]
+                self._index += 1
+                return delta
+
+        self.close()
+        if flight.error is not None:
+            raise flight.error
+        self.result = flight.result
+        raise StopIteration(flight.result)
+
+    def close(self):
+        """Stop reading; the upstream call is abandoned once nobody reads it anymore"""
+        if self._closed:
+            return
+        self._closed = True
+        self._coalescer._unsubscribe(self._key, self._flight)
+
+    def __del__(self):
+        self.close()
+
+
+class RequestCoalescer(object):
+    """
+    Collapses identical concurrent requests into one upstream call.
+
+    call() runs `function` for the first caller with a given key; callers
+    arriving while it runs wait for and share its result (or exception).
+    stream() does the same for generators: the upstream generator runs in a
+    background thread, and every subscriber sees all of its deltas, so a late
+    joiner catches up immediately and then streams along. Once the call has
+    finished the key is free again; repeated requests after that are a
+    matter for the response cache.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.coalesced = 0
+
+    def call(self, key, function):
+        """Result of function(), shared with concurrent calls with the same key"""
+        with self._lock:
+            self.calls += 1
+            flight = self._calls.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._calls[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            with flight.condition:
+                while not flight.done:
+                    flight.condition.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = function()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            with flight.condition:
+                flight.done = True
+                flight.condition.notify_all()
+        return flight.result
+
+    def stream(self, key, function):
+        """Subscription to the deltas of the generator function(), shared with concurrent streams with the same key"""
+        with self._lock:
+            self.calls += 1
+            flight = self._streams.get(key)
+            if flight is None:
+                flight = self._streams[key] = _Flight()
+                threading.Thread(
+                    target=self._pump, args=(key, flight, function), name="coalesced-stream", daemon=True
+                ).start()
+            else:
+                self.coalesced += 1
+            flight.subscribers += 1
+
+        return Subscription(self, key, flight)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._streams),
+        }
+
+    def _pump(self, key, flight, function):
+        deltas = function()
+        try:
+            while not flight.abandoned:
+                try:
+                    delta = next(deltas)
+                except StopIteration as stop:
+                    flight.result = stop.value
+                    break
+                with flight.condition:
+                    flight.deltas.append(delta)
+                    flight.condition.notify_all()
+        except Exception as e:
+            flight.error = e
+        finally:
+            # Closing the generator closes its HTTP response
+            deltas.close()
+            with self._lock:
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+            with flight.condition:
+                flight.done = True
+                flight.condition.notify_all()
+
+    def _unsubscribe(self, key, flight):
+        with self._lock:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is reading: stop at the next delta, and let a new
+                # request with this key start afresh
+                flight.abandoned = True
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+
+
+def get_request_coalescer():
+    """Process-wide RequestCoalescer shared by all API clients"""
+    global _coalescer
+
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = RequestCoalescer()
+
+        return _coalescer
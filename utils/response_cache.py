@@ -0,0 +1,153 @@
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def normalize_prompt(prompt):
+    """Case- and whitespace-insensitive form of a prompt, so trivially different phrasings share an entry"""
+    return " ".join(prompt.split()).casefold()
+
+
+def response_cache_key(prompt, model, **params):
+    """Cache key for a completion of `prompt` by `model` with the given sampling parameters"""
+    key_data = json.dumps([normalize_prompt(prompt), model, sorted(params.items())], separators=(",", ":"))
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(response_text):
+    """Only real answers are cached, never the "Error: ..." strings the API clients return"""
+    return bool(response_text and response_text.strip()) and not response_text.startswith("Error")
+
+
+class ResponseCache(object):
+    """
+    LLM response cache: an in-memory LRU of up to `max_entries` responses,
+    each valid for `ttl` seconds (None for no expiry), and optionally an
+    SQLite file at `sqlite_path` that survives restarts and keeps up to
+    `max_disk_entries` responses. Entries found on disk are promoted to
+    memory. Thread-safe; hit, miss, eviction and expiry counters are
+    available from stats().
+    """
+
+    def __init__(self, max_entries=256, ttl=3600.0, sqlite_path=None, max_disk_entries=10000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sqlite_path = sqlite_path
+        self.max_disk_entries = max_disk_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if sqlite_path is not None:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+            self._db.commit()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+
+    def get(self, key):
+        """Cached response for `key`, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, created = entry
+                if self._expired(created, now):
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+
+            if self._db is not None:
+                row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    response, created = row
+                    if self._expired(created, now):
+                        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                        self._db.commit()
+                        self.expirations += 1
+                    else:
+                        self._store(key, response, created)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return response
+
+            self.misses += 1
+            return None
+
+    def put(self, key, response):
+        """Cache `response` unless it is an error; returns True if stored"""
+        if not is_cacheable(response):
+            self.rejected += 1
+            return False
+
+        now = time.time()
+        with self._lock:
+            self._store(key, response, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)", (key, response, now)
+                )
+                self._prune_disk()
+                self._db.commit()
+
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejected": self.rejected,
+        }
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def _store(self, key, response, created):
+        self._entries[key] = (response, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_disk(self):
+        # Drop expired rows, then the oldest ones beyond max_disk_entries
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        self._db.execute(
+            "DELETE FROM responses WHERE key IN "
+            "(SELECT key FROM responses ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
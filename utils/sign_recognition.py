@@ -0,0 +1,80 @@
+import csv
+
+from utils.landmark_features import calc_hand_features
+from utils.lazy_import import lazy_import
+from utils.overlay import hand_info_text
+from utils.stage_timer import NULL_STAGE_TIMER
+
+cv = lazy_import("cv2")
+
+
+def read_labels(path="model/keypoint_classifier/keypoint_classifier_label.csv"):
+    """Class labels of the keypoint classifier, in output order"""
+    with open(path, encoding="utf-8-sig") as f:
+        return [row[0] for row in csv.reader(f)]
+
+
+def recognize_hand_signs(
+    image,
+    hand_detector,
+    keypoint_classifier,
+    labels,
+    overlay_renderer=None,
+    mirror=True,
+    stage_timer=NULL_STAGE_TIMER,
+):
+    """
+    Run hand detection and sign classification on one BGR frame.
+
+    Shared by the live camera loop and the offline batch CLI. The frame is
+    owned by this call: it is mirrored (like the camera preview the model was
+    trained on) and annotated in place, then returned together with a
+    (label, probability) pair for every detected hand. Does not touch
+    Streamlit, so it is safe to call from worker threads and processes.
+    Each step is timed as a span of `stage_timer`.
+    """
+    with stage_timer.span("color_convert"):
+        # Mirror display
+        if mirror:
+            image = cv.flip(image, 1, dst=image)
+        rgb_image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+
+    # Detection implementation, on a downscaled frame or a crop around the tracked hands
+    with stage_timer.span("hands"):
+        tracked_hands = hand_detector.process(rgb_image)
+
+    hand_signs = []
+    if len(tracked_hands.landmarks) > 0:
+        # Pixel landmarks, bounding boxes and normalized features for all hands at once
+        with stage_timer.span("features"):
+            image_height, image_width = image.shape[0], image.shape[1]
+            hand_points, hand_brects, hand_features = calc_hand_features(
+                tracked_hands.landmarks,
+                image_width,
+                image_height,
+            )
+
+        # Hand sign classification, one interpreter invoke for every hand in view
+        with stage_timer.span("classify"):
+            hand_sign_ids, hand_sign_probs = keypoint_classifier.classify_batch(hand_features)
+            hand_sign_texts = [labels[hand_sign_id] for hand_sign_id in hand_sign_ids[:, 0]]
+
+        # Drawing part
+        if overlay_renderer is not None:
+            with stage_timer.span("draw"):
+                overlay_renderer.draw(
+                    image,
+                    hand_points,
+                    hand_brects,
+                    [
+                        hand_info_text(handedness, hand_sign_text)
+                        for handedness, hand_sign_text in zip(tracked_hands.handedness, hand_sign_texts)
+                    ],
+                )
+
+        hand_signs = [
+            (hand_sign_text, float(probability))
+            for hand_sign_text, probability in zip(hand_sign_texts, hand_sign_probs[:, 0])
+        ]
+
+    return image, hand_signs
@@ -0,0 +1,218 @@
+import json
+import math
+import threading
+import time
+
+from utils.cvfpscalc import CvFpsCalc, RollingMean
+from utils.lazy_import import lazy_import
+
+cv = lazy_import("cv2")
+
+
+class LatencyHistogram(object):
+    """
+    Streaming percentile estimates from log-spaced buckets.
+
+    Memory is constant and add() is O(1), so percentiles can be tracked over
+    a whole session without storing the samples; estimates are within
+    `precision` (relative) of the true value for values between `min_value`
+    and `max_value`.
+    """
+
+    def __init__(self, min_value=0.001, max_value=60000.0, precision=0.02):
+        self.min_value = min_value
+        self._log_min = math.log(min_value)
+        self._buckets_per_log = 1.0 / math.log1p(2.0 * precision)
+        self._counts = [0] * (int((math.log(max_value) - self._log_min) * self._buckets_per_log) + 2)
+        self.total = 0
+
+    def add(self, value):
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(int((math.log(value) - self._log_min) * self._buckets_per_log) + 1, len(self._counts) - 1)
+        self._counts[index] += 1
+        self.total += 1
+
+    def quantile(self, quantile):
+        if self.total == 0:
+            return 0.0
+
+        rank = quantile * (self.total - 1)
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen > rank:
+                break
+        if index == 0:
+            return self.min_value
+
+        # Geometric center of the bucket
+        return math.exp(self._log_min + (index - 0.5) / self._buckets_per_log)
+
+
+class StageStats(object):
+    """Duration statistics of one named stage, in milliseconds"""
+
+    def __init__(self, buffer_len=30, quantiles=(0.5, 0.95, 0.99)):
+        self.count = 0
+        self.max_ms = 0.0
+        # Created on the first add(): CvFpsCalc times its first interval from
+        # its creation, which would read as thousands of fps and skew the
+        # rolling rate for the next `buffer_len` calls
+        self.fps_calc = None
+        self.buffer_len = buffer_len
+        self.quantiles = quantiles
+        self._durations = RollingMean(buffer_len)
+        self._histogram = LatencyHistogram()
+        self._fps = 0.0
+
+    def add(self, elapsed_ms):
+        self.count += 1
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        # The rate is 0 until there is an interval between two calls
+        if self.fps_calc is None:
+            self.fps_calc = CvFpsCalc(buffer_len=self.buffer_len)
+        else:
+            self._fps = self.fps_calc.get()
+        self._durations.add(elapsed_ms)
+        self._histogram.add(elapsed_ms)
+
+    def snapshot(self):
+        values = {
+            "count": self.count,
+            "fps": self._fps,
+            "mean_ms": round(self._durations.get(), 3),
+        }
+        for quantile in self.quantiles:
+            values[f"p{quantile * 100:g}_ms"] = round(min(self._histogram.quantile(quantile), self.max_ms), 3)
+        values["max_ms"] = round(self.max_ms, 3)
+
+        return values
+
+
+class _Span(object):
+    __slots__ = ("_timer", "_name", "_start_tick")
+
+    def __init__(self, timer, name):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._start_tick = cv.getTickCount()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._timer.add(self._name, (cv.getTickCount() - self._start_tick) * self._timer.tick_ms)
+        return False
+
+
+class StageTimer(object):
+    """
+    Per-stage latency instrumentation for the camera loop.
+
+    Code is timed in named spans (`with timer.span("hands"): ...`); each stage
+    keeps its call rate (CvFpsCalc), a rolling mean over the last
+    `buffer_len` calls and streaming percentile estimates over the whole
+    session. Counters record events such as dropped or skipped frames. Spans
+    and counters may be used from several threads.
+    """
+
+    def __init__(self, buffer_len=30, quantiles=(0.5, 0.95, 0.99)):
+        self.buffer_len = buffer_len
+        self.quantiles = quantiles
+        self.tick_ms = 1000.0 / cv.getTickFrequency()
+
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def add(self, name, elapsed_ms):
+        """Record a duration measured elsewhere"""
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = StageStats(self.buffer_len, self.quantiles)
+            stage.add(elapsed_ms)
+
+    def count(self, name, increment=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + increment
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "stages": {name: stage.snapshot() for name, stage in self._stages.items()},
+                "counters": dict(self._counters),
+            }
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class NullStageTimer(object):
+    """StageTimer stand-in that records nothing"""
+
+    _span = _NullSpan()
+
+    def span(self, name):
+        return self._span
+
+    def add(self, name, elapsed_ms):
+        pass
+
+    def count(self, name, increment=1):
+        pass
+
+    def reset(self):
+        pass
+
+    def snapshot(self):
+        return {"stages": {}, "counters": {}}
+
+
+NULL_STAGE_TIMER = NullStageTimer()
+
+
+class MetricsLog(object):
+    """Appends a StageTimer snapshot to a JSONL file at most every `interval` seconds"""
+
+    def __init__(self, path, interval=10.0):
+        self.path = path
+        self.interval = interval
+        self._last_write_time = None
+
+    def maybe_write(self, stage_timer, **extra):
+        """Write a line if `interval` has passed since the last one; returns True if written"""
+        now = time.time()
+        if self._last_write_time is not None and now - self._last_write_time < self.interval:
+            return False
+
+        record = {"time": round(now, 3)}
+        record.update(extra)
+        record.update(stage_timer.snapshot())
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+        self._last_write_time = now
+        return True
+
+
+def stage_rows(snapshot):
+    """StageTimer.snapshot() as table rows, one per stage"""
+    return [dict({"stage": name}, **values) for name, values in snapshot["stages"].items()]
@@ -0,0 +1,195 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+AUDIO_EXTENSION = ".audio"
+
+
+def tts_cache_key(text, lang, engine):
+    """Content address of the audio for `text` spoken in `lang` by `engine`; spacing differences share an entry"""
+    key_data = json.dumps([" ".join(text.split()), lang, engine], separators=(",", ":"))
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+class TTSCache(object):
+    """
+    Synthesized speech cache, keyed by tts_cache_key(text, lang, engine).
+
+    An in-memory LRU holds up to `max_entries` clips and `max_bytes` bytes of
+    audio. If `cache_dir` is set, every clip is also written there as
+    <key>.audio, and the least recently used files are deleted once they add
+    up to more than `max_disk_bytes`. Files written by another process (e.g.
+    prebuild_tts.py) are picked up on lookup. Clips found on disk are
+    promoted to memory. Thread-safe; stats() reports the hit rate and the
+    bytes of audio served from the cache instead of being synthesized.
+    """
+
+    def __init__(self, max_entries=128, max_bytes=16 * 1024 * 1024, cache_dir=None, max_disk_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.bytes_saved = 0
+
+    def get(self, key):
+        """Cached audio for `key`, or None"""
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.bytes_saved += len(audio)
+                return audio
+
+            audio = self._read_disk(key)
+            if audio is not None:
+                self._store(key, audio)
+                self.hits += 1
+                self.disk_hits += 1
+                self.bytes_saved += len(audio)
+                return audio
+
+            self.misses += 1
+            return None
+
+    def put(self, key, audio):
+        """Cache the audio bytes for `key`; empty audio is not stored"""
+        if not audio:
+            return False
+
+        with self._lock:
+            self._store(key, audio)
+            if self.cache_dir is not None:
+                self._write_disk(key, audio)
+        return True
+
+    def fetch(self, text, lang, engine, synthesize):
+        """Audio for `text` from the cache, or from synthesize(text, lang), which is then cached"""
+        key = tts_cache_key(text, lang, engine)
+        audio = self.get(key)
+        if audio is None:
+            audio = synthesize(text, lang)
+            self.put(key, audio)
+        return audio
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or (self.cache_dir is not None and os.path.exists(self._path(key)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            for key in list(self._disk):
+                self._remove_disk(key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+        }
+
+    def _store(self, key, audio):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = audio
+        self._bytes += len(audio)
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + AUDIO_EXTENSION)
+
+    def _load_disk_index(self):
+        # Oldest access first, so eviction continues where the last process left off
+        files = []
+        for name in os.listdir(self.cache_dir):
+            key, extension = os.path.splitext(name)
+            if extension != AUDIO_EXTENSION:
+                continue
+            try:
+                info = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            files.append((info.st_mtime, key, info.st_size))
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _read_disk(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as audio_file:
+                audio = audio_file.read()
+            # The modification time doubles as the last access time for eviction
+            os.utime(path)
+        except OSError:
+            return None
+
+        if key not in self._disk:
+            # Written by another process
+            self._disk[key] = len(audio)
+            self._disk_bytes += len(audio)
+            self._prune_disk()
+        self._disk.move_to_end(key)
+        return audio
+
+    def _write_disk(self, key, audio):
+        # Written under a temporary name and renamed, so readers never see part of a file
+        try:
+            handle, temporary_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(handle, "wb") as audio_file:
+                audio_file.write(audio)
+            os.replace(temporary_path, self._path(key))
+        except OSError:
+            return
+
+        self._disk_bytes += len(audio) - self._disk.pop(key, 0)
+        self._disk[key] = len(audio)
+        self._prune_disk()
+
+    def _prune_disk(self):
+        while len(self._disk) > 1 and self._disk_bytes > self.max_disk_bytes:
+            key = next(iter(self._disk))
+            self._remove_disk(key)
+            self.disk_evictions += 1
+
+    def _remove_disk(self, key):
+        self._disk_bytes -= self._disk.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
@@ -0,0 +1,254 @@
+from collections import deque, namedtuple
+import threading
+import time
+
+from utils.stage_timer import NULL_STAGE_TIMER
+
+
+CapturedFrame = namedtuple("CapturedFrame", ["index", "timestamp", "image"])
+FrameResult = namedtuple("FrameResult", ["index", "timestamp", "value"])
+
+
+class DropOldestQueue(object):
+    """
+    Bounded, thread-safe queue that never blocks the producer.
+
+    When the queue is full the oldest item is discarded to make room, so a
+    slow consumer always sees the most recent items instead of a backlog.
+    """
+
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        """Queue `item`; returns True if an older item had to be dropped for it"""
+        with self._condition:
+            dropped = len(self._items) >= self.maxsize
+            if dropped:
+                self._items.popleft()
+                self.dropped += 1
+
+            self._items.append(item)
+            self.put_count += 1
+            self._condition.notify()
+
+            return dropped
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None on timeout or once closed"""
+        with self._condition:
+            if not self._items and not self._closed:
+                self._condition.wait(timeout)
+
+            if self._items:
+                return self._items.popleft()
+
+            return None
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        return {"depth": len(self._items), "put": self.put_count, "dropped": self.dropped}
+
+
+class CaptureThread(threading.Thread):
+    """
+    Reads frames from `read_frame` (e.g. cv.VideoCapture.read) as fast as the
+    device delivers them, then calls `release` (e.g. cv.VideoCapture.release)
+    itself, so the device is never released during a read
+    """
+
+    def __init__(self, read_frame, output_queue, stage_timer=NULL_STAGE_TIMER, release=None):
+        super().__init__(name="capture", daemon=True)
+        self._read_frame = read_frame
+        self._release = release
+        self._output_queue = output_queue
+        self._stage_timer = stage_timer
+        self._stop_event = threading.Event()
+
+        self.frames = 0
+        self.failed = False
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                with self._stage_timer.span("capture"):
+                    ret, image = self._read_frame()
+                if not ret:
+                    self.failed = True
+                    break
+
+                if self._output_queue.put(CapturedFrame(self.frames, time.perf_counter(), image)):
+                    self._stage_timer.count("dropped_capture")
+                self.frames += 1
+        finally:
+            self._output_queue.close()
+            if self._release is not None:
+                self._release()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class InferenceThread(threading.Thread):
+    """Applies `process_frame` to the newest captured frame and publishes the result"""
+
+    def __init__(self, process_frame, input_queue, output_queue, stage_timer=NULL_STAGE_TIMER):
+        super().__init__(name="inference", daemon=True)
+        self._process_frame = process_frame
+        self._input_queue = input_queue
+        self._output_queue = output_queue
+        self._stage_timer = stage_timer
+        self._stop_event = threading.Event()
+
+        self.frames = 0
+        self.busy_time = 0.0
+        self.error = None
+
+    def run(self):
+        while not self._stop_event.is_set():
+            frame = self._input_queue.get(timeout=0.1)
+            if frame is None:
+                if self._input_queue.closed:
+                    break
+                continue
+
+            start = time.perf_counter()
+            try:
+                value = self._process_frame(frame.image)
+            except Exception as e:
+                self.error = e
+                break
+            self.busy_time += time.perf_counter() - start
+            self.frames += 1
+
+            if self._output_queue.put(FrameResult(frame.index, frame.timestamp, value)):
+                self._stage_timer.count("dropped_inference")
+
+        self._output_queue.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class VideoPipeline(object):
+    """
+    Capture -> inference -> render pipeline with drop-stale-frame semantics.
+
+    Capture and inference each run in their own thread and hand over work
+    through DropOldestQueue instances of size 1 by default, so each stage
+    always works on the newest frame and stale frames are dropped instead of
+    buffered. Rendering happens in the caller's thread via read_result(),
+    which is what Streamlit needs since its elements may only be updated from
+    the script thread.
+
+    With a StageTimer, frame capture is timed as the "capture" span and
+    frames dropped between stages are counted as "dropped_capture" and
+    "dropped_inference".
+
+    `release` is called by the capture thread once it has stopped reading,
+    which may be after stop() has given up waiting for it (a read can block
+    for a long time on a stalled camera).
+    """
+
+    def __init__(
+        self,
+        read_frame,
+        process_frame,
+        frame_queue_size=1,
+        result_queue_size=1,
+        stage_timer=NULL_STAGE_TIMER,
+        release=None,
+    ):
+        self.frame_queue = DropOldestQueue(frame_queue_size)
+        self.result_queue = DropOldestQueue(result_queue_size)
+
+        self._capture = CaptureThread(read_frame, self.frame_queue, stage_timer, release)
+        self._inference = InferenceThread(process_frame, self.frame_queue, self.result_queue, stage_timer)
+
+        self.rendered = 0
+        self.render_latency = 0.0
+        self._start_time = None
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self._capture.start()
+        self._inference.start()
+
+        return self
+
+    def stop(self, timeout=1.0):
+        self._capture.stop()
+        self._inference.stop()
+        self.frame_queue.close()
+        self.result_queue.close()
+
+        for thread in (self._capture, self._inference):
+            if thread.is_alive():
+                thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._inference.is_alive() or len(self.result_queue) > 0
+
+    @property
+    def error(self):
+        """Exception raised by the inference stage, if it stopped because of one"""
+        return self._inference.error
+
+    @property
+    def capture_failed(self):
+        return self._capture.failed
+
+    def read_result(self, timeout=None):
+        """Return the newest inference result, or None if none arrived within `timeout`"""
+        result = self.result_queue.get(timeout)
+        if result is not None:
+            self.rendered += 1
+            self.render_latency = time.perf_counter() - result.timestamp
+
+        return result
+
+    def stats(self):
+        """Per-stage frame counts, queue depths and dropped-frame counters"""
+        elapsed = max(time.perf_counter() - (self._start_time or time.perf_counter()), 1e-9)
+        frame_queue = self.frame_queue.stats()
+        result_queue = self.result_queue.stats()
+        inference_frames = self._inference.frames
+
+        return {
+            "capture": {
+                "frames": self._capture.frames,
+                "fps": round(self._capture.frames / elapsed, 2),
+                "queue_depth": frame_queue["depth"],
+                "dropped": frame_queue["dropped"],
+            },
+            "inference": {
+                "frames": inference_frames,
+                "fps": round(inference_frames / elapsed, 2),
+                "mean_ms": round(1000.0 * self._inference.busy_time / max(inference_frames, 1), 2),
+                "queue_depth": result_queue["depth"],
+                "dropped": result_queue["dropped"],
+            },
+            "render": {
+                "frames": self.rendered,
+                "fps": round(self.rendered / elapsed, 2),
+                "latency_ms": round(1000.0 * self.render_latency, 2),
+            },
+        }
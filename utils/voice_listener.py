@@ -0,0 +1,190 @@
+from collections import deque
+import threading
+import time
+
+from utils.lazy_import import lazy_import
+
+sr = lazy_import("speech_recognition")
+
+
+class Utterance(object):
+    """A phrase captured by a VoiceListener: the audio and when it started and ended (time.monotonic())"""
+
+    def __init__(self, audio, ended, started=None):
+        self.audio = audio
+        self.ended = ended
+        self.started = started if started is not None else ended
+
+
+def audio_seconds(audio):
+    """Length of a speech_recognition AudioData, 0 for anything else"""
+    try:
+        return len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+    except (AttributeError, TypeError, ZeroDivisionError):
+        return 0.0
+
+
+class VoiceListener(object):
+    """
+    Keeps the microphone open in a daemon thread and collects utterances.
+
+    The noise floor is calibrated once, for `calibration_seconds`, when the
+    device is opened; after that the recognizer's dynamic energy threshold
+    follows it during the silences between phrases. Each phrase (at most
+    `phrase_time_limit` seconds) is queued as an Utterance, up to
+    `max_utterances` of them, oldest dropped first, for the script to pick
+    up with get() without ever waiting on the device. The thread closes the
+    device and ends once get() has not been called for `idle_timeout`
+    seconds; the next start() or get() opens it again.
+
+    `recognizer` and `microphone` (a factory returning an audio source)
+    default to speech_recognition's Recognizer and Microphone, and
+    `wait_timeout_error`, raised by recognizer.listen() when no phrase
+    starts in time, to its WaitTimeoutError.
+    """
+
+    def __init__(
+        self,
+        recognizer=None,
+        microphone=None,
+        calibration_seconds=0.5,
+        phrase_time_limit=10.0,
+        max_utterances=8,
+        idle_timeout=60.0,
+        listen_timeout=1.0,
+        wait_timeout_error=None,
+    ):
+        self.recognizer = recognizer if recognizer is not None else sr.Recognizer()
+        self.recognizer.dynamic_energy_threshold = True
+        self.microphone = microphone if microphone is not None else sr.Microphone
+        self.calibration_seconds = calibration_seconds
+        self.phrase_time_limit = phrase_time_limit
+        self.idle_timeout = idle_timeout
+        self.listen_timeout = listen_timeout
+        self.wait_timeout_error = wait_timeout_error if wait_timeout_error is not None else sr.WaitTimeoutError
+
+        self._utterances = deque(maxlen=max_utterances)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopping = threading.Event()
+        # Set by start() while a stopped thread is still finishing a phrase
+        self._restart = False
+        self._last_poll = time.monotonic()
+
+        # Why the device could not be opened or read, if it could not
+        self.error = None
+        self.opened = 0
+        self.captured = 0
+        self.dropped = 0
+        self.ignored = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Open the device in the background unless it is already open; never waits for it"""
+        with self._condition:
+            self._last_poll = time.monotonic()
+            if not self.running:
+                self._spawn()
+            elif self._stopping.is_set():
+                # Still finishing a phrase: one thread per device, so the
+                # stopping thread starts the next one once it has closed it
+                self._restart = True
+
+    def stop(self, timeout=None):
+        """Close the device; the thread ends after the phrase it is listening to, if any"""
+        with self._condition:
+            self._stopping.set()
+            self._restart = False
+            self._condition.notify_all()
+        if timeout is not None and self._thread is not None:
+            self._thread.join(timeout)
+
+    def get(self, timeout=0.0, since=None, quiet_until=None):
+        """
+        The oldest queued Utterance, waiting up to `timeout` seconds for one,
+        or None. Utterances that ended before `since`, or started before
+        `quiet_until` (time.monotonic(), e.g. while the assistant was
+        speaking), are discarded. Starts the listener if it is not running.
+        """
+        self.start()
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                while self._utterances:
+                    utterance = self._utterances.popleft()
+                    if since is not None and utterance.ended < since:
+                        continue
+                    if quiet_until is not None and utterance.started < quiet_until:
+                        self.ignored += 1
+                        continue
+                    return utterance
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.error is not None:
+                    return None
+                self._condition.wait(remaining)
+
+    def clear(self):
+        """Drop the queued utterances"""
+        with self._condition:
+            self._utterances.clear()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "running": self.running,
+                "queued": len(self._utterances),
+                "opened": self.opened,
+                "captured": self.captured,
+                "dropped": self.dropped,
+                "ignored": self.ignored,
+                "energy_threshold": round(self.recognizer.energy_threshold, 1),
+            }
+
+    def _spawn(self):
+        # Called with self._condition held
+        self.error = None
+        self._restart = False
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stopping,), name="voice-listener", daemon=True)
+        self._thread.start()
+
+    def _listening(self, stopping):
+        # Idle timeout and stop() are decided under the lock, so start() sees them
+        with self._condition:
+            if time.monotonic() - self._last_poll >= self.idle_timeout:
+                stopping.set()
+            return not stopping.is_set()
+
+    def _run(self, stopping):
+        try:
+            with self.microphone() as source:
+                self.opened += 1
+                self.recognizer.adjust_for_ambient_noise(source, duration=self.calibration_seconds)
+                while self._listening(stopping):
+                    try:
+                        # A short timeout, so stop() and the idle timeout are noticed between phrases
+                        audio = self.recognizer.listen(
+                            source, timeout=self.listen_timeout, phrase_time_limit=self.phrase_time_limit
+                        )
+                    except self.wait_timeout_error:
+                        continue
+                    ended = time.monotonic()
+                    self._put(Utterance(audio, ended, ended - audio_seconds(audio)))
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._condition:
+                if self._restart:
+                    self._spawn()
+                self._condition.notify_all()
+
+    def _put(self, utterance):
+        with self._condition:
+            if len(self._utterances) == self._utterances.maxlen:
+                self.dropped += 1
+            self._utterances.append(utterance)
+            self.captured += 1
+            self._condition.notify_all()
@@ -1,170 +1,276 @@
 import streamlit as st
-import cv2
-import numpy as np
-from gtts import gTTS
+from streamlit import runtime as streamlit_runtime
 import os
-import speech_recognition as sr
-import copy
-import csv
-import mediapipe as mp
+import functools
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import time
-import itertools
-import requests
-import json
 import base64
+import hashlib
+import json
+import statistics
+import threading
+from async_groq_api import AsyncGroqAPI
 from groq_api import GroqAPI, AVAILABLE_MODELS
-from pathlib import Path
+from huggingface_api import AVAILABLE_MODELS as HUGGINGFACE_MODELS, HuggingFaceAPI
+from llm_router import LLMRouter, build_backends
+from text_to_speech import SYSTEM_PHRASES, VOICE_LANGUAGES, prebuild_system_phrases
+from tts_engines import ClipSynthesizer, TTSEngineChain, TTSError, build_engines, parse_engine_list, parse_language_engines
+from utils.audio_server import AudioServer
+from utils.chunked_speech import ChunkedSpeechSynthesizer, ClipQueue
+from utils.conversation_context import ConversationContext
+from utils.response_cache import ResponseCache
+from utils.tts_cache import TTSCache
+from utils.voice_listener import VoiceListener
+from utils.lazy_import import lazy_import
 
 from model.keypoint_classifier.keypoint_classifier import KeyPointClassifier
+from utils.frame_display import FrameDisplay
+from utils.hand_tracker import AdaptiveHandDetector
+from utils.letter_commit import LetterCommitEngine, most_confident
+from utils.overlay import HandOverlayRenderer
+from utils.sign_recognition import read_labels, recognize_hand_signs
+from utils.stage_timer import MetricsLog, StageTimer, stage_rows
+from utils.video_pipeline import VideoPipeline
+
+# Heavy dependencies are imported on first use: the vision stack when the camera
+# is turned on in Non-Verbal Mode, the speech stack when voice features are used
+cv2 = lazy_import("cv2")
+mp = lazy_import("mediapipe")
+sr = lazy_import("speech_recognition")
+
+# Inference backend for the keypoint classifier: "numpy" runs the exported
+# keypoint_classifier.npz without importing TensorFlow, "tflite" runs the .tflite model
+KEYPOINT_CLASSIFIER_BACKEND = os.environ.get("KEYPOINT_CLASSIFIER_BACKEND", "numpy")
+
+# Per-frame time budget for hand detection; the detector downscales its input
+# (full frame or crop around the tracked hands) to stay within it
+HAND_DETECTION_FRAME_BUDGET = float(os.environ.get("HAND_DETECTION_FRAME_BUDGET", 1.0 / 30))
+
+# Camera preview sent to the browser, independent of the recognition frame rate
+DISPLAY_MAX_FPS = float(os.environ.get("DISPLAY_MAX_FPS", 12))
+DISPLAY_JPEG_QUALITY = int(os.environ.get("DISPLAY_JPEG_QUALITY", 75))
+
+# Per-stage camera loop timings are appended to this JSONL file every
+# METRICS_LOG_INTERVAL seconds while the camera is on (disabled when unset)
+METRICS_LOG_PATH = os.environ.get("METRICS_LOG_PATH")
+METRICS_LOG_INTERVAL = float(os.environ.get("METRICS_LOG_INTERVAL", 10))
+
+# LLM answers are cached in memory (RESPONSE_CACHE_SIZE entries, each valid for
+# RESPONSE_CACHE_TTL seconds) and, if RESPONSE_CACHE_PATH is set, in an SQLite
+# file that survives restarts
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 256))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 3600))
+RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH")
+
+# Synthesized speech is cached in memory (TTS_CACHE_MEMORY_MB) and in
+# TTS_CACHE_DIR (up to TTS_CACHE_DISK_MB); the fixed voice feedback phrases are
+# synthesized into it in the background at startup unless TTS_PREBUILD=0
+# (prebuild_tts.py does the same as a deployment step)
+TTS_CACHE_MEMORY_MB = float(os.environ.get("TTS_CACHE_MEMORY_MB", 16))
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_DISK_MB = float(os.environ.get("TTS_CACHE_DISK_MB", 64))
+TTS_PREBUILD = os.environ.get("TTS_PREBUILD", "1") == "1"
+
+# Text-to-speech engines, tried in this order (gtts: Google Translate, needs the
+# network; espeak: local espeak-ng, if installed), optionally in another order
+# per language, e.g. TTS_LANGUAGE_ENGINES="de=espeak,gtts;fr=gtts". An engine
+# that has not answered after TTS_SLOW_SECONDS gets the next one started alongside
+TTS_ENGINES = parse_engine_list(os.environ.get("TTS_ENGINES", "gtts,espeak"))
+TTS_LANGUAGE_ENGINES = parse_language_engines(os.environ.get("TTS_LANGUAGE_ENGINES", ""))
+TTS_SLOW_SECONDS = float(os.environ.get("TTS_SLOW_SECONDS", 4))
+
+# Texts longer than TTS_CHUNK_CHARS characters, such as voice mode answers, are
+# spoken sentence by sentence: chunks of at most TTS_CHUNK_CHARS (the first one
+# TTS_FIRST_CHUNK_CHARS) are synthesized by TTS_WORKERS threads and played as
+# soon as the first one is ready
+TTS_CHUNK_CHARS = int(os.environ.get("TTS_CHUNK_CHARS", 200))
+TTS_FIRST_CHUNK_CHARS = int(os.environ.get("TTS_FIRST_CHUNK_CHARS", 80))
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", 4))
+
+# Speech is assumed to play at TTS_CHARS_PER_SECOND characters per second; in
+# voice mode, what the microphone hears meanwhile is taken for the assistant's
+# own voice and ignored
+TTS_CHARS_PER_SECOND = float(os.environ.get("TTS_CHARS_PER_SECOND", 15))
+
+# Speech clips are served by URL from Streamlit's own media endpoint, on the
+# app's origin, the session's last MEDIA_CLIPS_KEPT of them at a time. With
+# AUDIO_SERVER_URL set (the base URL under which browsers reach the audio
+# server, e.g. a path proxied to it on the app's own HTTPS origin), they come
+# from an in-memory store on AUDIO_SERVER_PORT (bound to AUDIO_SERVER_HOST)
+# instead, and long answers stream to the browser as one clip while they are
+# synthesized (otherwise their sentences are queued in the browser as separate
+# clips). If the server cannot start, the media endpoint is used
+MEDIA_CLIPS_KEPT = int(os.environ.get("MEDIA_CLIPS_KEPT", 32))
+AUDIO_SERVER_HOST = os.environ.get("AUDIO_SERVER_HOST", "127.0.0.1")
+AUDIO_SERVER_PORT = int(os.environ.get("AUDIO_SERVER_PORT", 8502))
+AUDIO_SERVER_URL = os.environ.get("AUDIO_SERVER_URL")
+
+# Voice mode keeps the microphone open in a background thread per browser
+# session; its noise floor is calibrated for VOICE_CALIBRATION_SECONDS when it is
+# opened and followed from then on. Each rerun picks up finished utterances,
+# waiting up to VOICE_POLL_SECONDS for one; after the space key or "Respond by
+# Voice", an utterance is expected within VOICE_WAIT_SECONDS
+VOICE_CALIBRATION_SECONDS = float(os.environ.get("VOICE_CALIBRATION_SECONDS", 0.5))
+VOICE_POLL_SECONDS = float(os.environ.get("VOICE_POLL_SECONDS", 2))
+VOICE_WAIT_SECONDS = float(os.environ.get("VOICE_WAIT_SECONDS", 15))
+
+# Prior chat turns sent with each message: the newest ones verbatim within
+# CONTEXT_TOKEN_BUDGET tokens (estimated), older ones collapsed into a summary
+# of at most CONTEXT_SUMMARY_TOKENS tokens (0 drops them)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 2000))
+CONTEXT_SUMMARY_TOKENS = int(os.environ.get("CONTEXT_SUMMARY_TOKENS", 200))
+
+# Client-side Groq rate limit per API key and model, shared by the browser
+# sessions on this server using that key; it also follows the rate-limit
+# headers of Groq's responses
+GROQ_REQUESTS_PER_MINUTE = float(os.environ.get("GROQ_REQUESTS_PER_MINUTE", 30))
+GROQ_TOKENS_PER_MINUTE = float(os.environ.get("GROQ_TOKENS_PER_MINUTE", 6000))
+
+# Send standard and non-verbal mode messages to the fastest healthy Groq or
+# Hugging Face model instead of the selected one (also a sidebar toggle), and
+# hedge slow requests with a second backend
+LLM_ROUTING = os.environ.get("LLM_ROUTING", "0") == "1"
+LLM_HEDGING = os.environ.get("LLM_HEDGING", "1") == "1"
+
+# Seconds a voice mode answer may go without anything arriving (before its
+# first token, or between two) before it is abandoned with an error; an answer
+# that keeps streaming is never cut off. A new utterance cancels the previous
+# answer regardless
+VOICE_RESPONSE_DEADLINE = float(os.environ.get("VOICE_RESPONSE_DEADLINE", 20))
 
 # Helper functions for sign language detection
-def calc_bounding_rect(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
+def format_pipeline_stats(stats, detector_stats=None, display_stats=None):
+    """One-line summary of VideoPipeline.stats() for display under the video"""
+    summary = " | ".join(
+        f"{stage}: {values['fps']:.1f} fps"
+        + (f", queue {values['queue_depth']}, dropped {values['dropped']}" if "dropped" in values else "")
+        + (f", latency {values['latency_ms']:.0f} ms" if "latency_ms" in values else "")
+        for stage, values in stats.items()
+    )
+    if detector_stats is not None:
+        summary += (
+            f" | hands: {detector_stats['process_ms']:.1f} ms at scale {detector_stats['scale']:.2f}, "
+            + ("tracking" if detector_stats["roi"] is not None else "full frame")
+        )
+    if display_stats is not None:
+        summary += (
+            f" | display: {display_stats['fps']:.1f} fps, "
+            f"{display_stats['bytes_per_second'] / 1024:.0f} kB/s"
+        )
+    return summary
+
+# One response cache for the whole server, shared by every browser session
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(
+        max_entries=RESPONSE_CACHE_SIZE,
+        ttl=RESPONSE_CACHE_TTL,
+        sqlite_path=RESPONSE_CACHE_PATH,
+    )
 
-    landmark_array = np.empty((0, 2), int)
-
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-
-        landmark_point = [np.array((landmark_x, landmark_y))]
-
-        landmark_array = np.append(landmark_array, landmark_point, axis=0)
-
-    x, y, w, h = cv2.boundingRect(landmark_array)
-
-    return [x, y, x + w, y + h]
-
-def calc_landmark_list(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_point = []
-
-    # Keypoint
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-
-        landmark_point.append([landmark_x, landmark_y])
-
-    return landmark_point
-
-def pre_process_landmark(landmark_list):
-    temp_landmark_list = copy.deepcopy(landmark_list)
-
-    # Convert to relative coordinates
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
-
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
-
-    # Convert to a one-dimensional list
-    temp_landmark_list = list(itertools.chain.from_iterable(temp_landmark_list))
-
-    # Normalization
-    max_value = max(list(map(abs, temp_landmark_list)))
-
-    def normalize_(n):
-        return n / max_value
-
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
-
-    return temp_landmark_list
-
-def draw_landmarks(image, landmark_point):
-    if len(landmark_point) > 0:
-        # Thumb
-        cv2.line(image, tuple(landmark_point[2]), tuple(landmark_point[3]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[2]), tuple(landmark_point[3]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[3]), tuple(landmark_point[4]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[3]), tuple(landmark_point[4]), (255, 255, 255), 2)
-
-        # Index finger
-        cv2.line(image, tuple(landmark_point[5]), tuple(landmark_point[6]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[5]), tuple(landmark_point[6]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[6]), tuple(landmark_point[7]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[6]), tuple(landmark_point[7]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[7]), tuple(landmark_point[8]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[7]), tuple(landmark_point[8]), (255, 255, 255), 2)
-
-        # Middle finger
-        cv2.line(image, tuple(landmark_point[9]), tuple(landmark_point[10]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[9]), tuple(landmark_point[10]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[10]), tuple(landmark_point[11]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[10]), tuple(landmark_point[11]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[11]), tuple(landmark_point[12]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[11]), tuple(landmark_point[12]), (255, 255, 255), 2)
-
-        # Ring finger
-        cv2.line(image, tuple(landmark_point[13]), tuple(landmark_point[14]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[13]), tuple(landmark_point[14]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[14]), tuple(landmark_point[15]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[14]), tuple(landmark_point[15]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[15]), tuple(landmark_point[16]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[15]), tuple(landmark_point[16]), (255, 255, 255), 2)
-
-        # Little finger
-        cv2.line(image, tuple(landmark_point[17]), tuple(landmark_point[18]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[17]), tuple(landmark_point[18]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[18]), tuple(landmark_point[19]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[18]), tuple(landmark_point[19]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[19]), tuple(landmark_point[20]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[19]), tuple(landmark_point[20]), (255, 255, 255), 2)
-
-        # Palm
-        cv2.line(image, tuple(landmark_point[0]), tuple(landmark_point[1]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[0]), tuple(landmark_point[1]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[1]), tuple(landmark_point[2]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[1]), tuple(landmark_point[2]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[2]), tuple(landmark_point[5]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[2]), tuple(landmark_point[5]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[5]), tuple(landmark_point[9]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[5]), tuple(landmark_point[9]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[9]), tuple(landmark_point[13]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[9]), tuple(landmark_point[13]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[13]), tuple(landmark_point[17]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[13]), tuple(landmark_point[17]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[17]), tuple(landmark_point[0]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[17]), tuple(landmark_point[0]), (255, 255, 255), 2)
-
-    # Key Points
-    for index, landmark in enumerate(landmark_point):
-        cv2.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255), -1)
-        cv2.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-
-    return image
-
-def draw_info_text(image, brect, handedness, hand_sign_text):
-    cv2.rectangle(image, (brect[0], brect[1]), (brect[2], brect[1] - 22), (0, 0, 0), -1)
-
-    info_text = handedness.classification[0].label[0:]
-    if hand_sign_text != "":
-        info_text = info_text + ":" + hand_sign_text
-
-    cv2.putText(
-        image,
-        info_text,
-        (brect[0] + 5, brect[1] - 4),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.6,
-        (255, 255, 255),
-        1,
-        cv2.LINE_AA,
+# One TTS cache for the whole server, shared by every browser session
+@st.cache_resource
+def get_tts_cache():
+    return TTSCache(
+        max_bytes=int(TTS_CACHE_MEMORY_MB * 1024 * 1024),
+        cache_dir=TTS_CACHE_DIR,
+        max_disk_bytes=int(TTS_CACHE_DISK_MB * 1024 * 1024),
     )
 
-    return image
+# The TTS engines with their fallback order, going through the TTS cache
+@st.cache_resource
+def get_tts_engines():
+    engine_names = list(TTS_ENGINES)
+    for names in TTS_LANGUAGE_ENGINES.values():
+        engine_names += [name for name in names if name not in engine_names]
+    engines = TTSEngineChain(
+        build_engines(engine_names),
+        languages=TTS_LANGUAGE_ENGINES,
+        cache=get_tts_cache(),
+        slow_after=TTS_SLOW_SECONDS,
+    )
+    if TTS_PREBUILD:
+        threading.Thread(
+            target=prebuild_system_phrases,
+            args=(engines.cache,),
+            kwargs={"engine_for": engines.primary},
+            name="tts-prebuild",
+            daemon=True,
+        ).start()
+    return engines
+
+# Synthesized speech for `text` from the first TTS engine that delivers it,
+# only from engines producing `mimetype` if given; returns (audio, mimetype)
+def synthesize_speech(text, lang, mimetype=None):
+    audio, engine = get_tts_engines().synthesize(text, lang, mimetype)
+    return audio, engine.mimetype
+
+# One pool of synthesis threads for the whole server, shared by every browser session
+@st.cache_resource
+def get_speech_synthesizer():
+    return ChunkedSpeechSynthesizer(
+        lambda text, lang: synthesize_speech(text, lang)[0],
+        max_workers=TTS_WORKERS,
+        max_chars=TTS_CHUNK_CHARS,
+        first_chars=TTS_FIRST_CHUNK_CHARS,
+        chars_per_second=TTS_CHARS_PER_SECOND,
+    )
 
-def draw_bounding_rect(image, brect):
-    # Outer rectangle
-    cv2.rectangle(image, (brect[0], brect[1]), (brect[2], brect[3]), (0, 0, 0), 1)
+# Threads for speech recognition of utterances heard while an answer streams,
+# so a network round trip never holds up the answer
+@st.cache_resource
+def get_recognition_pool():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="speech-recognition")
+
+# One audio server for the whole server, with a clip store per browser
+# session; None unless browsers have been given a way to reach it
+@st.cache_resource
+def get_audio_server():
+    # A default of localhost would only work for a browser on this machine,
+    # and plain http is blocked as mixed content on an HTTPS page
+    if not AUDIO_SERVER_URL:
+        return None
+    try:
+        return AudioServer(host=AUDIO_SERVER_HOST, port=AUDIO_SERVER_PORT, public_url=AUDIO_SERVER_URL)
+    except OSError:
+        return None
+
+# Load the Hugging Face models on the inference servers once, when the app
+# starts, so the first routed request does not wait for a cold model
+@st.cache_resource
+def get_huggingface_warm_up():
+    threads = []
+    for model in HUGGINGFACE_MODELS:
+        client = HuggingFaceAPI()
+        client.set_model(model["id"])
+        threads.append(client.warm_up_in_background())
+    return threads
+
+get_huggingface_warm_up()
+
+# Create the Groq API client once per browser session; it keeps the API key and
+# model across reruns and shares one pooled HTTP session with the other clients
+if "groq_api" not in st.session_state:
+    st.session_state.groq_api = GroqAPI(
+        cache=get_response_cache(),
+        context=ConversationContext(token_budget=CONTEXT_TOKEN_BUDGET, summary_tokens=CONTEXT_SUMMARY_TOKENS),
+        # One rate limiter per API key, shared by the sessions using that key
+        rate_limits={"requests_per_minute": GROQ_REQUESTS_PER_MINUTE, "tokens_per_minute": GROQ_TOKENS_PER_MINUTE},
+    )
+groq_api = st.session_state.groq_api
 
-    return image
+# Router over every Groq and Hugging Face model, keeping per-backend latency
+# and error statistics for the browser session
+if "llm_router" not in st.session_state:
+    st.session_state.huggingface_api = HuggingFaceAPI(cache=get_response_cache(), context=groq_api.context)
+    st.session_state.llm_router = LLMRouter(build_backends(groq_api, st.session_state.huggingface_api))
+llm_router = st.session_state.llm_router
 
-# Create an instance of the Groq API
-groq_api = GroqAPI()
+# Asyncio client with the same settings, for turns that a newer one may supersede
+if "async_groq_api" not in st.session_state:
+    st.session_state.async_groq_api = AsyncGroqAPI(groq_api)
+async_groq_api = st.session_state.async_groq_api
 
 # Sidebar for API settings
 with st.sidebar:
@@ -186,6 +292,55 @@ with st.sidebar:
 
     st.caption(model_descriptions[selected_model_name])
 
+    # Provider routing; the selected model is tried first until latencies are known
+    llm_routing = st.checkbox("Route to the fastest available model", value=LLM_ROUTING)
+    if llm_routing:
+        llm_router.prefer(f"groq:{selected_model_id}")
+        llm_router.hedge = st.checkbox("Hedge slow requests with a second model", value=LLM_HEDGING)
+        huggingface_token = st.text_input("Hugging Face token (optional):", type="password")
+        if huggingface_token:
+            st.session_state.huggingface_api.set_api_token(huggingface_token)
+        if llm_router.last_backend is not None:
+            st.caption(f"Last answered by {llm_router.last_backend.name}")
+    llm = llm_router if llm_routing else groq_api
+
+    # Latency of the last response
+    last_timing = groq_api.last_timing
+    if last_timing is not None:
+        st.caption(
+            f"Last response: first token after {1000 * last_timing.first_token:.0f} ms, "
+            f"complete after {last_timing.total:.1f} s"
+            + (" (cached)" if last_timing.cached else "")
+        )
+    tts_stats = get_tts_cache().stats()
+    if tts_stats["hits"] + tts_stats["misses"]:
+        st.caption(
+            f"Speech cache: {100 * tts_stats['hit_rate']:.0f}% hits, "
+            f"{tts_stats['bytes_saved'] / 1024:.0f} kB not synthesized again"
+        )
+    speech_timings = [
+        turn.time_to_first_audio for turn in st.session_state.get("speech_turns", ())
+        if turn.time_to_first_audio is not None
+    ]
+    if speech_timings:
+        st.caption(
+            f"Spoken answers: first audio after {1000 * speech_timings[-1]:.0f} ms "
+            f"(median {1000 * statistics.median(speech_timings):.0f} ms over {len(speech_timings)})"
+        )
+    # Sentences still failing after the fallback are left out of the answer
+    speech_turns = st.session_state.get("speech_turns")
+    if speech_turns and speech_turns[-1].failed:
+        st.caption(f"⚠️ {speech_turns[-1].failed} sentences of the last spoken answer could not be synthesized")
+    tts_engine_stats = get_tts_engines().stats()
+    if tts_engine_stats["fallbacks"]:
+        st.caption(f"Speech engines: {tts_engine_stats['fallbacks']} fallbacks, {tts_engine_stats['slow']} slow requests")
+    context_stats = groq_api.context.last_stats
+    if context_stats is not None:
+        st.caption(
+            f"Context: {context_stats['kept']} of {context_stats['history']} earlier messages, "
+            f"{context_stats['summarized']} summarized, ~{context_stats['tokens']} tokens"
+        )
+
     # API key input (with default already set)
     st.subheader("API Key")
     st.markdown("""
@@ -225,10 +380,22 @@ if "messages" not in st.session_state:
 audio_container = st.container()
 with audio_container:
     st.session_state.audio_player = st.empty()
+    # Clips of a spoken answer, queued in the browser's playlist
+    st.session_state.speech_player = st.container()
 
-# Counter for unique audio IDs
+# Counter for unique audio IDs, and the session's clip store on the audio server
 if "audio_counter" not in st.session_state:
     st.session_state.audio_counter = 0
+    st.session_state.audio_session = AudioServer.new_session()
+    st.session_state.speech_turn = None
+    # Browser playlist of the current speech turn, without the audio server
+    st.session_state.speech_playlist = 0
+    # Until when (time.monotonic()) the last clip played outside a turn is estimated to play
+    st.session_state.speech_playing_until = 0.0
+    # Recent chunked speech turns, for their time to first audio
+    st.session_state.speech_turns = deque(maxlen=20)
+    # Clips served from Streamlit's media endpoint, kept alive across reruns
+    st.session_state.media_clips = OrderedDict()
 
 # Function to handle keyboard shortcuts
 def handle_keyboard_shortcuts():
@@ -277,34 +444,214 @@ def handle_keyboard_shortcuts():
     """
     st.components.v1.html(js_code, height=0)
 
-# Function to get base64 encoded audio
-def get_base64_audio(file_path):
-    """Convert audio file to base64 encoded string"""
-    with open(file_path, "rb") as audio_file:
-        audio_bytes = audio_file.read()
-    audio_b64 = base64.b64encode(audio_bytes).decode()
-    return audio_b64
+# URL of a clip for the browser: from the audio server if there is one, else
+# from Streamlit's media endpoint (as for st.audio); inline as a data URI only
+# when not run by a Streamlit server
+def audio_source(audio_bytes, mimetype="audio/mpeg"):
+    audio_server = get_audio_server()
+    if audio_server is not None:
+        return audio_server.publish(st.session_state.audio_session, audio_bytes, mimetype)
+    if streamlit_runtime.exists():
+        return media_url(audio_bytes, mimetype)
+    return f"data:{mimetype};base64," + base64.b64encode(audio_bytes).decode()
+
+# Register a clip with Streamlit's media file manager. Its URL is derived from
+# the content, so a repeated phrase is played from the browser's cache
+def media_url(audio_bytes, mimetype):
+    media_clips = st.session_state.media_clips
+    coordinates = "speech." + hashlib.sha1(audio_bytes).hexdigest()[:16]
+    media_clips[coordinates] = (audio_bytes, mimetype)
+    media_clips.move_to_end(coordinates)
+    while len(media_clips) > MEDIA_CLIPS_KEPT:
+        media_clips.popitem(last=False)
+    url = streamlit_runtime.get_instance().media_file_mgr.add(audio_bytes, mimetype, coordinates)
+    # The frontend does this for its own elements; hand-written HTML must do it itself
+    base_path = st.get_option("server.baseUrlPath").strip("/")
+    return f"/{base_path}{url}" if base_path else url
+
+# Streamlit deletes media files not added again during a script run, so the
+# session's recent clips are re-registered on every rerun
+def keep_media_clips():
+    if streamlit_runtime.exists():
+        media_file_mgr = streamlit_runtime.get_instance().media_file_mgr
+        for coordinates, (audio_bytes, mimetype) in st.session_state.media_clips.items():
+            media_file_mgr.add(audio_bytes, mimetype, coordinates)
+
+# Helper function to show a response as it is generated
+def stream_response(deltas, min_interval=0.05):
+    """Stream response deltas into the current container (e.g. a chat bubble); returns the full text"""
+    placeholder = st.empty()
+    response_text = ""
+    last_update = 0.0
+    for delta in deltas:
+        response_text += delta
+        # Redraw at most every min_interval seconds, with a cursor while streaming
+        current_time = time.perf_counter()
+        if current_time - last_update >= min_interval:
+            placeholder.markdown(response_text + "▌")
+            last_update = current_time
+
+    response_text = response_text.strip()
+    placeholder.markdown(response_text)
+    return response_text
+
+# Cancel the synthesis of an answer that is still being spoken, if any, and
+# stop the browser playing its queued sentences
+def stop_speaking():
+    if st.session_state.speech_turn is not None:
+        st.session_state.speech_turn.cancel()
+        st.session_state.speech_turn = None
+        if st.session_state.speech_playlist:
+            st.session_state.speech_playlist = 0
+            queue_speech_clip(0, None)
+
+# Speak text as it arrives: returns a SpeechTurn to feed, whose audio plays
+# from its first synthesized sentence on; None without any TTS engine for `lang`
+def start_speech_turn(lang):
+    if get_tts_engines().primary(lang) is None:
+        return None
+    stop_speaking()
+    audio_server = get_audio_server()
+    if audio_server is not None:
+        # One clip cannot mix audio formats: the first sentence may come from
+        # any engine, and settles the format of the rest
+        stream, audio_src = audio_server.open_stream(st.session_state.audio_session, None)
+        turn = get_speech_synthesizer().start_turn(lang, stream, ClipSynthesizer(get_tts_engines()))
+        render_audio(audio_src, None)
+    else:
+        # Each sentence is a clip of its own, handed to the browser's playlist
+        # by play_ready_speech() as it is ready
+        turn = get_speech_synthesizer().start_turn(lang, ClipQueue())
+        st.session_state.audio_counter += 1
+        st.session_state.speech_playlist = st.session_state.audio_counter
+    st.session_state.speech_turn = turn
+    st.session_state.speech_turns.append(turn)
+    return turn
+
+# Queue the sentences of the current speech turn that are ready in the
+# browser's playlist (only needed without the audio server); with `wait`,
+# until the turn is complete. Streamlit can only be called from the script
+# thread, so this is not done by the synthesis threads themselves
+def play_ready_speech(wait=False):
+    turn = st.session_state.speech_turn
+    if turn is None or not isinstance(turn.sink, ClipQueue):
+        return
+    while True:
+        clips, done = turn.sink.take(timeout=None if wait else 0)
+        for audio_bytes, mimetype in clips:
+            queue_speech_clip(st.session_state.speech_playlist, audio_source(audio_bytes, mimetype))
+        if done or not wait:
+            return
+
+# Text deltas passed through, queueing the sentences synthesized meanwhile
+def play_while_streaming(deltas):
+    for delta in deltas:
+        yield delta
+        play_ready_speech()
+
+# Add a clip to the browser's speech playlist, played after the clips before
+# it; a clip of another playlist stops and replaces those (None only stops).
+# The playlist lives in the page, so it outlasts the element adding to it
+SPEECH_PLAYLIST_JS = """
+<script>
+(function () {
+    const page = window.parent;
+    if (!page.speechPlaylist) {
+        // Created in the page, not in this frame, which goes away on the next rerun
+        page.speechPlaylist = {id: null, clips: [], audio: null, next: new page.Function(`
+            const playlist = window.speechPlaylist;
+            if (playlist.audio || !playlist.clips.length) return;
+            const audio = playlist.audio = new Audio(playlist.clips.shift());
+            audio.onended = audio.onerror = function () {
+                if (playlist.audio === audio) {
+                    playlist.audio = null;
+                    playlist.next();
+                }
+            };
+            audio.play().catch(function () {
+                // Autoplay was blocked: play on the next click
+                document.addEventListener('click', function () { audio.play(); }, { once: true });
+            });
+        `)};
+    }
+    const playlist = page.speechPlaylist;
+    if (playlist.id !== PLAYLIST_ID) {
+        if (playlist.audio) playlist.audio.pause();
+        playlist.id = PLAYLIST_ID;
+        playlist.clips = [];
+        playlist.audio = null;
+    }
+    if (AUDIO_SRC) playlist.clips.push(AUDIO_SRC);
+    playlist.next();
+})();
+</script>
+"""
+
+def queue_speech_clip(playlist_id, audio_src):
+    js_code = SPEECH_PLAYLIST_JS.replace("PLAYLIST_ID", json.dumps(playlist_id)).replace("AUDIO_SRC", json.dumps(audio_src))
+    with st.session_state.speech_player:
+        st.components.v1.html(js_code, height=0)
+
+# Until when (time.monotonic()) the assistant is estimated to be speaking
+def speech_playing_until():
+    until = st.session_state.speech_playing_until
+    turn = st.session_state.speech_turn
+    if turn is not None and turn.playing_until is not None:
+        until = max(until, turn.playing_until)
+    return until
+
+# Tell the user about sentences that could not be spoken
+def warn_dropped_speech(failed):
+    if failed:
+        st.warning(f"🔇 {failed} sentence{'s' if failed > 1 else ''} could not be spoken.")
 
 # Helper function to play audio automatically using JavaScript
 def play_audio_in_app(text, lang='en'):
     """Generate and play audio automatically without requiring user interaction"""
-    # Generate audio file with unique name to prevent caching issues
+    # Long texts are spoken sentence by sentence, starting with the first one
+    if len(text) > TTS_CHUNK_CHARS:
+        turn = start_speech_turn(lang)
+        if turn is not None:
+            turn.feed(text)
+            turn.finish()
+            play_ready_speech(wait=True)
+            return
+
+    stop_speaking()
+    try:
+        if len(text) > TTS_CHUNK_CHARS:
+            audio_bytes, mimetype, failed = get_speech_synthesizer().synthesize_text(
+                text, lang, None, ClipSynthesizer(get_tts_engines())
+            )
+            if audio_bytes:
+                warn_dropped_speech(failed)
+        else:
+            audio_bytes, mimetype = synthesize_speech(text, lang)
+    except TTSError:
+        audio_bytes = None
+    if not audio_bytes:
+        st.session_state.audio_player.warning("🔇 Speech output is not available right now.")
+        return
+
+    # Serve the audio, synthesized (or looked up) in memory, by URL
+    render_audio(audio_source(audio_bytes, mimetype), mimetype)
+    # It replaces any clip still playing
+    st.session_state.speech_playing_until = time.monotonic() + len(text) / TTS_CHARS_PER_SECOND
+
+def render_audio(audio_src, mimetype="audio/mpeg"):
+    """Play the clip at `audio_src` in the audio player, replacing the previous one"""
     st.session_state.audio_counter += 1
-    audio_file_path = f"temp_audio_{st.session_state.audio_counter}.mp3"
-    tts = gTTS(text=text, lang=lang)
-    tts.save(audio_file_path)
-
-    # Get base64 encoded audio
-    audio_b64 = get_base64_audio(audio_file_path)
+    # Without a mimetype, the browser goes by the server's Content-Type
+    type_attribute = f' type="{mimetype}"' if mimetype else ""
 
     # Create a unique ID for this audio element
     audio_id = f"auto_audio_{st.session_state.audio_counter}"
 
     # Create HTML with JavaScript that auto-plays the audio
-    # Using data URI with base64 encoded audio to avoid file access issues
+    # The browser fetches the clip by URL, and plays a repeated one from its cache
     audio_html = f"""
     <audio id="{audio_id}" autoplay="true">
-        <source src="data:audio/mp3;base64,{audio_b64}" type="audio/mp3">
+        <source src="{audio_src}"{type_attribute}>
         Your browser does not support the audio element.
     </audio>
     <script>
@@ -333,16 +680,6 @@ def play_audio_in_app(text, lang='en'):
     st.session_state.audio_player.empty()
     st.session_state.audio_player.markdown(audio_html, unsafe_allow_html=True)
 
-    # Clean up old audio files to prevent clutter
-    try:
-        if st.session_state.audio_counter > 5:  # Keep only the 5 most recent files
-            for i in range(1, st.session_state.audio_counter - 5):
-                old_file = f"temp_audio_{i}.mp3"
-                if os.path.exists(old_file):
-                    os.remove(old_file)
-    except Exception:
-        pass  # Ignore errors in cleanup
-
 # Mode selection buttons in a horizontal layout
 col1, col2, col3 = st.columns(3)
 with col1:
@@ -361,11 +698,18 @@ st.subheader(f"Current Mode: {st.session_state.current_mode.replace('_', ' ').ti
 # Add keyboard shortcuts
 handle_keyboard_shortcuts()
 
+# Keep the clips the browser may still be fetching
+keep_media_clips()
+
 # Display chat history (common across all modes)
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
+# The microphone is only kept open in voice mode
+if st.session_state.current_mode != "visually_impaired" and "voice_listener" in st.session_state:
+    st.session_state.voice_listener.stop()
+
 # --- Standard Mode ---
 if st.session_state.current_mode == "standard":
     st.write("This feature allows you to chat with an AI assistant.")
@@ -377,11 +721,11 @@ if st.session_state.current_mode == "standard":
 
         with st.chat_message("assistant"):
             try:
-                # Generate response using Groq API
-                response_text = groq_api.generate_response(prompt)
-
-                # Display the response
-                st.markdown(response_text)
+                # Generate response using Groq API, displayed as it streams in;
+                # the earlier messages are sent as context
+                response_text = stream_response(
+                    llm.generate_response_stream(prompt, history=st.session_state.messages[:-1])
+                )
                 st.session_state.messages.append({"role": "assistant", "content": response_text})
             except Exception as e:
                 error_message = f"Error: {str(e)}"
@@ -398,6 +742,11 @@ elif st.session_state.current_mode == "visually_impaired":
         st.session_state.continuous_listening = True  # Enable continuous listening by default
         st.session_state.voice_language = "en-US"
         st.session_state.listening_active = True  # Start listening immediately
+        # The microphone stays open in the background; a single utterance is
+        # awaited since this time (time.monotonic()) after the space key or
+        # "Respond by Voice"
+        st.session_state.voice_listener = VoiceListener(calibration_seconds=VOICE_CALIBRATION_SECONDS)
+        st.session_state.voice_awaiting_since = None
         st.session_state.voice_commands = {
             "clear chat": "clear the chat history",
             "stop listening": "pause voice recognition",
@@ -410,12 +759,12 @@ elif st.session_state.current_mode == "visually_impaired":
 
         # Automatically play welcome message for first-time users or when accessibility mode is enabled
         if st.session_state.first_run or st.session_state.accessibility_mode:
-            welcome_text = "Welcome to the voice assistant. Voice mode is now active and listening. You can speak commands or questions at any time. Say help to hear available commands."
+            welcome_text = SYSTEM_PHRASES["welcome"]
             play_audio_in_app(welcome_text, lang='en')
             # Add a slight delay to ensure the welcome message is heard
             time.sleep(1)
             # Also announce that continuous listening is active
-            listening_text = "Continuous listening is now active. You can speak at any time."
+            listening_text = SYSTEM_PHRASES["listening_active"]
             play_audio_in_app(listening_text, lang='en')
             st.session_state.first_run = False
 
@@ -438,23 +787,19 @@ elif st.session_state.current_mode == "visually_impaired":
             st.session_state.continuous_listening = continuous_mode
             if continuous_mode:
                 st.session_state.listening_active = True
+                # Only what is said from now on
+                st.session_state.voice_listener.clear()
                 # Announce that listening is now active
-                play_audio_in_app("Continuous listening enabled. You can speak at any time.", lang='en')
+                play_audio_in_app(SYSTEM_PHRASES["continuous_enabled"], lang='en')
                 st.rerun()
             else:
                 st.session_state.listening_active = False
                 # Announce that listening is now disabled
-                play_audio_in_app("Continuous listening disabled.", lang='en')
+                play_audio_in_app(SYSTEM_PHRASES["continuous_disabled"], lang='en')
                 st.rerun()
 
     with col2:
-        language_options = {
-            "English (US)": "en-US",
-            "English (UK)": "en-GB",
-            "French": "fr-FR",
-            "Spanish": "es-ES",
-            "German": "de-DE"
-        }
+        language_options = VOICE_LANGUAGES
         selected_language = st.selectbox(
             "🌐 Language",
             options=list(language_options.keys()),
@@ -465,104 +810,175 @@ elif st.session_state.current_mode == "visually_impaired":
     # Voice recording status indicator
     status_placeholder = st.empty()
 
-    # Function to process voice input
+    # Text of an utterance, or None for noise or when the recognition service
+    # fails; runs on the recognition pool
+    def recognize_or_none(recognizer, audio, language):
+        try:
+            return recognizer.recognize_google(audio, language=language)
+        except (sr.UnknownValueError, sr.RequestError):
+            return None
+
+    # Deltas of a voice answer until the user says something else. Between
+    # deltas, the listener is only polled; an utterance is recognized on the
+    # recognition pool while the answer goes on, and ignored if it overlaps
+    # the assistant's speech. The new text is put in interruption["text"],
+    # with interruption["cut"] if the answer ended there
+    def until_interrupted(deltas, interruption):
+        voice_listener = st.session_state.voice_listener
+        language = st.session_state.voice_language
+        pending = None
+        for delta in deltas:
+            yield delta
+            if pending is None:
+                utterance = voice_listener.get(timeout=0, quiet_until=speech_playing_until())
+                if utterance is not None:
+                    pending = get_recognition_pool().submit(
+                        recognize_or_none, voice_listener.recognizer, utterance.audio, language
+                    )
+            elif pending.done():
+                user_text, pending = pending.result(), None
+                if user_text:
+                    interruption.update(text=user_text, cut=True)
+                    return
+        # The answer is complete; an utterance still being recognized comes next
+        if pending is not None:
+            user_text = pending.result()
+            if user_text:
+                interruption.update(text=user_text, cut=False)
+
+    # Function to process voice input: answers the utterance, then each one
+    # that interrupted the previous answer
     def process_voice_input(audio_data, recognizer):
         try:
             user_text = recognizer.recognize_google(audio_data, language=st.session_state.voice_language)
-
-            # Check for voice commands
-            if user_text.lower() == "clear chat":
-                st.session_state.messages = []
-                status_placeholder.success("💬 Chat history cleared!")
-                # Provide audio feedback
-                play_audio_in_app("Chat history cleared", lang=st.session_state.voice_language[:2])
-                return None
-
-            elif user_text.lower() == "help":
-                help_text = "Available voice commands:\n"
-                for cmd, desc in st.session_state.voice_commands.items():
-                    help_text += f"• '{cmd}': {desc}\n"
-
-                status_placeholder.info(help_text)
-
-                # Provide audio feedback for help commands
-                help_audio = "Available commands are: clear chat, stop listening, start listening, help, switch to standard mode, switch to voice mode, and switch to non-verbal mode."
-                play_audio_in_app(help_audio, lang=st.session_state.voice_language[:2])
-                return None
-
-            elif user_text.lower() == "stop listening" and st.session_state.continuous_listening:
-                # Just pause listening, don't turn off continuous mode
-                st.session_state.listening_active = False
-                status_placeholder.warning("🛑 Listening paused")
-
-                # Provide audio feedback
-                play_audio_in_app("Listening paused. Say start listening to resume.", lang=st.session_state.voice_language[:2])
-                st.rerun()
-                return None
-
-            elif user_text.lower() == "start listening" and st.session_state.continuous_listening and not st.session_state.listening_active:
-                # Resume listening
-                st.session_state.listening_active = True
-                status_placeholder.info("🎙️ Listening resumed")
-
-                # Provide audio feedback
-                play_audio_in_app("Listening resumed. You can speak now.", lang=st.session_state.voice_language[:2])
-                st.rerun()
-                return None
-
-            elif user_text.lower() == "switch to standard mode":
-                st.session_state.current_mode = "standard"
-
-                # Provide audio feedback
-                play_audio_in_app("Switching to standard text mode", lang=st.session_state.voice_language[:2])
-                st.rerun()
-                return None
-
-            elif user_text.lower() == "switch to voice mode":
-                # Already in voice mode, just confirm
-                play_audio_in_app("Already in voice mode", lang=st.session_state.voice_language[:2])
-                return None
-
-            elif user_text.lower() == "switch to non-verbal mode":
-                st.session_state.current_mode = "non_verbal"
-
-                # Provide audio feedback
-                play_audio_in_app("Switching to sign language mode", lang=st.session_state.voice_language[:2])
-                st.rerun()
-                return None
-
-            # Regular message processing
-            status_placeholder.write("📝 You said: " + user_text)
-
-            # Add user message to chat history
-            st.session_state.messages.append({"role": "user", "content": user_text})
-
-            try:
-                # Generate response using Groq API
-                response_text = groq_api.generate_response(user_text)
-
-                # Add assistant response to chat history
-                st.session_state.messages.append({"role": "assistant", "content": response_text})
-
-                # Convert text to speech and play directly in the app
-                play_audio_in_app(response_text, lang=st.session_state.voice_language[:2])
-
-                return response_text
-
-            except Exception as e:
-                error_message = f"Error: {str(e)}"
-                status_placeholder.error("🚨 Error: " + error_message)
-                st.session_state.messages.append({"role": "assistant", "content": error_message})
-                return None
-
         except sr.UnknownValueError:
             status_placeholder.warning("😕 Could not understand the audio. Please try again.")
             return None
-
         except sr.RequestError as e:
             status_placeholder.error(f"🚨 Error with the speech recognition service: {e}")
             return None
 
+        while True:
+            response_text, user_text = respond_to_voice(user_text)
+            if user_text is None:
+                return response_text
+
+    # Answer recognized text; returns (response text or None, text of an
+    # utterance heard meanwhile that is to be answered next, or None)
+    def respond_to_voice(user_text):
+        # Check for voice commands
+        if user_text.lower() == "clear chat":
+            st.session_state.messages = []
+            status_placeholder.success("💬 Chat history cleared!")
+            # Provide audio feedback
+            play_audio_in_app(SYSTEM_PHRASES["chat_cleared"], lang=st.session_state.voice_language[:2])
+            return None, None
+
+        elif user_text.lower() == "help":
+            help_text = "Available voice commands:\n"
+            for cmd, desc in st.session_state.voice_commands.items():
+                help_text += f"• '{cmd}': {desc}\n"
+
+            status_placeholder.info(help_text)
+
+            # Provide audio feedback for help commands
+            help_audio = SYSTEM_PHRASES["help"]
+            play_audio_in_app(help_audio, lang=st.session_state.voice_language[:2])
+            return None, None
+
+        elif user_text.lower() == "stop listening" and st.session_state.continuous_listening:
+            # Just pause listening, don't turn off continuous mode
+            st.session_state.listening_active = False
+            status_placeholder.warning("🛑 Listening paused")
+
+            # Provide audio feedback
+            play_audio_in_app(SYSTEM_PHRASES["paused_by_voice"], lang=st.session_state.voice_language[:2])
+            st.rerun()
+            return None, None
+
+        elif user_text.lower() == "start listening" and st.session_state.continuous_listening and not st.session_state.listening_active:
+            # Resume listening
+            st.session_state.listening_active = True
+            status_placeholder.info("🎙️ Listening resumed")
+
+            # Provide audio feedback
+            play_audio_in_app(SYSTEM_PHRASES["resumed"], lang=st.session_state.voice_language[:2])
+            st.rerun()
+            return None, None
+
+        elif user_text.lower() == "switch to standard mode":
+            st.session_state.current_mode = "standard"
+
+            # Provide audio feedback
+            play_audio_in_app(SYSTEM_PHRASES["to_standard_mode"], lang=st.session_state.voice_language[:2])
+            st.rerun()
+            return None, None
+
+        elif user_text.lower() == "switch to voice mode":
+            # Already in voice mode, just confirm
+            play_audio_in_app(SYSTEM_PHRASES["already_voice_mode"], lang=st.session_state.voice_language[:2])
+            return None, None
+
+        elif user_text.lower() == "switch to non-verbal mode":
+            st.session_state.current_mode = "non_verbal"
+
+            # Provide audio feedback
+            play_audio_in_app(SYSTEM_PHRASES["to_non_verbal_mode"], lang=st.session_state.voice_language[:2])
+            st.rerun()
+            return None, None
+
+        # Regular message processing
+        status_placeholder.write("📝 You said: " + user_text)
+
+        # Add user message to chat history
+        st.session_state.messages.append({"role": "user", "content": user_text})
+        with st.chat_message("user"):
+            st.markdown(user_text)
+
+        try:
+            # Generate response using Groq API, displayed as it streams in;
+            # it runs on the background event loop and cancels any answer
+            # still streaming from a previous utterance
+            with st.chat_message("assistant"):
+                # Each sentence is spoken as soon as it has streamed in
+                speech_turn = start_speech_turn(st.session_state.voice_language[:2])
+                deltas = async_groq_api.stream(
+                    user_text, history=st.session_state.messages[:-1], idle_timeout=VOICE_RESPONSE_DEADLINE
+                )
+                # The microphone is checked while the answer streams in
+                interruption = {}
+                answer_deltas = until_interrupted(deltas, interruption)
+                if speech_turn is not None:
+                    answer_deltas = play_while_streaming(speech_turn.tee(answer_deltas))
+                response_text = stream_response(answer_deltas)
+
+            # The user spoke again before the answer was complete: it is kept
+            # marked as cut off, and starting the next turn cancels its stream
+            if interruption.get("cut"):
+                st.session_state.messages.append(
+                    {"role": "assistant", "content": f"{response_text} … [interrupted]"}
+                )
+                return response_text, interruption["text"]
+
+            # Add assistant response to chat history
+            st.session_state.messages.append({"role": "assistant", "content": response_text})
+
+            # Without a speech engine for the language, this only tells the user
+            if speech_turn is None:
+                play_audio_in_app(response_text, lang=st.session_state.voice_language[:2])
+            else:
+                # The sentences synthesized after the last delta
+                play_ready_speech(wait=True)
+                warn_dropped_speech(speech_turn.failed)
+
+            return response_text, interruption.get("text")
+
+        except Exception as e:
+            error_message = f"Error: {str(e)}"
+            status_placeholder.error("🚨 Error: " + error_message)
+            st.session_state.messages.append({"role": "assistant", "content": error_message})
+            return None, None
+
     # Hidden button that will be triggered by the space key
     # Use a container with CSS to hide the button but keep it functional
     space_trigger_container = st.container()
@@ -580,20 +996,10 @@ elif st.session_state.current_mode == "visually_impaired":
 
         # Create the button that will be hidden but still functional
         if st.button("Space Trigger", key="space_trigger_button", help="This button is triggered when you press the space key"):
-            # This will be triggered when the space key is pressed
-            status_placeholder.info("🎙️ Space key pressed! Listening... Speak now")
-            play_audio_in_app("Space key pressed. Listening now. Speak your message.", lang=st.session_state.voice_language[:2])
-
-            # Initialize recognizer
-            recognizer = sr.Recognizer()
-            with sr.Microphone() as source:
-                recognizer.adjust_for_ambient_noise(source)
-                audio = recognizer.listen(source, timeout=5)
-
-            # Process the recorded audio
-            response = process_voice_input(audio, recognizer)
-            if response:
-                status_placeholder.success("✅ Response generated")
+            # This will be triggered when the space key is pressed; the next
+            # utterance is picked up from the background listener below
+            play_audio_in_app(SYSTEM_PHRASES["space_pressed"], lang=st.session_state.voice_language[:2])
+            st.session_state.voice_awaiting_since = time.monotonic()
 
     # Add a note about the space key shortcut
     st.info("💡 **Tip:** Press the **SPACE** key at any time to start voice recording")
@@ -601,18 +1007,7 @@ elif st.session_state.current_mode == "visually_impaired":
     # Single voice response button
     if not st.session_state.continuous_listening:
         if st.button("🎤 Respond by Voice", use_container_width=True):
-            status_placeholder.info("🎙️ Listening... Speak now")
-
-            # Initialize recognizer
-            recognizer = sr.Recognizer()
-            with sr.Microphone() as source:
-                recognizer.adjust_for_ambient_noise(source)
-                audio = recognizer.listen(source, timeout=5)
-
-            # Process the recorded audio
-            response = process_voice_input(audio, recognizer)
-            if response:
-                status_placeholder.success("✅ Response generated")
+            st.session_state.voice_awaiting_since = time.monotonic()
 
     # Continuous listening mode
     else:
@@ -623,7 +1018,7 @@ elif st.session_state.current_mode == "visually_impaired":
                 if st.button("🛑 Pause Listening", use_container_width=True):
                     st.session_state.listening_active = False
                     status_placeholder.info("Listening paused")
-                    play_audio_in_app("Listening paused. Click Start Listening to resume.", lang='en')
+                    play_audio_in_app(SYSTEM_PHRASES["paused_by_button"], lang='en')
                     st.rerun()
 
                 # Show active listening status
@@ -632,30 +1027,38 @@ elif st.session_state.current_mode == "visually_impaired":
             else:
                 if st.button("🎙️ Start Listening", use_container_width=True):
                     st.session_state.listening_active = True
-                    play_audio_in_app("Listening started. You can speak now.", lang='en')
+                    play_audio_in_app(SYSTEM_PHRASES["started"], lang='en')
                     st.rerun()
 
                 status_placeholder.warning("⏸️ Listening is paused. Click Start Listening to resume.")
 
-            # Initialize recognizer for continuous mode
-            recognizer = sr.Recognizer()
-            with sr.Microphone() as source:
-                recognizer.adjust_for_ambient_noise(source)
-
-                try:
-                    # Short timeout to allow the UI to remain responsive
-                    audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
-
-                    # Process the recorded audio
-                    response = process_voice_input(audio, recognizer)
-                    if response:
-                        status_placeholder.success("✅ Response generated")
-                        # Keep listening
-                        st.rerun()
+    # Utterances are captured by the session's background listener, which keeps
+    # the microphone open; the script only picks up finished ones, and reruns
+    # to check again
+    awaiting_since = st.session_state.voice_awaiting_since
+    if st.session_state.continuous_listening or awaiting_since is not None:
+        voice_listener = st.session_state.voice_listener
+        if awaiting_since is not None:
+            status_placeholder.info("🎙️ Listening... Speak now")
+        # What is heard while the assistant speaks is its own voice
+        utterance = voice_listener.get(
+            timeout=VOICE_POLL_SECONDS, since=awaiting_since, quiet_until=speech_playing_until()
+        )
+        if utterance is not None:
+            st.session_state.voice_awaiting_since = None
+            response = process_voice_input(utterance.audio, voice_listener.recognizer)
+            if response:
+                status_placeholder.success("✅ Response generated")
 
-                except (sr.WaitTimeoutError, Exception) as e:
-                    # Just continue listening
-                    st.rerun()
+        if voice_listener.error is not None:
+            st.session_state.voice_awaiting_since = None
+            status_placeholder.error(f"🚨 The microphone is not available: {voice_listener.error}")
+        elif awaiting_since is not None and utterance is None and time.monotonic() - awaiting_since > VOICE_WAIT_SECONDS:
+            st.session_state.voice_awaiting_since = None
+            status_placeholder.warning("😕 No speech heard. Please try again.")
+        elif st.session_state.continuous_listening or st.session_state.voice_awaiting_since is not None:
+            # Keep listening
+            st.rerun()
 
 # --- Non-Verbal Mode ---
 elif st.session_state.current_mode == "non_verbal":
@@ -665,12 +1068,32 @@ elif st.session_state.current_mode == "non_verbal":
     if "sign_language_initialized" not in st.session_state:
         st.session_state.sign_language_initialized = False
         st.session_state.detected_text = ""
-        st.session_state.last_detection_time = time.time()
-        st.session_state.last_input_time = time.time()  # Track time since last input for auto-space
+
+    # Letter commit settings: a letter is added once enough of the recent frames
+    # agree on it with enough confidence
+    with st.expander("Letter detection settings"):
+        commit_window = st.slider("Frames considered", min_value=3, max_value=30, value=8)
+        commit_votes = st.slider(
+            "Frames that must agree", min_value=1, max_value=commit_window, value=min(5, commit_window)
+        )
+        commit_confidence = st.slider("Minimum confidence", min_value=0.0, max_value=1.0, value=0.7, step=0.05)
+        commit_release_frames = st.slider(
+            "Frames without a letter before it can be repeated", min_value=1, max_value=15, value=3
+        )
+        commit_space_after = st.slider(
+            "Seconds of no input before a space is added", min_value=0.5, max_value=5.0, value=2.0, step=0.5
+        )
+    letter_commit_settings = {
+        "window": commit_window,
+        "min_votes": commit_votes,
+        "min_confidence": commit_confidence,
+        "release_frames": commit_release_frames,
+        "space_after": commit_space_after,
+    }
 
     # Add information note about auto-space feature
     st.info("📝 **Sign Language Mode Instructions:**\n\n"
-            "1. A space will be automatically added after 2 seconds of no input\n"
+            f"1. A space will be automatically added after {commit_space_after:g} seconds of no input\n"
             "2. Make hand signs to detect letters\n"
             "3. Click 'Submit' when your message is complete")
 
@@ -686,29 +1109,41 @@ elif st.session_state.current_mode == "non_verbal":
         # Just for visual consistency, show a disabled text input
         st.text_input("", value=st.session_state.detected_text, key="detected_text_input", disabled=True)
     with col2:
-        if st.button("Submit", use_container_width=True):
-            if st.session_state.detected_text:
-                # Add detected text to chat history
-                st.session_state.messages.append({"role": "user", "content": st.session_state.detected_text})
+        submit_clicked = st.button("Submit", use_container_width=True)
+
+    if submit_clicked and st.session_state.detected_text:
+        # Add detected text to chat history
+        st.session_state.messages.append({"role": "user", "content": st.session_state.detected_text})
+        with st.chat_message("user"):
+            st.markdown(st.session_state.detected_text)
 
-                try:
-                    # Generate response using Groq API
-                    response_text = groq_api.generate_response(st.session_state.detected_text)
+        try:
+            # Generate response using Groq API, displayed as it streams in
+            with st.chat_message("assistant"):
+                response_text = stream_response(
+                    llm.generate_response_stream(
+                        st.session_state.detected_text, history=st.session_state.messages[:-1]
+                    )
+                )
 
-                    # Add assistant response to chat history
-                    st.session_state.messages.append({"role": "assistant", "content": response_text})
+            # Add assistant response to chat history
+            st.session_state.messages.append({"role": "assistant", "content": response_text})
 
-                    # Clear detected text
-                    st.session_state.detected_text = ""
-                    st.rerun()
-                except Exception as e:
-                    error_message = f"Error: {str(e)}"
-                    st.session_state.messages.append({"role": "assistant", "content": error_message})
-                    st.rerun()
+            # Clear detected text
+            st.session_state.detected_text = ""
+            if "letter_commit_engine" in st.session_state:
+                st.session_state.letter_commit_engine.reset()
+            st.rerun()
+        except Exception as e:
+            error_message = f"Error: {str(e)}"
+            st.session_state.messages.append({"role": "assistant", "content": error_message})
+            st.rerun()
 
     # Live video recognition
     st.subheader("Live Video Recognition")
     video_active = st.checkbox("Enable Camera")
+    show_overlay = st.checkbox("Show hand landmarks", value=True)
+    show_performance = st.checkbox("Show performance panel", value=False)
     stframe = st.empty()
 
     if video_active:
@@ -722,232 +1157,108 @@ elif st.session_state.current_mode == "non_verbal":
                 min_tracking_confidence=0.5,
             )
 
+            st.session_state.hand_detector = AdaptiveHandDetector(
+                st.session_state.hands,
+                target_frame_time=HAND_DETECTION_FRAME_BUDGET,
+            )
+
             # Initialize keypoint classifier
-            st.session_state.keypoint_classifier = KeyPointClassifier()
+            st.session_state.keypoint_classifier = KeyPointClassifier(backend=KEYPOINT_CLASSIFIER_BACKEND)
 
             # Read labels
-            with open("model/keypoint_classifier/keypoint_classifier_label.csv", encoding="utf-8-sig") as f:
-                keypoint_classifier_labels = csv.reader(f)
-                st.session_state.keypoint_classifier_labels = [row[0] for row in keypoint_classifier_labels]
+            st.session_state.keypoint_classifier_labels = read_labels()
 
             st.session_state.sign_language_initialized = True
 
-        # Start video capture
-        cap = cv2.VideoCapture(0)
-
-        while video_active:
-            ret, image = cap.read()
-            if not ret:
-                st.write("Error: Unable to capture image")
-                break
-
-            # Mirror display
-            image = cv2.flip(image, 1)
-            debug_image = copy.deepcopy(image)
-
-            # Detection implementation
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        # (Re)create the letter commit engine when its settings change
+        if st.session_state.get("letter_commit_settings") != letter_commit_settings:
+            st.session_state.letter_commit_engine = LetterCommitEngine(
+                st.session_state.keypoint_classifier_labels, **letter_commit_settings
+            )
+            st.session_state.letter_commit_settings = letter_commit_settings
 
-            image.flags.writeable = False
-            results = st.session_state.hands.process(image)
-            image.flags.writeable = True
+        # Start video capture; frames are captured and classified in background
+        # threads, this loop only consumes the newest result. The capture thread
+        # releases the camera when it stops, never during a read
+        cap = cv2.VideoCapture(0)
+        stage_timer = StageTimer()
+        pipeline = VideoPipeline(
+            cap.read,
+            functools.partial(
+                recognize_hand_signs,
+                hand_detector=st.session_state.hand_detector,
+                keypoint_classifier=st.session_state.keypoint_classifier,
+                labels=st.session_state.keypoint_classifier_labels,
+                overlay_renderer=HandOverlayRenderer(enabled=show_overlay),
+                stage_timer=stage_timer,
+            ),
+            stage_timer=stage_timer,
+            release=cap.release,
+        ).start()
+        frame_display = FrameDisplay(stframe, max_fps=DISPLAY_MAX_FPS, jpeg_quality=DISPLAY_JPEG_QUALITY)
+        pipeline_stats_display = st.empty()
+        performance_panel = st.empty() if show_performance else None
+        metrics_log = MetricsLog(METRICS_LOG_PATH, METRICS_LOG_INTERVAL) if METRICS_LOG_PATH else None
+        last_stats_time = 0.0
+        shown_text = None
 
-            if results.multi_hand_landmarks is not None:
-                for hand_landmarks, handedness in zip(
-                    results.multi_hand_landmarks, results.multi_handedness
+        try:
+            while video_active:
+                result = pipeline.read_result(timeout=1.0)
+                if result is None:
+                    if pipeline.error is not None:
+                        st.error(f"Error during hand sign detection: {pipeline.error}")
+                        break
+                    if not pipeline.running:
+                        st.write("Error: Unable to capture image")
+                        break
+                    continue
+
+                debug_image, hand_signs = result.value
+
+                # Detect letter: vote over recent frames using the most confident hand
+                detected_letter, confidence = most_confident(hand_signs)
+                committed_text = st.session_state.letter_commit_engine.update(
+                    detected_letter, confidence, result.timestamp
+                )
+
+                # Only add a space after text, and never several in a row
+                if committed_text == " " and (
+                    not st.session_state.detected_text or st.session_state.detected_text.endswith(" ")
                 ):
-                    # Bounding box calculation
-                    brect = calc_bounding_rect(debug_image, hand_landmarks)
-
-                    # Landmark calculation
-                    landmark_list = calc_landmark_list(debug_image, hand_landmarks)
-
-                    # Conversion to relative coordinates / normalized coordinates
-                    pre_processed_landmark_list = pre_process_landmark(landmark_list)
-
-                    # Hand sign classification
-                    hand_sign_id = st.session_state.keypoint_classifier(pre_processed_landmark_list)
-
-                    # Drawing part
-                    debug_image = draw_bounding_rect(debug_image, brect)
-                    debug_image = draw_landmarks(debug_image, landmark_list)
-                    debug_image = draw_info_text(
-                        debug_image,
-                        brect,
-                        handedness,
-                        st.session_state.keypoint_classifier_labels[hand_sign_id],
+                    committed_text = ""
+                st.session_state.detected_text += committed_text
+                current_time = time.time()
+
+                # Update the text display only when the detected text changed
+                if st.session_state.detected_text != shown_text:
+                    text_display.text(f"Detected Text: {st.session_state.detected_text}")
+                    shown_text = st.session_state.detected_text
+
+                # Display the frame, JPEG-encoded and rate-limited to DISPLAY_MAX_FPS
+                with stage_timer.span("render"):
+                    shown = frame_display.show(debug_image, overlay_key=tuple(label for label, _ in hand_signs))
+                if not shown:
+                    stage_timer.count("skipped_display")
+
+                # Queue depths and dropped frames per stage, refreshed once per second
+                if current_time - last_stats_time >= 1.0:
+                    pipeline_stats_display.caption(
+                        format_pipeline_stats(
+                            pipeline.stats(),
+                            st.session_state.hand_detector.stats(),
+                            frame_display.stats(),
+                        )
                     )
-
-                    # Detect letter
-                    detected_letter = st.session_state.keypoint_classifier_labels[hand_sign_id]
-                    current_time = time.time()
-
-                    if detected_letter != "None":
-                        if current_time - st.session_state.last_detection_time >= 1.5:
-                            st.session_state.detected_text += detected_letter
-                            st.session_state.last_detection_time = current_time
-                            st.session_state.last_input_time = current_time  # Reset auto-space timer when new letter is added
-                            # Update the text display without refreshing the page
-                            # We'll handle this in the main loop
-
-            # Check if we need to add a space (if 2 seconds have passed since last input)
-            current_time = time.time()
-            if (st.session_state.detected_text and  # Only add space if there's text
-                current_time - st.session_state.last_input_time >= 2.0 and  # 2 seconds passed
-                not st.session_state.detected_text.endswith(" ")):  # Don't add multiple spaces
-                st.session_state.detected_text += " "
-                st.session_state.last_input_time = current_time  # Reset timer
-
-            # Update the text display with the current detected text
-            text_display.text(f"Detected Text: {st.session_state.detected_text}")
-
-            # Display the frame
-            stframe.image(debug_image, channels="RGB")
-
-        cap.release()
-
-# Helper functions for sign language detection
-def calc_bounding_rect(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_array = np.empty((0, 2), int)
-
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-
-        landmark_point = [np.array((landmark_x, landmark_y))]
-
-        landmark_array = np.append(landmark_array, landmark_point, axis=0)
-
-    x, y, w, h = cv2.boundingRect(landmark_array)
-
-    return [x, y, x + w, y + h]
-
-def calc_landmark_list(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_point = []
-
-    # Keypoint
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-
-        landmark_point.append([landmark_x, landmark_y])
-
-    return landmark_point
-
-def pre_process_landmark(landmark_list):
-    temp_landmark_list = copy.deepcopy(landmark_list)
-
-    # Convert to relative coordinates
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
-
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
-
-    # Convert to a one-dimensional list
-    temp_landmark_list = list(itertools.chain.from_iterable(temp_landmark_list))
-
-    # Normalization
-    max_value = max(list(map(abs, temp_landmark_list)))
-
-    def normalize_(n):
-        return n / max_value
-
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
-
-    return temp_landmark_list
-
-def draw_landmarks(image, landmark_point):
-    if len(landmark_point) > 0:
-        # Thumb
-        cv2.line(image, tuple(landmark_point[2]), tuple(landmark_point[3]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[2]), tuple(landmark_point[3]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[3]), tuple(landmark_point[4]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[3]), tuple(landmark_point[4]), (255, 255, 255), 2)
-
-        # Index finger
-        cv2.line(image, tuple(landmark_point[5]), tuple(landmark_point[6]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[5]), tuple(landmark_point[6]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[6]), tuple(landmark_point[7]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[6]), tuple(landmark_point[7]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[7]), tuple(landmark_point[8]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[7]), tuple(landmark_point[8]), (255, 255, 255), 2)
-
-        # Middle finger
-        cv2.line(image, tuple(landmark_point[9]), tuple(landmark_point[10]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[9]), tuple(landmark_point[10]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[10]), tuple(landmark_point[11]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[10]), tuple(landmark_point[11]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[11]), tuple(landmark_point[12]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[11]), tuple(landmark_point[12]), (255, 255, 255), 2)
-
-        # Ring finger
-        cv2.line(image, tuple(landmark_point[13]), tuple(landmark_point[14]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[13]), tuple(landmark_point[14]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[14]), tuple(landmark_point[15]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[14]), tuple(landmark_point[15]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[15]), tuple(landmark_point[16]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[15]), tuple(landmark_point[16]), (255, 255, 255), 2)
-
-        # Little finger
-        cv2.line(image, tuple(landmark_point[17]), tuple(landmark_point[18]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[17]), tuple(landmark_point[18]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[18]), tuple(landmark_point[19]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[18]), tuple(landmark_point[19]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[19]), tuple(landmark_point[20]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[19]), tuple(landmark_point[20]), (255, 255, 255), 2)
-
-        # Palm
-        cv2.line(image, tuple(landmark_point[0]), tuple(landmark_point[1]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[0]), tuple(landmark_point[1]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[1]), tuple(landmark_point[2]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[1]), tuple(landmark_point[2]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[2]), tuple(landmark_point[5]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[2]), tuple(landmark_point[5]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[5]), tuple(landmark_point[9]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[5]), tuple(landmark_point[9]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[9]), tuple(landmark_point[13]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[9]), tuple(landmark_point[13]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[13]), tuple(landmark_point[17]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[13]), tuple(landmark_point[17]), (255, 255, 255), 2)
-        cv2.line(image, tuple(landmark_point[17]), tuple(landmark_point[0]), (0, 0, 0), 6)
-        cv2.line(image, tuple(landmark_point[17]), tuple(landmark_point[0]), (255, 255, 255), 2)
-
-    # Key Points
-    for index, landmark in enumerate(landmark_point):
-        cv2.circle(image, (landmark[0], landmark[1]), 5, (255, 255, 255), -1)
-        cv2.circle(image, (landmark[0], landmark[1]), 5, (0, 0, 0), 1)
-
-    return image
-
-def draw_info_text(image, brect, handedness, hand_sign_text):
-    cv2.rectangle(image, (brect[0], brect[1]), (brect[2], brect[1] - 22), (0, 0, 0), -1)
-
-    info_text = handedness.classification[0].label[0:]
-    if hand_sign_text != "":
-        info_text = info_text + ":" + hand_sign_text
-
-    cv2.putText(
-        image,
-        info_text,
-        (brect[0] + 5, brect[1] - 4),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.6,
-        (255, 255, 255),
-        1,
-        cv2.LINE_AA,
-    )
-
-    return image
-
-def draw_bounding_rect(image, brect):
-    # Outer rectangle
-    cv2.rectangle(image, (brect[0], brect[1]), (brect[2], brect[3]), (0, 0, 0), 1)
-
-    return image
+                    if performance_panel is not None:
+                        snapshot = stage_timer.snapshot()
+                        with performance_panel.container():
+                            st.table(stage_rows(snapshot))
+                            st.caption(
+                                " | ".join(f"{name}: {value}" for name, value in snapshot["counters"].items())
+                            )
+                    if metrics_log is not None:
+                        metrics_log.maybe_write(stage_timer, mode="non_verbal")
+                    last_stats_time = current_time
+        finally:
+            pipeline.stop()